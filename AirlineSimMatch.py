@@ -1,104 +1,276 @@
+import argparse
+import json
+import os
+import sqlite3
+import threading
+import time
 import tkinter as tk
-from tkinter import messagebox
-import random
 from datetime import datetime, timedelta
 
+from game_clock import SPEEDS, GameClock, speed_label
+from gate_canvas import CanvasGateMap
+from gate_pool import GatePool
+from instrument import Instrumentation
+from score_store import ScoreStore, ShiftStats, default_player
+from sim_data import (NARROWBODY, WIDEBODY, airport_cities, gate_names, is_widebody, narrowbody_gates,
+                      widebody_gates)
+from sim_engine import SHIFT_START_HOUR, EventQueue, ShiftEngine, shift_config
+from shift_log import ShiftRecorder, ShiftReplayer, engine_from_log, read_log
+from snapshot import capture, restore
+from snapshot import load as load_snapshot
+from snapshot import save as save_snapshot
+from toasts import ToastQueue
+
 # --- Game setup ---
-score = 0
-lives = 5  # Will be set based on difficulty (5 for easy, 3 for hard)
-all_gates = ["A1", "A2", "A3", "A4", "A5", "A6", "A7", "A8", "B1", "B2", "B3", "B4", "B5"]
-available_gates = all_gates.copy()
-current_flight = None
+engine = None  # Headless ShiftEngine that owns all game state and rules
+engine_timer = None  # The game's single root.after timer, pumping all clocks
+ENGINE_TICK_MS = 20  # Real milliseconds between engine clock pumps
+game_clock = GameClock()  # Paces virtual time against the monotonic clock at the chosen speed
+view_timers = EventQueue()  # UI-only timers (notification clears), pumped with the engine
+departure_label_timers = {}  # Pending "DEPARTED" label clear for each gate
 gate_buttons = {}
-occupied_gates = {}
-departure_timers = {}
 plane_labels = {}  # Track plane emoji labels for each gate
 departure_labels = {}  # Track departure notification labels for each gate
-game_time = None  # Current game time (9am to 5pm)
-game_time_start = None  # Start of shift
-game_time_end = None  # End of shift
-time_timer = None  # Timer for game clock
-assignment_timer = None  # Timer for assignment countdown
-game_over = False  # Track if game is over
-countdown_remaining = 5  # Countdown seconds remaining (5 easy, 3 hard)
-game_paused = False  # Track if game is paused
-hint_used = False  # Track if hint was used for current flight
+gate_view = {}  # Widget options last drawn for each gate, to skip unchanged ones
+gate_canvas = None  # CanvasGateMap when the map is drawn on one canvas instead of widgets
+renderer = "auto"  # Gate map renderer: "widgets", "canvas", or "auto" to pick by gate count
+CANVAS_MIN_GATES = 40  # From this many gates "auto" draws the map on a canvas
+dirty_gates = set()  # Gates changed since the last redraw
+render_pending = None  # Idle callback that redraws dirty gates
+buttons_enabled = False  # Whether free gates currently accept clicks
 difficulty = "easy"  # Game difficulty: "easy" or "hard"
+record_dir = None  # Directory to log every shift to, if recording
+recorder = None  # ShiftRecorder for the shift being played
+replayer = None  # ShiftReplayer driving the engine while watching a log
+save_path = None  # Where the shift in play is autosaved, for resuming after quitting or a crash
+instrumentation = None  # Callback timings, only when started with --instrument
+overlay_label = None  # Latency overlay, toggled with F12 when instrumented
+OVERLAY_REFRESH_PUMPS = 50  # Clock pumps between overlay redraws (about once a second)
+TOAST_COLORS = {"info": "#34495e", "error": "#c0392b"}
+score_store = None  # ScoreStore every finished shift is recorded to, unless turned off
+player = None  # Name finished shifts are recorded under
+leaderboard_read = None  # Result of the latest leaderboard read; older reads are ignored
+LEADERBOARD_SIZE = 5  # Top scores shown per difficulty
+LEADERBOARD_POLL_MS = 50
+# Gates on the map by size class, and a stand-in with all of them free while no game is running
+gate_layout = {NARROWBODY: list(narrowbody_gates), WIDEBODY: list(widebody_gates)}
+idle_gates = GatePool(gate_layout)
+
+def current_gates():
+    """Gate pool the map should show"""
+    return engine.gates if engine else idle_gates
+
+def format_game_time(minutes):
+    """Format minutes since the start of the shift as a wall-clock time"""
+    game_time = datetime.now().replace(hour=SHIFT_START_HOUR, minute=0, second=0, microsecond=0)
+    return (game_time + timedelta(minutes=minutes)).strftime('%I:%M %p')
+
+def new_engine():
+    """Create a fresh engine for the current difficulty and hook the UI to it"""
+    global engine, replayer
+    stop_engine()
+    close_recorder()
+    replayer = None
+    config = shift_config(difficulty, n_narrowbody=len(gate_layout[NARROWBODY]),
+                          n_widebody=len(gate_layout[WIDEBODY]))
+    engine = ShiftEngine(difficulty, config=config)
+    engine.subscribe(on_engine_event)
+    start_recorder()
+    start_score_stats()
+    return engine
+
+def start_recorder():
+    global recorder
+    if record_dir:
+        os.makedirs(record_dir, exist_ok=True)
+        name = f"shift-{datetime.now():%Y%m%d-%H%M%S}-{engine.seed}.jsonl"
+        recorder = ShiftRecorder(engine, os.path.join(record_dir, name))
+
+def start_score_stats():
+    """Record the shift in play to the score history when it ends"""
+    if score_store is not None:
+        ShiftStats(engine, score_store, player)
+
+def close_recorder():
+    global recorder
+    if recorder:
+        recorder.close()
+        recorder = None
+
+def load_replay(path, speed=1):
+    """Set up the engine to play back a recorded shift log at speed"""
+    global engine, replayer, difficulty
+    stop_engine()
+    close_recorder()
+    header, records = read_log(path)
+    difficulty = header["difficulty"]
+    engine = engine_from_log(header, records)
+    set_gate_layout(engine.gates.gates)
+    engine.subscribe(on_engine_event)
+    # Subscribed after the view, so each event is drawn before the next input
+    replayer = ShiftReplayer(engine, records, header["end_time"])
+    game_clock.set_speed(speed, engine.now)
+
+def autosave():
+    """Snapshot the shift in play to save_path so it can be resumed later"""
+    if save_path and engine is not None and engine.started and not engine.game_over and replayer is None:
+        save_snapshot(capture(engine), save_path)
+
+def discard_save():
+    """Delete the autosave once the shift it belongs to is over; a replay never touches it"""
+    if save_path and replayer is None and os.path.exists(save_path):
+        os.remove(save_path)
 
-narrowbody_aircraft = ["A220", "B737", "B757", "E175", "CRJ900", "B717", "A321"]
-widebody_aircraft = ["B777", "B787", "A350", "A330", "B767", "A380", "B787"]
-narrowbody_gates = ["A1", "A2", "A3", "A4", "A5", "A6", "A7", "A8"]
-widebody_gates = ["B1", "B2", "B3", "B4", "B5"]
-
-# Airport code to city name mapping
-airport_cities = {
-    # Domestic
-    "ATL": "Atlanta", "MSP": "Minneapolis", "DTW": "Detroit", "SLC": "Salt Lake City",
-    "LAX": "Los Angeles", "JFK": "New York", "BOS": "Boston", "SEA": "Seattle",
-    "DEN": "Denver", "ORD": "Chicago", "MIA": "Miami", "MCO": "Orlando",
-    "LAS": "Las Vegas", "PHX": "Phoenix", "SFO": "San Francisco", "DCA": "Washington DC",
-    "PDX": "Portland", "SAN": "San Diego", "TPA": "Tampa", "AUS": "Austin",
-    "RDU": "Raleigh", "CLT": "Charlotte", "PHL": "Philadelphia", "BWI": "Baltimore",
-    # International
-    "LHR": "London", "CDG": "Paris", "AMS": "Amsterdam", "FCO": "Rome",
-    "BCN": "Barcelona", "MAD": "Madrid", "FRA": "Frankfurt", "MUC": "Munich",
-    "HND": "Tokyo", "ICN": "Seoul", "PVG": "Shanghai", "HKG": "Hong Kong",
-    "SYD": "Sydney", "MEL": "Melbourne", "GRU": "São Paulo", "EZE": "Buenos Aires",
-    "SCL": "Santiago", "CPH": "Copenhagen", "NCE": "Nice", "BER": "Berlin",
-    "ARN": "Stockholm", "LIS": "Lisbon", "DUB": "Dublin", "ZRH": "Zurich"
-}
-
-def is_widebody(aircraft):
-    return aircraft in widebody_aircraft
-
-def can_use_gate(aircraft, gate):
-    if is_widebody(aircraft):
-        return gate in widebody_gates
+def resume_saved_shift():
+    """Carry on the autosaved shift from where it was left"""
+    global engine, replayer, difficulty
+    try:
+        saved = load_snapshot(save_path)
+    except (OSError, ValueError, KeyError, TypeError) as error:
+        toasts.push("Save Unreadable", f"The saved shift could not be resumed: {error}", kind="error")
+        return
+    stop_engine()
+    close_recorder()
+    replayer = None
+    difficulty = saved.difficulty
+    engine = restore(saved)
+    set_gate_layout(engine.gates.gates)
+    # Saved while paused: it resumes running, before the view is listening
+    engine.set_paused(False)
+    engine.subscribe(on_engine_event)
+    start_score_stats()
+    show_game()
+    sync_view()
+
+def start_engine():
+    """Start (or resume) pumping the engine from its current virtual time"""
+    game_clock.reset(engine.now)
+    run_engine()
+
+def run_engine():
+    """Advance the engine and view clocks; the only recurring root.after timer in the game
+
+    Arrivals, countdowns, departures and notification clears all live in
+    these two queues, so pausing is just not calling this and every pending
+    timer keeps its exact remaining time. How far each pump advances comes
+    from game_clock, so a late pump catches up instead of drifting.
+    """
+    global engine_timer
+    engine_timer = None
+    if engine is None or engine.game_over:
+        return
+    if instrumentation:
+        instrumentation.pump()
+        refresh_overlay()
+    if game_clock.unbounded:
+        game_clock.run_unbounded(advance_clocks, engine_idle)
     else:
-        return gate in narrowbody_gates
-
-def generate_flight():
-    flight_num = "DL" + str(random.randint(100, 999))
-    
-    # Domestic destinations (narrowbody aircraft only)
-    domestic_destinations = [
-        "ATL", "MSP", "DTW", "SLC", "LAX", "JFK", "BOS", "SEA", 
-        "DEN", "ORD", "MIA", "MCO", "LAS", "PHX", "SFO", "DCA",
-        "PDX", "SAN", "TPA", "AUS", "RDU", "CLT", "PHL", "BWI"
-    ]
-    
-    # International destinations (widebody aircraft only)
-    international_destinations = [
-        "LHR", "CDG", "AMS", "FCO", "BCN", "MAD", "FRA", "MUC",
-        "HND", "ICN", "PVG", "HKG", "SYD", "MEL", "GRU", "EZE",
-        "SCL", "CPH", "NCE", "BER", "ARN", "LIS", "DUB", "ZRH"
-    ]
-    
-    # Randomly decide if this is a widebody flight (60% narrowbody, 40% widebody)
-    # Ratio closer to gate availability: 8 narrowbody gates, 5 widebody gates
-    use_widebody = random.random() < 0.40
-    
-    if use_widebody:
-        aircraft = random.choice(widebody_aircraft)
-        # Widebody only international
-        destination = random.choice(international_destinations)
+        advance_clocks(game_clock.due(engine.now))
+    if replayer and replayer.finished and not engine.game_over:
+        result_label.config(text="⏹ End of recording")
+        return
+    if not engine.game_over:
+        engine_timer = root.after(ENGINE_TICK_MS, run_engine)
+        if instrumentation:
+            instrumentation.scheduled(ENGINE_TICK_MS)
+
+def advance_clocks(ms):
+    """Move the engine (or the replay driving it) and the view timers on by ms"""
+    if ms <= 0:
+        return
+    if replayer:
+        replayer.advance(ms)
     else:
-        aircraft = random.choice(narrowbody_aircraft)
-        # Narrowbody only domestic
-        destination = random.choice(domestic_destinations)
-    
-    return {"flight": flight_num, "aircraft": aircraft, "destination": destination}
+        engine.advance(ms)
+    view_timers.run_until(view_timers.now + ms)
+
+def engine_idle():
+    """Whether there is nothing left for the clock to run"""
+    return engine.game_over or engine.paused or (replayer is not None and replayer.finished)
+
+def cycle_speed():
+    """Step the game clock to the next speed: 1x, 4x, 60x, unbounded"""
+    speed = SPEEDS[0]
+    if game_clock.speed in SPEEDS:
+        speed = SPEEDS[(SPEEDS.index(game_clock.speed) + 1) % len(SPEEDS)]
+    game_clock.set_speed(speed, engine.now if engine else 0)
+    speed_btn.config(text=f"⏩ {speed_label(speed)}")
+
+def stop_engine():
+    global engine_timer
+    if engine_timer:
+        root.after_cancel(engine_timer)
+        engine_timer = None
+    if instrumentation:
+        instrumentation.pause()
+
+def toggle_overlay(event=None):
+    """Show or hide the callback latency overlay"""
+    global overlay_label
+    if overlay_label is None:
+        overlay_label = tk.Label(root, text="", font=("Courier", 8), justify=tk.LEFT,
+                                 bg="black", fg="#2ecc71")
+    if overlay_label.winfo_ismapped():
+        overlay_label.place_forget()
+    else:
+        overlay_label.place(relx=1.0, rely=0.0, anchor="ne")
+        refresh_overlay(force=True)
+
+def refresh_overlay(force=False):
+    if overlay_label is None or not overlay_label.winfo_ismapped():
+        return
+    if force or instrumentation.pumps % OVERLAY_REFRESH_PUMPS == 0:
+        overlay_label.config(text="\n".join(instrumentation.report_lines()))
+
+def show_toast(toast):
+    toast_label.config(text=toast.text(), bg=TOAST_COLORS[toast.kind])
+    toast_label.place(relx=0.5, rely=0.98, anchor="s")
+    toast_label.lift()
+
+def hide_toast():
+    toast_label.place_forget()
+
+def cancel_after(timer):
+    if timer:
+        root.after_cancel(timer)
+
+def clear_departure_labels():
+    """Drop every pending notification clear and blank the labels"""
+    view_timers.clear()
+    departure_label_timers.clear()
+    if gate_canvas:
+        gate_canvas.clear_departures()
+    for gate in departure_labels:
+        departure_labels[gate].config(text="")
+
+def on_engine_event(kind, fields):
+    """Route engine events to the matching view update"""
+    if kind == "clock":
+        update_game_time(fields['minutes'])
+    elif kind == "flight":
+        next_flight(fields['flight'])
+    elif kind == "countdown":
+        update_countdown_display(fields['remaining'])
+    elif kind == "assigned":
+        show_assignment(fields['gate'], fields['flight'], fields['points'])
+    elif kind == "wrong_gate":
+        show_wrong_gate(fields['gate'], fields['flight'])
+    elif kind == "timeout":
+        assignment_timeout()
+    elif kind == "departed":
+        depart_plane(fields['gate'])
+    elif kind == "game_over":
+        discard_save()
+        show_end_game_dialog(fields['won'], fields['score'])
+    if kind == "clock" and fields['minutes'] % 60 == 0:
+        # Every game hour, so a crash loses little
+        autosave()
 
 def show_end_game_dialog(is_win, final_score):
     """Show game over dialog with replay and close options"""
-    global game_over
-    game_over = True
-    
-    # Cancel all timers
-    if time_timer:
-        root.after_cancel(time_timer)
-    if assignment_timer:
-        root.after_cancel(assignment_timer)
+    stop_engine()
+    countdown_label.config(text="")
+    disable_all_buttons()
     
     # Create custom dialog
     dialog = tk.Toplevel(root)
@@ -140,41 +312,17 @@ def show_end_game_dialog(is_win, final_score):
 
 def restart_game(dialog=None):
     """Restart the game from beginning"""
-    global score, lives, available_gates, occupied_gates, departure_timers, current_flight
-    global game_time, game_time_start, game_time_end, game_over, assignment_timer, time_timer, game_paused, hint_used
-    
     # Close dialog if exists
     if dialog:
         dialog.destroy()
     
     # Reset game state
-    game_over = False
-    game_paused = False
-    hint_used = False
-    score = 0
-    lives = 5 if difficulty == "easy" else 3
-    available_gates = all_gates.copy()
-    occupied_gates = {}
-    departure_timers = {}
-    current_flight = None
-    
-    # Cancel all existing timers
-    for timer_id in departure_timers.values():
-        root.after_cancel(timer_id)
-    if assignment_timer:
-        root.after_cancel(assignment_timer)
-    if time_timer:
-        root.after_cancel(time_timer)
-    
-    # Reset time to 9am
-    game_time_start = datetime.now().replace(hour=9, minute=0, second=0, microsecond=0)
-    game_time = game_time_start
-    game_time_end = game_time_start.replace(hour=17, minute=0)  # 5pm
+    new_engine()
     
     # Update displays
-    score_label.config(text=f"Score: {score}")
-    lives_label.config(text=f"Lives: {'❤️' * lives}")
-    time_label.config(text=f"Time: {game_time.strftime('%I:%M %p')}")
+    score_label.config(text=f"Score: {engine.score}")
+    update_lives_display()
+    time_label.config(text=f"Time: {format_game_time(0)}")
     result_label.config(text="")
     countdown_label.config(text="")
     if difficulty == "hard":
@@ -184,80 +332,52 @@ def restart_game(dialog=None):
     hint_btn.config(text="💡 Get Hint", bg="#f39c12", state=tk.NORMAL)
     
     # Clear all departure notifications
-    for gate in departure_labels:
-        departure_labels[gate].config(text="")
+    clear_departure_labels()
+    toasts.clear()
     
-    update_gate_display()
+    mark_gates_dirty()
     
     # Start new game
-    update_game_time()
-    next_flight()
+    engine.start()
+    start_engine()
 
 def toggle_pause():
     """Toggle game pause state"""
-    global game_paused
-    
-    if game_over:
+    if engine is None or engine.game_over:
         return
     
-    game_paused = not game_paused
+    engine.set_paused(not engine.paused)
     
-    if game_paused:
-        # Pause the game
+    if engine.paused:
+        # Pause the game; the engine clock stops with every timer intact
+        stop_engine()
+        autosave()
         pause_btn.config(text="▶ Resume", bg="#2ecc71")
         result_label.config(text="⏸️ GAME PAUSED ⏸️", fg="#f39c12")
         disable_all_buttons()
-        
-        # Cancel timers
-        if assignment_timer:
-            root.after_cancel(assignment_timer)
-        if time_timer:
-            root.after_cancel(time_timer)
     else:
         # Resume the game
         pause_btn.config(text="⏸ Pause", bg="#3498db")
         result_label.config(text="")
         enable_all_buttons()
-        
-        # Restart timers
-        update_game_time()
-        start_assignment_countdown()
+        start_engine()
 
 def return_to_main_menu():
     """Return to main menu from active game"""
-    global game_over, game_paused, score, lives, available_gates, occupied_gates, departure_timers, current_flight
-    global game_time, game_time_start, game_time_end, assignment_timer, time_timer, hint_used
-    
-    # Cancel all timers first
-    if time_timer:
-        root.after_cancel(time_timer)
-        time_timer = None
-    if assignment_timer:
-        root.after_cancel(assignment_timer)
-        assignment_timer = None
-    for timer_id in list(departure_timers.values()):
-        root.after_cancel(timer_id)
-    
-    # Reset game state completely
-    game_over = False
-    game_paused = False
-    score = 0
-    lives = 5
-    available_gates = all_gates.copy()
-    occupied_gates = {}
-    departure_timers = {}
-    current_flight = None
-    hint_used = False
-    game_time = None
-    game_time_start = None
-    game_time_end = None
+    global engine, replayer
+    
+    # Stop the engine and drop its state completely; the autosave keeps the shift
+    stop_engine()
+    autosave()
+    close_recorder()
+    engine = None
+    replayer = None
     
     # Reset all gate displays and buttons
-    update_gate_display()
-    for gate in plane_labels:
-        plane_labels[gate].config(text="")
-    for gate in departure_labels:
-        departure_labels[gate].config(text="")
+    disable_all_buttons()
+    mark_gates_dirty()
+    clear_departure_labels()
+    toasts.clear()
     
     # Reset UI labels
     score_label.config(text="Score: 0")
@@ -277,375 +397,398 @@ def return_to_main_menu():
 
 def show_hint():
     """Show the city name for the current flight destination"""
-    global hint_used
-    
     if difficulty == "hard":
-        messagebox.showinfo("Hard Mode", "Hints are not available in Hard Mode!")
+        toasts.push("Hard Mode", "Hints are not available in Hard Mode!", key="hint")
         return
     
-    if game_over or game_paused or not current_flight:
+    if engine is None or engine.game_over or engine.paused or not engine.current_flight:
+        return
+    if replayer:
         return
     
-    if hint_used:
-        messagebox.showinfo("Hint Already Used", "You've already used the hint for this flight!")
+    if engine.hint_used:
+        toasts.push("Hint Already Used", "You've already used the hint for this flight!", key="hint")
         return
     
-    hint_used = True
-    airport_code = current_flight['destination']
+    current_flight = engine.use_hint()
+    airport_code = current_flight.destination
     city_name = airport_cities.get(airport_code, "Unknown City")
     
     # Update hint button to show it was used
     hint_btn.config(text="💡 Hint Used", bg="#95a5a6", state=tk.DISABLED)
     
-    # Show the city name in a message box
-    messagebox.showinfo("Destination Hint", 
-                       f"✈️ Flight {current_flight['flight']}\n\n"
-                       f"Destination: {airport_code} - {city_name}\n\n"
-                       f"Aircraft: {current_flight['aircraft']}")
+    # Show the city name without stopping the game
+    toasts.push("💡 Destination Hint",
+                f"✈️ Flight {current_flight.flight} | Destination: {airport_code} - {city_name} | "
+                f"Aircraft: {current_flight.aircraft}", key="hint")
 
 def depart_plane(gate):
-    global game_over
-    if game_over or game_paused:
-        return
-    
-    if gate in occupied_gates:
-        available_gates.append(gate)
-        del occupied_gates[gate]
-        
-        # Show departure notification next to the gate
-        if gate in departure_labels:
-            departure_labels[gate].config(text=f"✈️ DEPARTED", fg="#3498db")
-            root.after(3000, lambda g=gate: departure_labels[g].config(text=""))
-        
-        enable_all_buttons()
-        update_gate_display()
+    # Show departure notification next to the gate
+    if gate in gate_view:
+        show_departure_notice(gate, True)
+        # A newer departure from the same gate restarts its 3 second display
+        view_timers.cancel(departure_label_timers.get(gate))
+        departure_label_timers[gate] = view_timers.schedule(3000, clear_departure_label, gate)
+    
+    mark_gates_dirty(gate)
 
-def schedule_departure(gate):
-    departure_time = random.randint(5000, 20000)
-    timer_id = root.after(departure_time, lambda: depart_plane(gate))
-    departure_timers[gate] = timer_id
+def clear_departure_label(gate):
+    departure_label_timers.pop(gate, None)
+    show_departure_notice(gate, False)
 
-def update_game_time():
-    global game_time, time_timer, game_over
-    if game_over or game_paused:
-        return
-    
-    # Advance time by 5 minutes per tick (10 seconds real time = 1 hour game time = 12 ticks)
-    game_time += timedelta(minutes=5)
-    
-    # Check if shift is over (5pm)
-    if game_time >= game_time_end:
-        game_over = True
-        show_end_game_dialog(True, score)
-        return
-    
+def show_departure_notice(gate, shown):
+    if gate_canvas:
+        gate_canvas.set_departure(gate, shown)
+    else:
+        departure_labels[gate].config(text="✈️ DEPARTED" if shown else "", fg="#3498db")
+
+def sync_view():
+    """Draw the engine's whole state from scratch, e.g. after resuming a saved shift"""
+    score_label.config(text=f"Score: {engine.score}")
+    update_lives_display()
+    time_label.config(text=f"Time: {format_game_time(engine.game_minutes)}")
+    flight_label.config(text="")
+    result_label.config(text="")
+    countdown_label.config(text="")
+    disable_all_buttons()
+    flight = engine.current_flight
+    if flight is not None:
+        next_flight(flight)
+        # The countdown shows its starting value twice before counting down
+        update_countdown_display(min(engine.countdown_remaining + 1, engine.config.countdown_seconds))
+        if engine.hint_used:
+            hint_btn.config(text="💡 Hint Used", bg="#95a5a6", state=tk.DISABLED)
+    mark_gates_dirty()
+
+def update_game_time(minutes):
     # Update time display
-    time_label.config(text=f"Time: {game_time.strftime('%I:%M %p')}")
-    
-    # Schedule next time update (~0.833 seconds real time)
-    time_timer = root.after(833, update_game_time)
+    time_label.config(text=f"Time: {format_game_time(minutes)}")
 
 def update_lives_display():
     """Update the lives display with hearts"""
-    hearts = "❤️" * lives
+    hearts = "❤️" * engine.lives
     lives_label.config(text=f"Lives: {hearts}")
 
-def update_countdown_display():
-    global countdown_remaining, assignment_timer, game_over
-    if game_over or game_paused:
-        return
-    
-    if countdown_remaining > 0:
-        # Colors: blue for safe, orange for warning, red for danger
-        if countdown_remaining >= 3:
-            color = "#3498db"  # Blue
-        elif countdown_remaining == 2:
-            color = "#f39c12"  # Orange
-        else:
-            color = "#e74c3c"  # Red
-        text = f"⚠️ {countdown_remaining} ⚠️" if countdown_remaining == 1 else f"⏰ {countdown_remaining}"
-        countdown_label.config(text=text, fg=color, font=("Arial", 24, "bold"))
-        
-        countdown_remaining -= 1
-        assignment_timer = root.after(1000, update_countdown_display)
+def update_countdown_display(countdown_remaining):
+    # Colors: blue for safe, orange for warning, red for danger
+    if countdown_remaining >= 3:
+        color = "#3498db"  # Blue
+    elif countdown_remaining == 2:
+        color = "#f39c12"  # Orange
     else:
-        assignment_timeout()
-
-def start_assignment_countdown():
-    global countdown_remaining, assignment_timer, game_over
-    if game_over:
-        return
-    
-    # Cancel existing timer if any
-    if assignment_timer:
-        root.after_cancel(assignment_timer)
-    
-    # Set countdown based on difficulty (5 seconds for easy, 3 for hard)
-    countdown_remaining = 5 if difficulty == "easy" else 3
-    countdown_label.config(text=f"⏰ {countdown_remaining}", fg="#3498db", font=("Arial", 24, "bold"))
-    
-    # Start countdown display updates
-    assignment_timer = root.after(1000, update_countdown_display)
+        color = "#e74c3c"  # Red
+    text = f"⚠️ {countdown_remaining} ⚠️" if countdown_remaining == 1 else f"⏰ {countdown_remaining}"
+    countdown_label.config(text=text, fg=color, font=("Arial", 24, "bold"))
 
 def assignment_timeout():
-    global game_over, lives
-    if game_over:
-        return
-    
-    # Lose a life for timeout
-    lives -= 1
     update_lives_display()
-    
-    result_label.config(text=f"⏰ Time's up! Lost 1 life | Lives remaining: {lives}")
-    
-    # Check for game over
-    if lives <= 0:
-        game_over = True
-        show_end_game_dialog(False, score)
-        return
-    
-    # Move to next flight
-    root.after(1000, next_flight)
+    countdown_label.config(text="")
+    disable_all_buttons()
+    result_label.config(text=f"⏰ Time's up! Lost 1 life | Lives remaining: {engine.lives}")
 
-def next_flight():
-    global current_flight, game_over, hint_used
-    if game_over or game_paused:
-        return
-    
+def next_flight(current_flight):
     # Reset hint for new flight (only in easy mode)
-    hint_used = False
     if difficulty == "easy":
         hint_btn.config(text="💡 Get Hint", bg="#f39c12", state=tk.NORMAL)
     
-    current_flight = generate_flight()
     flight_label.config(
-        text=f"Incoming flight {current_flight['flight']} to {current_flight['destination']} ({current_flight['aircraft']})"
+        text=f"Incoming flight {current_flight.flight} to {current_flight.destination} ({current_flight.aircraft})"
     )
     result_label.config(text="")
     enable_all_buttons()
-    
-    # Start countdown timer (5 seconds easy, 3 seconds hard)
-    start_assignment_countdown()
 
 def disable_all_buttons():
-    for btn in gate_buttons.values():
-        btn.config(state=tk.DISABLED)
+    set_buttons_enabled(False)
 
 def enable_all_buttons():
-    for gate, btn in gate_buttons.items():
-        if gate in available_gates:
-            btn.config(state=tk.NORMAL)
-        else:
-            btn.config(state=tk.DISABLED)
+    # Gates never take clicks while a recording plays
+    set_buttons_enabled(replayer is None)
+
+def set_buttons_enabled(enabled):
+    """Let free gates take clicks or not; occupied gates are always disabled"""
+    global buttons_enabled
+    if enabled != buttons_enabled:
+        buttons_enabled = enabled
+        mark_gates_dirty()
+
+def mark_gates_dirty(*gates):
+    """Queue gates (all of them if none given) for the next redraw
+
+    Changes made while handling one batch of events are coalesced into a
+    single update_gate_display() call once Tk is idle.
+    """
+    global render_pending
+    dirty_gates.update(gates or gate_view)
+    if render_pending is None:
+        render_pending = root.after_idle(update_gate_display)
+
+def gate_widget_options(gate, gates):
+    """Button options and plane emoji a gate should currently show"""
+    flight = gates.flight_at(gate)
+    widebody_gate = gates.class_of(gate) == WIDEBODY
+    btn_height = 2 if widebody_gate else 1
+    if flight is not None:
+        return {"text": flight.flight, "bg": "lightcoral", "state": tk.DISABLED, "height": btn_height}, "🛬"
+    state = tk.NORMAL if buttons_enabled else tk.DISABLED
+    bg = "#f5b041" if widebody_gate else "#2ecc71"
+    return {"text": gate, "bg": bg, "state": state, "height": btn_height}, ""
 
 def update_gate_display():
-    for gate, btn in gate_buttons.items():
-        if gate in occupied_gates:
-            btn_height = 2 if gate in widebody_gates else 1
-            btn.config(text=occupied_gates[gate]['flight'], bg="lightcoral", state=tk.DISABLED, font=("Arial", 8, "bold"), width=5, height=btn_height)
-            if gate in plane_labels:
-                plane_labels[gate].config(text="🛬")
-        else:
-            if gate in widebody_gates:
-                btn.config(text=gate, bg="#f5b041", state=tk.NORMAL, font=("Arial", 8, "bold"), width=5, height=2)
+    """Redraw dirty gates, reconfiguring only the options that changed"""
+    global render_pending
+    render_pending = None
+    gates = current_gates()
+    for gate in dirty_gates:
+        options, plane = gate_widget_options(gate, gates)
+        drawn_options, drawn_plane = gate_view[gate]
+        changed = {key: value for key, value in options.items() if drawn_options.get(key) != value}
+        if changed:
+            if gate_canvas:
+                gate_canvas.configure_gate(gate, **changed)
             else:
-                btn.config(text=gate, bg="#2ecc71", state=tk.NORMAL, font=("Arial", 8, "bold"), width=5, height=1)
-            if gate in plane_labels:
-                plane_labels[gate].config(text="")
+                gate_buttons[gate].config(**changed)
+        if plane != drawn_plane:
+            if gate_canvas:
+                gate_canvas.set_plane(gate, plane)
+            else:
+                plane_labels[gate].config(text=plane)
+        gate_view[gate] = (options, plane)
+    dirty_gates.clear()
 
 def assign_gate(gate):
-    global score, assignment_timer, game_over, lives
-    if game_over or game_paused:
+    if engine is None or engine.game_over or engine.paused or replayer:
         return
     
-    # Cancel the countdown timer
-    if assignment_timer:
-        root.after_cancel(assignment_timer)
-        assignment_timer = None
-    
     # Clear countdown display
     countdown_label.config(text="")
     
     disable_all_buttons()
     
-    if not can_use_gate(current_flight['aircraft'], gate):
-        # Lose a life for wrong gate
-        lives -= 1
-        update_lives_display()
-        
-        if is_widebody(current_flight['aircraft']):
-            messagebox.showerror("Gate Too Small", f"❌ {current_flight['aircraft']} is a WIDEBODY!\n\nToo large for A gates. Must use B gates.\n\n💔 Lost 1 life!")
-            result_label.config(text=f"❌ Widebody cannot fit in Gate {gate} | Lives: {lives}")
-        else:
-            messagebox.showerror("Gate Too Large", f"❌ {current_flight['aircraft']} is a NARROWBODY!\n\nToo small for B gates. Must use A gates.\n\n💔 Lost 1 life!")
-            result_label.config(text=f"❌ Narrowbody must use A gates, not {gate} | Lives: {lives}")
-        
-        # Check for game over
-        if lives <= 0:
-            game_over = True
-            show_end_game_dialog(False, score)
-            return
-        
-        enable_all_buttons()
-        root.after(1000, next_flight)
-        return
-    
-    available_gates.remove(gate)
-    occupied_gates[gate] = current_flight
+    # The engine answers with an "assigned" or "wrong_gate" event
+    engine.assign_gate(gate)
+
+def show_wrong_gate(gate, current_flight):
+    update_lives_display()
     
-    # Award points based on aircraft type
-    if is_widebody(current_flight['aircraft']):
-        points = 20
-        result_label.config(text=f"✅ {current_flight['flight']} ({current_flight['aircraft']}) assigned to Gate {gate} (+20 pts)")
+    if is_widebody(current_flight.aircraft):
+        toasts.push("Gate Too Small", f"❌ {current_flight.aircraft} is a WIDEBODY! Too large for A gates. Must use B gates. 💔 Lost 1 life!",
+                    kind="error", key="wrong_gate")
+        result_label.config(text=f"❌ Widebody cannot fit in Gate {gate} | Lives: {engine.lives}")
     else:
-        points = 10
-        result_label.config(text=f"✅ {current_flight['flight']} ({current_flight['aircraft']}) assigned to Gate {gate} (+10 pts)")
-    
-    score += points
-    score_label.config(text=f"Score: {score}")
-    
-    schedule_departure(gate)
-    update_gate_display()
-    root.after(1000, next_flight)
+        toasts.push("Gate Too Large", f"❌ {current_flight.aircraft} is a NARROWBODY! Too small for B gates. Must use A gates. 💔 Lost 1 life!",
+                    kind="error", key="wrong_gate")
+        result_label.config(text=f"❌ Narrowbody must use A gates, not {gate} | Lives: {engine.lives}")
 
-# --- GUI setup ---
-root = tk.Tk()
-root.title("Airport Operations Simulator")
-root.geometry("700x600")
-root.config(bg="#87CEEB")  # Simple sky blue background
+def show_assignment(gate, current_flight, points):
+    # Award points based on aircraft type
+    result_label.config(text=f"✅ {current_flight.flight} ({current_flight.aircraft}) assigned to Gate {gate} (+{points} pts)")
+    score_label.config(text=f"Score: {engine.score}")
+    disable_all_buttons()
+    mark_gates_dirty(gate)
 
-# Header section (create but don't pack yet)
-header_frame = tk.Frame(root, bg="#5B9BD5", relief=tk.RAISED, bd=2)
+# --- GUI setup ---
+# Nothing here runs at import, so the game's logic can be imported without a
+# display. main() builds the window and the menu; the gate map is built the
+# first time a game starts. After that every widget is kept and reused across
+# restarts and trips back to the menu.
+root = None
+header_frame = None
+time_label = None
+flight_label = None
+lives_label = None
+score_label = None
+countdown_label = None
+pause_btn = None
+speed_btn = None
+hint_btn = None
+map_frame = None  # Built by build_gate_map() when the first game starts
+control_frame = None
+result_label = None
+toast_label = None
+toasts = None
+menu_frame = None
+resume_button = None
 
-title_label = tk.Label(header_frame, text="✈️ AIRPORT OPERATIONS SIMULATOR ✈️", 
-                       font=("Arial", 13, "bold"), bg="#5B9BD5", fg="white")
-title_label.pack(pady=5)
+def build_window():
+    """Create the root window with the game's header and control panels (not packed yet)"""
+    global root, header_frame, time_label, flight_label, lives_label, score_label, countdown_label
+    global pause_btn, speed_btn, hint_btn, control_frame, result_label, toast_label, toasts
+    root = tk.Tk()
+    root.title("Airport Operations Simulator")
+    root.geometry("700x600")
+    root.config(bg="#87CEEB")  # Simple sky blue background
+    
+    # Header section (create but don't pack yet)
+    header_frame = tk.Frame(root, bg="#5B9BD5", relief=tk.RAISED, bd=2)
+    
+    title_label = tk.Label(header_frame, text="✈️ AIRPORT OPERATIONS SIMULATOR ✈️", 
+                           font=("Arial", 13, "bold"), bg="#5B9BD5", fg="white")
+    title_label.pack(pady=5)
+    
+    # Time display
+    time_label = tk.Label(header_frame, text="Time: 09:00 AM", font=("Arial", 10, "bold"),
+                         bg="#5B9BD5", fg="white")
+    time_label.pack(pady=2)
+    
+    flight_label = tk.Label(header_frame, text="", font=("Arial", 10, "bold"), 
+                            bg="#5B9BD5", fg="white")
+    flight_label.pack(pady=2)
+    
+    lives_label = tk.Label(header_frame, text="Lives: ❤️❤️❤️", font=("Arial", 11, "bold"),
+                          bg="#5B9BD5", fg="white")
+    lives_label.pack(pady=2)
+    
+    score_label = tk.Label(header_frame, text="Score: 0", font=("Arial", 10, "bold"),
+                           bg="#5B9BD5", fg="white")
+    score_label.pack(pady=2)
+    
+    # Countdown timer display 
+    countdown_label = tk.Label(header_frame, text="", font=("Arial", 20, "bold"),
+                              bg="#5B9BD5", fg="white")
+    countdown_label.pack(pady=5)
+    
+    # Pause/Quit button (will be configured based on difficulty)
+    pause_btn = tk.Button(header_frame, text="⏸ Pause", command=toggle_pause,
+                         bg="#3498db", fg="white", font=("Arial", 10, "bold"),
+                         width=12, height=1, relief=tk.RAISED, bd=2)
+    pause_btn.pack(pady=5)
+    
+    # Game clock speed: 1x, 4x, 60x or as fast as possible
+    speed_btn = tk.Button(header_frame, text="⏩ 1x", command=cycle_speed,
+                         bg="#8e44ad", fg="white", font=("Arial", 10, "bold"),
+                         width=12, height=1, relief=tk.RAISED, bd=2)
+    speed_btn.pack(pady=2)
+    
+    # Hint button
+    hint_btn = tk.Button(header_frame, text="💡 Get Hint", command=show_hint,
+                        bg="#f39c12", fg="white", font=("Arial", 10, "bold"),
+                        width=12, height=1, relief=tk.RAISED, bd=2)
+    hint_btn.pack(pady=2)
+    
+    # Control panel section (create but don't pack yet)
+    control_frame = tk.Frame(root, bg="#5B9BD5", relief=tk.RAISED, bd=3)
+    
+    result_label = tk.Label(control_frame, text="", font=("Arial", 11, "bold"), 
+                            bg="#5B9BD5", fg="white")
+    result_label.pack(pady=10)
+    
+    # Toast notifications float over the bottom of the window and never block the game
+    toast_label = tk.Label(root, text="", font=("Arial", 10, "bold"), fg="white", bg=TOAST_COLORS["info"],
+                           justify=tk.CENTER, padx=12, pady=6, relief=tk.RAISED, bd=2, wraplength=600)
+    toasts = ToastQueue(show_toast, hide_toast, root.after, cancel_after)
 
-# Time display
-time_label = tk.Label(header_frame, text="Time: 09:00 AM", font=("Arial", 10, "bold"),
-                     bg="#5B9BD5", fg="white")
-time_label.pack(pady=2)
+def build_terminal(column, title, gates, bg, gate_bg, btn_height):
+    """One terminal column of the gate map: a button, jetbridge, plane and notice per gate"""
+    terminal_frame = tk.Frame(map_frame, bg=bg, relief=tk.RIDGE, bd=4)
+    terminal_frame.grid(row=0, column=column, padx=40, pady=5)
+    
+    terminal_label = tk.Label(terminal_frame, text=title, 
+                              font=("Arial", 10, "bold"), bg=bg, fg="white")
+    terminal_label.pack(pady=3)
+    
+    for gate in gates:
+        # Container for gate + jetbridge + plane
+        gate_container = tk.Frame(terminal_frame, bg=bg)
+        gate_container.pack(pady=1)
+        
+        # Gate button
+        btn = tk.Button(gate_container, text=gate, width=5, height=btn_height, 
+                        command=lambda g=gate: assign_gate(g), bg=gate_bg, 
+                        font=("Arial", 8, "bold"), relief=tk.RAISED, bd=2)
+        btn.pack(side=tk.LEFT, padx=2)
+        gate_buttons[gate] = btn
+        gate_view[gate] = ({"text": gate, "bg": gate_bg, "state": tk.NORMAL, "height": btn_height}, "")
+        
+        # Jetbridge (line)
+        jetbridge = tk.Label(gate_container, text="━━", bg=bg, fg="white", font=("Arial", 10))
+        jetbridge.pack(side=tk.LEFT)
+        
+        # Plane emoji (initially hidden, fixed width to prevent movement)
+        plane = tk.Label(gate_container, text="", bg=bg, font=("Arial", 16), width=2)
+        plane.pack(side=tk.LEFT, padx=2)
+        plane_labels[gate] = plane
+        
+        # Departure notification label (initially hidden)
+        departure_notif = tk.Label(gate_container, text="", bg=bg, 
+                                  font=("Arial", 8, "bold"), fg="#3498db", width=12)
+        departure_notif.pack(side=tk.LEFT, padx=5)
+        departure_labels[gate] = departure_notif
 
-flight_label = tk.Label(header_frame, text="", font=("Arial", 10, "bold"), 
-                        bg="#5B9BD5", fg="white")
-flight_label.pack(pady=2)
+def uses_canvas():
+    """Whether the gate map is drawn on a single canvas"""
+    gate_count = sum(len(gates) for gates in gate_layout.values())
+    return renderer == "canvas" or (renderer == "auto" and gate_count >= CANVAS_MIN_GATES)
 
-lives_label = tk.Label(header_frame, text="Lives: ❤️❤️❤️", font=("Arial", 11, "bold"),
-                      bg="#5B9BD5", fg="white")
-lives_label.pack(pady=2)
+def build_gate_map():
+    """Create the gate map the first time a game starts; later games reuse it"""
+    global map_frame, gate_canvas
+    if map_frame is not None:
+        return
+    map_frame = tk.Frame(root, bg="#87CEEB")
+    if uses_canvas():
+        gate_canvas = CanvasGateMap(map_frame, gate_layout, assign_gate)
+        for gate in gate_canvas.items:
+            # Nothing drawn yet as far as the diff is concerned: the first redraw sets it all
+            gate_view[gate] = ({}, None)
+    else:
+        # Terminal A - Left side (vertical, green)
+        build_terminal(0, "TERMINAL A\nNARROWBODY", gate_layout[NARROWBODY], "#27ae60", "#2ecc71", 1)
+        # Terminal B - Right side (vertical, orange)
+        build_terminal(1, "TERMINAL B\nWIDEBODY", gate_layout[WIDEBODY], "#f39c12", "#f5b041", 2)
+    # Draw the new buttons from the current state on the next redraw
+    mark_gates_dirty()
 
-score_label = tk.Label(header_frame, text=f"Score: {score}", font=("Arial", 10, "bold"),
-                       bg="#5B9BD5", fg="white")
-score_label.pack(pady=2)
+def set_gate_layout(gates_by_class):
+    """Use these gates on the map, rebuilding it next game if they differ"""
+    global gate_layout, idle_gates, map_frame, gate_canvas
+    gates_by_class = {gate_class: list(gates_by_class.get(gate_class, ()))
+                      for gate_class in (NARROWBODY, WIDEBODY)}
+    if gates_by_class == gate_layout:
+        return
+    gate_layout = gates_by_class
+    idle_gates = GatePool(gate_layout)
+    if map_frame is not None:
+        map_frame.destroy()
+        map_frame = None
+    gate_canvas = None
+    view_timers.clear()
+    departure_label_timers.clear()
+    for widgets in (gate_buttons, plane_labels, departure_labels, gate_view):
+        widgets.clear()
+    dirty_gates.clear()
 
-# Countdown timer display 
-countdown_label = tk.Label(header_frame, text="", font=("Arial", 20, "bold"),
-                          bg="#5B9BD5", fg="white")
-countdown_label.pack(pady=5)
-
-# Pause/Quit button (will be configured based on difficulty)
-pause_btn = tk.Button(header_frame, text="⏸ Pause", command=toggle_pause,
-                     bg="#3498db", fg="white", font=("Arial", 10, "bold"),
-                     width=12, height=1, relief=tk.RAISED, bd=2)
-pause_btn.pack(pady=5)
-
-# Hint button
-hint_btn = tk.Button(header_frame, text="💡 Get Hint", command=show_hint,
-                    bg="#f39c12", fg="white", font=("Arial", 10, "bold"),
-                    width=12, height=1, relief=tk.RAISED, bd=2)
-hint_btn.pack(pady=2)
-
-map_frame = tk.Frame(root, bg="#87CEEB")
-
-# Terminal A - Left side (vertical, green)
-terminal_a_frame = tk.Frame(map_frame, bg="#27ae60", relief=tk.RIDGE, bd=4)
-terminal_a_frame.grid(row=0, column=0, padx=40, pady=5)
-
-a_label = tk.Label(terminal_a_frame, text="TERMINAL A\nNARROWBODY", 
-                   font=("Arial", 10, "bold"), bg="#27ae60", fg="white")
-a_label.pack(pady=3)
-
-for gate in ["A1", "A2", "A3", "A4", "A5", "A6", "A7", "A8"]:
-    # Container for gate + jetbridge + plane
-    gate_container = tk.Frame(terminal_a_frame, bg="#27ae60")
-    gate_container.pack(pady=1)
-    
-    # Gate button
-    btn = tk.Button(gate_container, text=gate, width=5, height=1, 
-                    command=lambda g=gate: assign_gate(g), bg="#2ecc71", 
-                    font=("Arial", 8, "bold"), relief=tk.RAISED, bd=2)
-    btn.pack(side=tk.LEFT, padx=2)
-    gate_buttons[gate] = btn
-    
-    # Jetbridge (line)
-    jetbridge = tk.Label(gate_container, text="━━", bg="#27ae60", fg="white", font=("Arial", 10))
-    jetbridge.pack(side=tk.LEFT)
-    
-    # Plane emoji (initially hidden, fixed width to prevent movement)
-    plane = tk.Label(gate_container, text="", bg="#27ae60", font=("Arial", 16), width=2)
-    plane.pack(side=tk.LEFT, padx=2)
-    plane_labels[gate] = plane
-    
-    # Departure notification label (initially hidden)
-    departure_notif = tk.Label(gate_container, text="", bg="#27ae60", 
-                              font=("Arial", 8, "bold"), fg="#3498db", width=12)
-    departure_notif.pack(side=tk.LEFT, padx=5)
-    departure_labels[gate] = departure_notif
-
-# Terminal B - Right side (vertical, orange)
-terminal_b_frame = tk.Frame(map_frame, bg="#f39c12", relief=tk.RIDGE, bd=4)
-terminal_b_frame.grid(row=0, column=1, padx=40, pady=5)
-
-b_label = tk.Label(terminal_b_frame, text="TERMINAL B\nWIDEBODY", 
-                   font=("Arial", 10, "bold"), bg="#f39c12", fg="white")
-b_label.pack(pady=3)
-
-for gate in ["B1", "B2", "B3", "B4", "B5"]:
-    # Container for gate + jetbridge + plane
-    gate_container = tk.Frame(terminal_b_frame, bg="#f39c12")
-    gate_container.pack(pady=1)
-    
-    # Gate button
-    btn = tk.Button(gate_container, text=gate, width=5, height=2, 
-                    command=lambda g=gate: assign_gate(g), bg="#f5b041", 
-                    font=("Arial", 8, "bold"), relief=tk.RAISED, bd=2)
-    btn.pack(side=tk.LEFT, padx=2)
-    gate_buttons[gate] = btn
-    
-    # Jetbridge (line)
-    jetbridge = tk.Label(gate_container, text="━━", bg="#f39c12", fg="white", font=("Arial", 10))
-    jetbridge.pack(side=tk.LEFT)
-    
-    # Plane emoji (initially hidden, fixed width to prevent movement)
-    plane = tk.Label(gate_container, text="", bg="#f39c12", font=("Arial", 16), width=2)
-    plane.pack(side=tk.LEFT, padx=2)
-    plane_labels[gate] = plane
-    
-    # Departure notification label (initially hidden)
-    departure_notif = tk.Label(gate_container, text="", bg="#f39c12", 
-                              font=("Arial", 8, "bold"), fg="#3498db", width=12)
-    departure_notif.pack(side=tk.LEFT, padx=5)
-    departure_labels[gate] = departure_notif
-
-# Control panel section (create but don't pack yet)
-control_frame = tk.Frame(root, bg="#5B9BD5", relief=tk.RAISED, bd=3)
-
-result_label = tk.Label(control_frame, text="", font=("Arial", 11, "bold"), 
-                        bg="#5B9BD5", fg="white")
-result_label.pack(pady=10)
-
-def start_game_from_menu(menu_frame, selected_difficulty):
+def start_game_from_menu(selected_difficulty):
     """Start the game after dismissing the menu"""
-    global game_time_start, game_time, game_time_end, difficulty, lives
+    global difficulty
     
-    # Set difficulty
+    # Set difficulty (lives follow from it inside the engine)
     difficulty = selected_difficulty
-    
-    # Set lives based on difficulty
-    lives = 5 if difficulty == "easy" else 3
-    
+    new_engine()
+    show_game()
+
+def benchmark_refresh(refreshes):
+    """Seconds each full gate-map redraw takes, for benchmarks.py"""
+    start_game_from_menu("easy")
+    stop_engine()
+    times = []
+    for i in range(refreshes):
+        start = time.perf_counter()
+        # Toggling clickability changes every free gate's button
+        set_buttons_enabled(i % 2 == 0)
+        root.update_idletasks()
+        times.append(time.perf_counter() - start)
+    return times
+
+def start_replay_from_menu(path, speed=1):
+    """Watch a recorded shift instead of playing"""
+    load_replay(path, speed)
+    show_game()
+
+def show_game():
+    """Swap the menu for the game screen and start the engine's shift"""
     # Hide menu
-    menu_frame.destroy()
+    menu_frame.pack_forget()
+    build_gate_map()
     
     # Show game elements (smaller header padding to focus on terminals)
     header_frame.pack(fill=tk.X, padx=10, pady=5)
@@ -653,40 +796,43 @@ def start_game_from_menu(menu_frame, selected_difficulty):
     control_frame.pack(padx=10, pady=5, fill=tk.X)
     
     # Update lives display
-    lives_label.config(text=f"Lives: {'❤️' * lives}")
+    update_lives_display()
     
     # Configure pause/quit button based on difficulty
-    if difficulty == "hard":
+    if difficulty == "hard" or replayer:
         pause_btn.config(text="🏠 Main Menu", command=return_to_main_menu, bg="#e74c3c")
     else:
         pause_btn.config(text="⏸ Pause", command=toggle_pause, bg="#3498db")
     
-    # Hide hint button in hard mode
+    # Hide hint button in hard mode; an earlier hard game may have hidden it
     if difficulty == "hard":
         hint_btn.pack_forget()
+    elif not hint_btn.winfo_ismapped():
+        hint_btn.pack(pady=2)
     
-    # Initialize game time (9am start)
-    game_time_start = datetime.now().replace(hour=9, minute=0, second=0, microsecond=0)
-    game_time = game_time_start
-    game_time_end = game_time_start.replace(hour=17, minute=0)  # 5pm end
-    
-    # Start the game
-    update_game_time()
-    next_flight()
+    # Start the game (9am start)
+    if replayer:
+        replayer.start()
+    else:
+        engine.start()
+    speed_btn.config(text=f"⏩ {speed_label(game_clock.speed)}")
+    start_engine()
 
-def show_main_menu():
-    """Display the main menu with instructions"""
+def build_main_menu():
+    """Create the main menu with instructions (not packed yet)"""
+    global menu_frame, resume_button, leaderboard_label
     menu_frame = tk.Frame(root, bg="#87CEEB")
-    menu_frame.pack(fill=tk.BOTH, expand=True)
     
     # Title
     title = tk.Label(menu_frame, text="✈️ AIRPORT OPERATIONS SIMULATOR ✈️",
                     font=("Arial", 18, "bold"), bg="#87CEEB", fg="white")
     title.pack(pady=15)
     
-    # Instructions panel
-    instructions_frame = tk.Frame(menu_frame, bg="#5B9BD5", relief=tk.RIDGE, bd=5)
-    instructions_frame.pack(padx=40, pady=10)
+    # Instructions panel, with the leaderboard beside it
+    panels_frame = tk.Frame(menu_frame, bg="#87CEEB")
+    panels_frame.pack(pady=10)
+    instructions_frame = tk.Frame(panels_frame, bg="#5B9BD5", relief=tk.RIDGE, bd=5)
+    instructions_frame.pack(side=tk.LEFT, padx=10)
     
     instructions_title = tk.Label(instructions_frame, text="📋 HOW TO PLAY",
                                  font=("Arial", 14, "bold"), bg="#5B9BD5", fg="white")
@@ -716,6 +862,17 @@ def show_main_menu():
                                  justify=tk.LEFT, padx=20, pady=10)
     instructions_label.pack()
     
+    # Leaderboard, filled in by load_leaderboard() once the scores are read
+    if score_store is not None:
+        leaderboard_frame = tk.Frame(panels_frame, bg="#5B9BD5", relief=tk.RIDGE, bd=5)
+        leaderboard_frame.pack(side=tk.LEFT, padx=10, fill=tk.Y)
+        leaderboard_title = tk.Label(leaderboard_frame, text="🏆 TOP SCORES",
+                                     font=("Arial", 14, "bold"), bg="#5B9BD5", fg="white")
+        leaderboard_title.pack(pady=10)
+        leaderboard_label = tk.Label(leaderboard_frame, text="", font=("Courier", 9),
+                                     bg="#5B9BD5", fg="white", justify=tk.LEFT, padx=10)
+        leaderboard_label.pack()
+    
     # Difficulty selection frame
     difficulty_frame = tk.Frame(menu_frame, bg="#87CEEB")
     difficulty_frame.pack(pady=15)
@@ -729,7 +886,7 @@ def show_main_menu():
     
     # Easy mode button
     easy_button = tk.Button(button_container, text="🟢 EASY MODE\n(Hints Available)", 
-                           command=lambda: start_game_from_menu(menu_frame, "easy"),
+                           command=lambda: start_game_from_menu("easy"),
                            bg="#2ecc71", fg="white", font=("Arial", 12, "bold"),
                            width=18, height=3, relief=tk.RAISED, bd=5,
                            cursor="hand2")
@@ -737,12 +894,18 @@ def show_main_menu():
     
     # Hard mode button
     hard_button = tk.Button(button_container, text="🔴 HARD MODE\n(No Hints)", 
-                           command=lambda: start_game_from_menu(menu_frame, "hard"),
+                           command=lambda: start_game_from_menu("hard"),
                            bg="#e74c3c", fg="white", font=("Arial", 12, "bold"),
                            width=18, height=3, relief=tk.RAISED, bd=5,
                            cursor="hand2")
     hard_button.pack(side=tk.LEFT, padx=10)
     
+    # Resume the shift that was left unfinished; shown only when there is one
+    resume_button = tk.Button(difficulty_frame, text="▶ RESUME SAVED SHIFT",
+                              command=resume_saved_shift,
+                              bg="#3498db", fg="white", font=("Arial", 11, "bold"),
+                              relief=tk.RAISED, bd=4, cursor="hand2")
+    
     # Credits
     credits = tk.Label(menu_frame, text="Good luck, Rookie Dispatcher! 🛫",
                       font=("Arial", 9, "italic"), bg="#87CEEB", fg="white")
@@ -753,7 +916,121 @@ def show_main_menu():
                        font=("Arial", 8), bg="#87CEEB", fg="white")
     designer.pack(side=tk.BOTTOM, pady=10)
 
-# Show main menu first (game elements not packed yet, so they're hidden)
-show_main_menu()
+def show_main_menu():
+    """Display the main menu with instructions, building it the first time"""
+    if menu_frame is None:
+        build_main_menu()
+    if save_path and os.path.exists(save_path):
+        resume_button.pack(pady=5)
+    else:
+        resume_button.pack_forget()
+    menu_frame.pack(fill=tk.BOTH, expand=True)
+    load_leaderboard()
+
+def load_leaderboard():
+    """Read the top scores on a worker thread; the menu stays responsive meanwhile"""
+    global leaderboard_read
+    if score_store is None:
+        return
+    leaderboard_label.config(text="Loading...")
+    read = leaderboard_read = {}
+    threading.Thread(target=lambda: read.update(text=read_leaderboard()), name="leaderboard",
+                     daemon=True).start()
+    poll_leaderboard(read)
+
+def read_leaderboard():
+    """Leaderboard text; runs on the worker thread, so it must not touch Tk"""
+    try:
+        score_store.flush()  # Include the shift that just ended
+        lines = []
+        for level in ("easy", "hard"):
+            lines.append(level.upper())
+            rows = score_store.top_scores(level, LEADERBOARD_SIZE)
+            lines.extend(f"{rank}. {row.player[:12]:<12} {row.score:>5}" for rank, row in enumerate(rows, 1))
+            if not rows:
+                lines.append("No shifts yet")
+            lines.append("")
+        summary = score_store.player_summary(player)
+        if summary is not None:
+            lines.append(f"{player[:12]}: best {summary.best}")
+            lines.append(f"{summary.wins}/{summary.shifts} shifts won")
+        if score_store.dropped:
+            lines.append(f"{score_store.dropped} shifts not saved")
+        return "\n".join(lines).rstrip()
+    except sqlite3.Error as error:
+        return f"Scores unavailable:\n{error}"
+
+def poll_leaderboard(read):
+    """Show the leaderboard once the worker has read it"""
+    if read is not leaderboard_read:
+        return  # Superseded by a newer read
+    if "text" not in read:
+        root.after(LEADERBOARD_POLL_MS, poll_leaderboard, read)
+        return
+    leaderboard_label.config(text=read["text"])
+
+def benchmark_startup():
+    """Build the window and draw the menu, then quit: timed from outside by benchmarks.py"""
+    build_window()
+    show_main_menu()
+    root.update()
+    root.destroy()
+
+def main():
+    global record_dir, save_path, instrumentation, renderer, score_store, player
+    parser = argparse.ArgumentParser(description="Airport Operations Simulator")
+    parser.add_argument("--record", metavar="DIR", help="save a log of every shift played to DIR")
+    parser.add_argument("--replay", metavar="LOG", help="watch a recorded shift log instead of playing")
+    parser.add_argument("--speed", type=float, default=1, help="replay speed multiplier")
+    parser.add_argument("--instrument", metavar="DUMP",
+                        help="time callbacks and clock drift (F12 shows them) and write them to DUMP on exit")
+    parser.add_argument("--save-file", default=os.path.join(os.path.expanduser("~"), ".airport_sim_save.json"),
+                        help="where to autosave an unfinished shift; empty to turn autosave off")
+    parser.add_argument("--scores", default=os.path.join(os.path.expanduser("~"), ".airport_sim_scores.db"),
+                        help="score history database for the leaderboard; empty to turn it off")
+    parser.add_argument("--player", default=default_player(), help="name finished shifts are recorded under")
+    parser.add_argument("--narrowbody-gates", type=int, default=len(narrowbody_gates), help="gates in terminal A")
+    parser.add_argument("--widebody-gates", type=int, default=len(widebody_gates), help="gates in terminal B")
+    parser.add_argument("--renderer", choices=["auto", "widgets", "canvas"], default="auto",
+                        help=f"draw the gate map with widgets or on one canvas (auto: canvas from "
+                             f"{CANVAS_MIN_GATES} gates)")
+    parser.add_argument("--bench-refresh", type=int, metavar="N", help=argparse.SUPPRESS)
+    parser.add_argument("--bench-startup", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    record_dir = args.record
+    save_path = args.save_file
+    renderer = args.renderer
+    set_gate_layout({NARROWBODY: gate_names("A", args.narrowbody_gates),
+                     WIDEBODY: gate_names("B", args.widebody_gates)})
+    if args.bench_startup:
+        benchmark_startup()
+        return
+    if args.scores:
+        score_store = ScoreStore(args.scores)
+        player = args.player
+    
+    build_window()
+    if args.instrument:
+        instrumentation = Instrumentation()
+        instrumentation.install(globals())
+        root.bind("<F12>", toggle_overlay)
+    
+    # Show main menu first (game elements not packed yet, so they're hidden)
+    show_main_menu()
+    if args.bench_refresh:
+        print(json.dumps(benchmark_refresh(args.bench_refresh)))
+        root.destroy()
+        return
+    if args.replay:
+        start_replay_from_menu(args.replay, args.speed)
+    
+    root.mainloop()
+    autosave()
+    close_recorder()
+    if score_store:
+        score_store.close()
+    if instrumentation:
+        instrumentation.dump(args.instrument)
 
-root.mainloop()
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,289 @@
+"""Arrival processes, holding-queue metrics and gate saturation runs
+
+An ArrivalProcess decides when flights arrive. Passed to ShiftEngine as
+arrivals=..., flights arrive on that schedule instead of each one coming a
+second after the last was handled. They wait in a FIFO queue until they
+are shown to the player (or policy). QueueStats listens to the engine and
+reports queue length and waiting time.
+
+Rates are flights per game hour: 12 clock ticks, or GAME_HOUR_MS of
+virtual time.
+
+    engine = ShiftEngine(arrivals=PoissonArrivals(30), handoff_ms=0)
+    python arrivals.py --model banked --rates 5:40:5 --shifts 20
+"""
+import argparse
+import heapq
+import math
+from collections import deque
+
+from policies import POLICIES, attach_policy, make_policy
+from sim_engine import CLOCK_STEP_MINUTES, CLOCK_TICK_MS, SHIFT_START_HOUR, ShiftEngine, shift_config
+
+GAME_MINUTE_MS = CLOCK_TICK_MS / CLOCK_STEP_MINUTES
+GAME_HOUR_MS = 60 * GAME_MINUTE_MS
+HUB_BANKS = ((9, 10), (12, 13), (15.5, 16.5))  # Clock hours of the arrival banks
+SERVED_THRESHOLD = 0.95  # Below this share of arrivals assigned, the layout is saturated
+
+
+class ArrivalProcess:
+    """Schedule of flight arrivals over a shift"""
+
+    name = "arrivals"
+
+    def times(self, rng):
+        """Non-decreasing arrival times in virtual ms from the start of the shift"""
+        raise NotImplementedError
+
+
+def _check_rate(rate_per_hour):
+    """rate_per_hour if it is a usable rate; 0 means no arrivals at all"""
+    if not rate_per_hour >= 0:
+        raise ValueError(f"arrival rate must be 0 or more flights per hour, got {rate_per_hour}")
+    return rate_per_hour
+
+
+class PoissonArrivals(ArrivalProcess):
+    """Arrivals at a constant average rate, independent of each other"""
+
+    name = "poisson"
+
+    def __init__(self, rate_per_hour):
+        self.rate_per_hour = _check_rate(rate_per_hour)
+
+    def times(self, rng):
+        if not self.rate_per_hour:
+            return
+        rate_per_ms = self.rate_per_hour / GAME_HOUR_MS
+        when = 0.0
+        while True:
+            when += rng.expovariate(rate_per_ms)
+            yield int(when)
+
+
+class BankedArrivals(ArrivalProcess):
+    """Poisson arrivals whose rate rises peak_factor times during hub banks
+
+    rate_per_hour is the average over the whole shift, so models can be
+    compared at the same total traffic.
+    """
+
+    name = "banked"
+
+    def __init__(self, rate_per_hour, banks=HUB_BANKS, peak_factor=3.0, shift_hours=8):
+        self.banks = [((start - SHIFT_START_HOUR) * GAME_HOUR_MS, (end - SHIFT_START_HOUR) * GAME_HOUR_MS)
+                      for start, end in banks]
+        bank_hours = sum(end - start for start, end in banks)
+        _check_rate(rate_per_hour)
+        # Off-peak rate such that the shift averages rate_per_hour
+        self.base_rate = rate_per_hour * shift_hours / (shift_hours + bank_hours * (peak_factor - 1))
+        self.peak_rate = self.base_rate * peak_factor
+
+    def rate_at(self, when):
+        """Arrivals per game hour at virtual time when"""
+        for start, end in self.banks:
+            if start <= when < end:
+                return self.peak_rate
+        return self.base_rate
+
+    def times(self, rng):
+        # Thinning: draw at the peak rate and keep each arrival with
+        # probability rate_at(t) / peak_rate
+        if not self.peak_rate:
+            return
+        peak_per_ms = self.peak_rate / GAME_HOUR_MS
+        when = 0.0
+        while True:
+            when += rng.expovariate(peak_per_ms)
+            if rng.random() * self.peak_rate < self.rate_at(when):
+                yield int(when)
+
+
+class BurstArrivals(ArrivalProcess):
+    """Flights arriving in bursts: bursts are Poisson, sizes are geometric
+
+    Each burst's flights land spread uniformly over spread_minutes.
+    """
+
+    name = "bursts"
+
+    def __init__(self, rate_per_hour, mean_burst=6, spread_minutes=10):
+        self.rate_per_hour = _check_rate(rate_per_hour)
+        self.mean_burst = max(1.0, mean_burst)
+        self.spread_ms = spread_minutes * GAME_MINUTE_MS
+
+    def burst_size(self, rng):
+        if self.mean_burst <= 1:
+            return 1
+        return 1 + int(math.log(1.0 - rng.random()) / math.log(1 - 1 / self.mean_burst))
+
+    def times(self, rng):
+        if not self.rate_per_hour:
+            return
+        burst_rate_per_ms = self.rate_per_hour / self.mean_burst / GAME_HOUR_MS
+        landing = []  # Heap of arrival times from bursts already drawn
+        burst_start = 0.0
+        while True:
+            burst_start += rng.expovariate(burst_rate_per_ms)
+            # Every later burst starts after this one, so earlier landings are final
+            while landing and landing[0] <= burst_start:
+                yield int(heapq.heappop(landing))
+            for _ in range(self.burst_size(rng)):
+                heapq.heappush(landing, burst_start + rng.random() * self.spread_ms)
+
+
+ARRIVAL_MODELS = {model.name: model for model in (PoissonArrivals, BankedArrivals, BurstArrivals)}
+
+
+def make_arrivals(name, rate_per_hour):
+    return ARRIVAL_MODELS[name](rate_per_hour)
+
+
+class QueueStats:
+    """Engine listener measuring the arrivals queue"""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.arrivals = 0
+        self.assigned = 0
+        self.timeouts = 0
+        self.wrong_gates = 0
+        self.max_queue = 0
+        self.waits = []  # Virtual ms each shown flight spent in the queue
+        self._arrived_at = deque()  # Arrival time of each flight still queued
+        self._area = 0.0  # Integral of queue length over time
+        self._changed_at = 0
+        engine.subscribe(self.on_event)
+
+    def _mark(self):
+        now = self.engine.now
+        self._area += len(self._arrived_at) * (now - self._changed_at)
+        self._changed_at = now
+
+    def on_event(self, kind, fields):
+        if kind == "arrival":
+            self._mark()
+            self._arrived_at.append(self.engine.now)
+            self.arrivals += 1
+            self.max_queue = max(self.max_queue, len(self._arrived_at))
+        elif kind == "flight":
+            self._mark()
+            self.waits.append(self.engine.now - self._arrived_at.popleft())
+        elif kind == "assigned":
+            self.assigned += 1
+        elif kind == "timeout":
+            self.timeouts += 1
+        elif kind == "wrong_gate":
+            self.wrong_gates += 1
+
+    def summary(self):
+        """Counts, queue length and waits (in game minutes) so far"""
+        self._mark()
+        now = self.engine.now
+        waits = sorted(self.waits)
+        return {
+            "arrivals": self.arrivals,
+            "assigned": self.assigned,
+            "timeouts": self.timeouts,
+            "wrong_gates": self.wrong_gates,
+            "unserved": len(self._arrived_at),
+            "mean_queue": self._area / now if now else 0.0,
+            "max_queue": self.max_queue,
+            "mean_wait_min": sum(waits) / len(waits) / GAME_MINUTE_MS if waits else 0.0,
+            "p95_wait_min": waits[int(0.95 * (len(waits) - 1))] / GAME_MINUTE_MS if waits else 0.0,
+            "throughput_per_hour": self.assigned / (now / GAME_HOUR_MS) if now else 0.0,
+        }
+
+
+def run_load(model, rate_per_hour, shifts=10, config=None, seed=0, policy="first-fit",
+             reaction_ms=0, handoff_ms=0, layout=None):
+    """Average QueueStats summary over seeded shifts at one arrival rate
+
+    Lives are made unlimited so every shift runs to 5 PM whatever happens.
+    A gate_compat layout, if given, replaces the config's gates.
+    """
+    config = (config if config is not None else shift_config())._replace(lives=10 ** 9)
+    totals = {}
+    for shift in range(shifts):
+        shift_seed = seed * 1000003 + shift
+        engine = ShiftEngine(config=config, seed=shift_seed, arrivals=make_arrivals(model, rate_per_hour),
+                             handoff_ms=handoff_ms, layout=layout)
+        attach_policy(engine, make_policy(policy, shift_seed), reaction_ms)
+        stats = QueueStats(engine)
+        engine.run()
+        for key, value in stats.summary().items():
+            if key == "max_queue":
+                totals[key] = max(totals.get(key, 0), value)
+            else:
+                totals[key] = totals.get(key, 0) + value / shifts
+    return totals
+
+
+def find_saturation(model, rates, **options):
+    """run_load() for each rate; returns the rows and the first saturated rate or None"""
+    rows = []
+    saturated = None
+    for rate in rates:
+        row = run_load(model, rate, **options)
+        row["rate"] = rate
+        rows.append(row)
+        if saturated is None and row["arrivals"] and row["assigned"] / row["arrivals"] < SERVED_THRESHOLD:
+            saturated = rate
+    return rows, saturated
+
+
+def main():
+    from sweep import parse_values  # Pulls in numpy, which the engine itself never needs
+
+    parser = argparse.ArgumentParser(description="Find the arrival rate a gate layout saturates at")
+    parser.add_argument("--model", choices=sorted(ARRIVAL_MODELS), default="poisson")
+    parser.add_argument("--rates", default="5:40:5",
+                        help="flights per game hour: comma list and/or start:stop[:step] range")
+    parser.add_argument("--shifts", type=int, default=10, help="shifts per rate")
+    parser.add_argument("--difficulty", choices=["easy", "hard"], default="easy")
+    parser.add_argument("--narrowbody-gates", type=int, default=None)
+    parser.add_argument("--widebody-gates", type=int, default=None)
+    parser.add_argument("--hub-gates", type=int, default=None, metavar="N",
+                        help="use a generated N-gate hub with size codes, swing gates and adjacency rules")
+    parser.add_argument("--policy", choices=list(POLICIES), default="first-fit")
+    parser.add_argument("--reaction-ms", type=int, default=0)
+    parser.add_argument("--handoff-ms", type=int, default=0,
+                        help="delay between handling one flight and showing the next")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    layout = None
+    if args.hub_gates is not None:
+        from gate_compat import hub_layout
+
+        layout = hub_layout(args.hub_gates, args.seed)
+
+    config = shift_config(args.difficulty)
+    if args.narrowbody_gates is not None:
+        config = config._replace(n_narrowbody=args.narrowbody_gates)
+    if args.widebody_gates is not None:
+        config = config._replace(n_widebody=args.widebody_gates)
+
+    rates = parse_values(args.rates, float)
+    if any(not rate >= 0 for rate in rates):
+        parser.error("--rates must all be 0 or more")
+    rows, saturated = find_saturation(args.model, rates, shifts=args.shifts,
+                                      config=config, seed=args.seed, policy=args.policy,
+                                      reaction_ms=args.reaction_ms, handoff_ms=args.handoff_ms,
+                                      layout=layout)
+    print(f"{'rate/h':>8}{'arrivals':>10}{'served':>8}{'thru/h':>8}{'timeouts':>10}"
+          f"{'mean q':>8}{'max q':>7}{'wait min':>10}{'p95 wait':>10}")
+    for row in rows:
+        served = row["assigned"] / row["arrivals"] if row["arrivals"] else 0.0
+        print(f"{row['rate']:>8g}{row['arrivals']:>10.1f}{served:>8.1%}{row['throughput_per_hour']:>8.1f}"
+              f"{row['timeouts']:>10.1f}{row['mean_queue']:>8.1f}{row['max_queue']:>7}"
+              f"{row['mean_wait_min']:>10.1f}{row['p95_wait_min']:>10.1f}")
+    if saturated is None:
+        print(f"not saturated up to {rows[-1]['rate']:g} flights/hour" if rows else "no rates given")
+    else:
+        print(f"saturates at about {saturated:g} flights/hour "
+              f"(under {SERVED_THRESHOLD:.0%} of arrivals assigned)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+"""Memory cost per flight: the original dict records versus Flight
+
+    python bench_memory.py --flights 1000000
+"""
+import argparse
+import gc
+import tracemalloc
+
+from flight_stream import FlightGenerator
+
+
+def bytes_per_flight(build, n):
+    """Average bytes allocated per record by build(n), measured with tracemalloc"""
+    gc.collect()
+    tracemalloc.start()
+    records = build(n)
+    allocated = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del records
+    return allocated / n
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-flight memory of flight records")
+    parser.add_argument("--flights", type=int, default=200000)
+    args = parser.parse_args()
+
+    # The same flights as both representations; the ids/strings they point at
+    # are shared tables and are not counted against either
+    flights = FlightGenerator(seed=1).batch(args.flights)
+    as_dicts = bytes_per_flight(lambda n: [flight.as_dict() for flight in flights[:n]], args.flights)
+    as_records = bytes_per_flight(lambda n: FlightGenerator(seed=1).batch(n), args.flights)
+    print(f"dict records:   {as_dicts:6.1f} bytes/flight")
+    print(f"Flight records: {as_records:6.1f} bytes/flight")
+    print(f"saving:         {1 - as_records / as_dicts:6.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,355 @@
+"""Performance benchmarks with stored baselines
+
+Each benchmark times one hot path in calibrated rounds and reports the
+median and best time per operation. Every round is paired with a fixed
+reference loop timed just before it, and the round's time is also taken
+relative to that loop. CPU frequency and neighbouring load can slow the
+whole machine by 1.5x or more for seconds at a time, but they slow the
+reference loop just as much, so the relative time stays put. Results can be
+saved as a baseline, and later runs are compared against it: any benchmark
+whose median relative time is more than the threshold above the baseline's
+fails the run. Operations that take about a microsecond run more, shorter
+rounds, so the median has enough samples to be steady.
+
+    python benchmarks.py --save benchmark_baseline.json --repeat 3   # record a baseline
+    python benchmarks.py                                  # compare against it
+    python benchmarks.py --filter gate_pool --threshold 0.5
+
+The UI benchmarks run the game in a subprocess: ui_import times a cold
+interpreter importing it (which needs no display), ui_startup a cold start up
+to the main menu, and ui_gate_refresh redraws of the gate map (also drawn on
+one canvas with 500 gates). All but the first run under xvfb-run when there is
+no display, and are skipped if neither exists.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import time
+
+from flight_stream import FlightGenerator
+from gate_pool import GatePool
+from policies import FirstFitPolicy, attach_policy
+from sim_data import NARROWBODY, WIDEBODY, Flight, aircraft_types, gate_names, generate_flight
+from sim_engine import ShiftEngine
+
+DEFAULT_BASELINE = "benchmark_baseline.json"
+DEFAULT_THRESHOLD = 0.25  # Allowed slowdown of the median relative time before a benchmark fails
+MIN_ROUND_SECONDS = 0.05  # Each round repeats the operation at least this long
+ROUNDS = 7
+MICRO_ROUNDS = 41  # Many short rounds, so the median is steady
+MICRO_ROUND_SECONDS = 0.01
+REFERENCE_LOOPS = 20_000  # Size of the reference loop timed before every round
+RETRIES = 2  # Reruns of a benchmark that looks slower, keeping its fastest result
+UI_REFRESHES = 300
+STARTUP_ROUNDS = 5  # Cold starts timed per startup benchmark
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+GAME_SCRIPT = os.path.join(REPO_DIR, "AirlineSimMatch.py")
+
+BENCHMARKS = {}  # Name -> function returning a result dict, or None to skip
+
+
+def benchmark(name):
+    """Register a benchmark function under name"""
+    def register(func):
+        BENCHMARKS[name] = func
+        return func
+    return register
+
+
+def reference_seconds():
+    """Time of a fixed pure-Python loop: how fast the machine is right now"""
+    start = time.perf_counter()
+    counts = {}
+    for i in range(REFERENCE_LOOPS):
+        counts[i & 31] = counts.get(i & 31, 0) + i
+    return time.perf_counter() - start
+
+
+def measure(func, ops=1, rounds=ROUNDS, min_time=MIN_ROUND_SECONDS):
+    """Time func() over calibrated rounds; ops is how many operations one call does"""
+    iterations = 1
+    while True:
+        reference = reference_seconds()
+        start = time.perf_counter()
+        for _ in range(iterations):
+            func()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            break
+        iterations *= 2 if elapsed <= 0 else max(2, min(10, int(min_time / elapsed) + 1))
+    samples = [elapsed]
+    references = [reference]
+    for _ in range(rounds - 1):
+        references.append(reference_seconds())
+        start = time.perf_counter()
+        for _ in range(iterations):
+            func()
+        samples.append(time.perf_counter() - start)
+    return summarize_samples([sample / (iterations * ops) for sample in samples], references)
+
+
+def measure_micro(func, ops=1):
+    """measure() for operations of about a microsecond"""
+    return measure(func, ops, rounds=MICRO_ROUNDS, min_time=MICRO_ROUND_SECONDS)
+
+
+def summarize_samples(per_op, references):
+    """Result dict from seconds-per-operation samples and each one's reference time"""
+    relative = [sample / reference for sample, reference in zip(per_op, references)]
+    return {"median_us": statistics.median(per_op) * 1e6, "min_us": min(per_op) * 1e6,
+            "relative": statistics.median(relative), "rounds": len(per_op)}
+
+
+@benchmark("generate_flight")
+def bench_generate_flight():
+    rng = random.Random(0)
+    return measure_micro(lambda: generate_flight(rng))
+
+
+@benchmark("flight_generator_batch")
+def bench_flight_generator():
+    generator = FlightGenerator(seed=0)
+    return measure_micro(lambda: generator.batch(1000), ops=1000)
+
+
+def _gate_pool_benchmark(n_gates):
+    n_widebody = max(1, n_gates * 5 // 13)
+    pool = GatePool({NARROWBODY: gate_names("A", n_gates - n_widebody),
+                     WIDEBODY: gate_names("B", n_widebody)})
+    flight = Flight("DL100", "B737", "ATL")
+    first_free, acquire, release = pool.first_free, pool.acquire, pool.release
+    classes = pool.classes
+
+    def fill_and_empty():
+        # Every gate acquired first-fit, then released: 2 operations per gate
+        for gate_class in classes:
+            gate = first_free(gate_class)
+            while gate is not None:
+                acquire(gate, flight)
+                gate = first_free(gate_class)
+        for gate in pool.all_gates():
+            release(gate)
+
+    return measure_micro(fill_and_empty, ops=2 * n_gates)
+
+
+@benchmark("gate_pool_13")
+def bench_gate_pool_13():
+    return _gate_pool_benchmark(13)
+
+
+@benchmark("gate_pool_100")
+def bench_gate_pool_100():
+    return _gate_pool_benchmark(100)
+
+
+@benchmark("gate_pool_1000")
+def bench_gate_pool_1000():
+    return _gate_pool_benchmark(1000)
+
+
+@benchmark("gate_compat_500")
+def bench_gate_compat():
+    from gate_compat import CompatibilityIndex, hub_layout
+
+    index = CompatibilityIndex(*hub_layout(500))
+    aircraft_ids = [aircraft_types.ids[code] for code in ("B737", "B757", "B787", "A380")]
+    first_available, park, leave = index.first_available, index.park, index.leave
+
+    def fill_and_empty():
+        # Each aircraft type parked first-fit until none fits, then all leave
+        parked = []
+        for aircraft_id in aircraft_ids:
+            gate = first_available(aircraft_id)
+            while gate is not None:
+                park(gate, aircraft_id)
+                parked.append(gate)
+                gate = first_available(aircraft_id)
+        for gate in parked:
+            leave(gate)
+        return len(parked)
+
+    return measure_micro(fill_and_empty, ops=2 * fill_and_empty())
+
+
+@benchmark("headless_shift")
+def bench_headless_shift():
+    def play():
+        engine = ShiftEngine("hard", seed=0)
+        attach_policy(engine, FirstFitPolicy(), reaction_ms=700)
+        engine.run()
+    return measure(play, rounds=5)
+
+
+@benchmark("monte_carlo_10k")
+def bench_monte_carlo():
+    from monte_carlo import simulate_shifts
+
+    return measure(lambda: simulate_shifts(10000, seed=0), rounds=5, min_time=0)
+
+
+@benchmark("turnaround_day_1000")
+def bench_turnaround_day():
+    from turnaround import simulate_day
+
+    return measure(lambda: simulate_day(1000, seed=0), rounds=5)
+
+
+def gui_command(command):
+    """command prefixed to run on a display, or None if there is none to use"""
+    if os.environ.get("DISPLAY"):
+        return command
+    xvfb = shutil.which("xvfb-run")
+    return [xvfb, "-a"] + command if xvfb else None
+
+
+def time_command(command, rounds=STARTUP_ROUNDS):
+    """Wall time of running command to completion, rounds times"""
+    samples = []
+    references = []
+    for _ in range(rounds):
+        references.append(reference_seconds())
+        start = time.perf_counter()
+        subprocess.run(command, capture_output=True, check=True, cwd=REPO_DIR)
+        samples.append(time.perf_counter() - start)
+    return summarize_samples(samples, references)
+
+
+@benchmark("ui_import")
+def bench_ui_import():
+    return time_command([sys.executable, "-c", "import AirlineSimMatch"])
+
+
+@benchmark("ui_startup")
+def bench_ui_startup():
+    command = gui_command([sys.executable, GAME_SCRIPT, "--bench-startup"])
+    return time_command(command) if command else None
+
+
+def _ui_refresh_benchmark(*options):
+    command = gui_command([sys.executable, GAME_SCRIPT, "--bench-refresh", str(UI_REFRESHES), *options])
+    if command is None:
+        return None
+    # The redraws are timed in the game's process: compare them with the
+    # machine's speed just before and after it runs
+    before = reference_seconds()
+    output = subprocess.run(command, capture_output=True, text=True, check=True).stdout
+    reference = (before + reference_seconds()) / 2
+    samples = json.loads(output.strip().splitlines()[-1])
+    return summarize_samples(samples, [reference] * len(samples))
+
+
+@benchmark("ui_gate_refresh")
+def bench_ui_refresh():
+    return _ui_refresh_benchmark()
+
+
+@benchmark("ui_canvas_refresh_500")
+def bench_ui_refresh_canvas():
+    return _ui_refresh_benchmark("--renderer", "canvas", "--narrowbody-gates", "300", "--widebody-gates", "200")
+
+
+def run_benchmarks(names=None, progress=None, repeat=1):
+    """Run the named benchmarks (all by default); skipped ones are left out
+
+    With repeat > 1 each benchmark runs that many times and the attempt with
+    the median relative time is kept, so a baseline is a typical run rather
+    than the luckiest one.
+    """
+    results = {}
+    for name in names or BENCHMARKS:
+        attempts = []
+        for _ in range(repeat):
+            attempt = BENCHMARKS[name]()
+            if attempt is None:
+                break
+            attempts.append(attempt)
+        attempts.sort(key=lambda attempt: attempt["relative"])
+        result = attempts[len(attempts) // 2] if attempts else None
+        if result is not None:
+            results[name] = result
+        if progress:
+            progress(name, result)
+    return results
+
+
+def compare(results, baseline, threshold=DEFAULT_THRESHOLD):
+    """(name, baseline median, median, ratio) for benchmarks slower than allowed
+
+    The ratio is of the relative times, so it does not move with the
+    machine's speed; the medians are in microseconds, for the report.
+    """
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get("results", {}).get(name)
+        if base is None or "relative" not in base:
+            continue
+        ratio = result["relative"] / base["relative"]
+        if ratio > 1 + threshold:
+            regressions.append((name, base["median_us"], result["median_us"], ratio))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run performance benchmarks against a baseline")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="baseline file to compare with")
+    parser.add_argument("--save", metavar="PATH", help="write the results as a new baseline")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="allowed fractional slowdown of the median relative time (default 0.25)")
+    parser.add_argument("--filter", default="", help="only run benchmarks whose name contains this")
+    parser.add_argument("--repeat", type=int, default=1, help="run each benchmark N times, keep the median")
+    args = parser.parse_args()
+
+    baseline = {}
+    if not args.save and os.path.exists(args.baseline):
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+    base_results = baseline.get("results", {})
+
+    def progress(name, result):
+        if result is None:
+            print(f"{name:<24}{'skipped':>12}")
+            return
+        line = f"{name:<24}{result['median_us']:>12.3f}{result['min_us']:>12.3f}"
+        if "relative" in base_results.get(name, {}):
+            line += f"{result['relative'] / base_results[name]['relative']:>10.2f}x"
+        print(line, flush=True)
+
+    print(f"{'benchmark':<24}{'median us':>12}{'best us':>12}{'vs base':>11}")
+    names = [name for name in BENCHMARKS if args.filter in name]
+    results = run_benchmarks(names, progress, args.repeat)
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump({"python": platform.python_version(), "machine": platform.machine(),
+                       "results": results}, f, indent=2)
+            f.write("\n")
+        print(f"baseline saved to {args.save}")
+        return
+
+    regressions = compare(results, baseline, args.threshold)
+    for _ in range(RETRIES):
+        if not regressions:
+            break
+        # Rerun only what failed, keeping whichever attempt was fastest: a
+        # real slowdown fails every attempt, a disturbed run seldom does
+        names = [name for name, _, _, _ in regressions]
+        print(f"rerunning {', '.join(names)}", flush=True)
+        for name, result in run_benchmarks(names, progress).items():
+            if result["relative"] < results[name]["relative"]:
+                results[name] = result
+        regressions = compare(results, baseline, args.threshold)
+    for name, base, now, ratio in regressions:
+        print(f"REGRESSION {name}: {base:.3f} us -> {now:.3f} us ({ratio:.2f}x)")
+    if regressions:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,404 @@
+"""Asyncio dispatch server: many trainees' shifts in one process
+
+Each connection is one session with its own ShiftEngine, paced in real time
+by its own GameClock. Sessions run no threads and no tasks of their own: an
+engine is advanced when a command comes in and by a single loop timer set
+for its next due event, so an idle session costs nothing but its engine.
+Each session's unsent output is capped, and a client that falls that far
+behind is disconnected, so a slow reader cannot grow the server's memory.
+
+The protocol is JSON lines over TCP. A client sends commands such as
+{"op": "start", "difficulty": "hard"} or {"op": "assign", "gate": "B2"} and
+gets exactly one {"reply": op, ...} line per command, in order, with an
+"error" field if it failed. Engine events are pushed as they happen, as
+{"event": kind, "time": ms, ...} lines, after the reply of the command that
+caused them. Commands: start, next_flight, assign, hint, pause, resume,
+speed, state and quit. Flights are sent as number, aircraft type and
+destination only; telling the size class from them is the trainee's job,
+and a hint gives the destination city, as in the game.
+
+    python dispatch_server.py --port 8765
+    python dispatch_server.py --demo 300 --speed 4  # loopback load test
+"""
+import argparse
+import asyncio
+import json
+import time
+from collections import deque
+
+from game_clock import GameClock
+from sim_data import Flight, aircraft_class, airport_cities
+from sim_engine import COUNTDOWN_SECONDS, ShiftEngine
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+MAX_SESSIONS = 1000
+MAX_LINE_BYTES = 4096  # Longest command accepted
+OUTBOX_LIMIT = 256 * 1024  # Unsent bytes per session before its client is dropped
+MAX_SPEED = 600
+WAKE_SLACK_S = 0.001  # Wake just after an event is due, not just before
+
+
+def _encode(value):
+    if isinstance(value, Flight):
+        return {"flight": value.flight, "aircraft": value.aircraft, "destination": value.destination}
+    return value
+
+
+def _speed(value):
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or not 0 < value <= MAX_SPEED:
+        raise ValueError(f"speed must be a number in (0, {MAX_SPEED}]")
+    return value
+
+
+class Session:
+    """One client's shift, advanced from the event loop"""
+
+    def __init__(self, server, writer):
+        self.server = server
+        self.writer = writer
+        self.engine = None
+        self.clock = None
+        self.timer = None  # Loop timer for the engine's next due event
+        self.held = None  # Events raised while a command runs, sent after its reply
+        self.outbox = []  # Encoded lines not yet handed to the transport
+        self.closed = False
+
+    def send(self, message):
+        """Queue message; everything queued in one loop pass goes out in one write"""
+        if self.closed:
+            return
+        if not self.outbox:
+            self.server.loop.call_soon(self.flush)
+        self.outbox.append(json.dumps(message, separators=(",", ":")))
+
+    def flush(self):
+        if self.closed or not self.outbox:
+            return
+        if self.writer.transport.get_write_buffer_size() > OUTBOX_LIMIT:
+            self.outbox.clear()
+            self.close()  # The client stopped reading
+            return
+        self.outbox.append("")
+        self.writer.write("\n".join(self.outbox).encode())
+        self.outbox.clear()
+
+    def on_event(self, kind, fields):
+        message = {"event": kind, "time": self.engine.now}
+        for name, value in fields.items():
+            message[name] = _encode(value)
+        if self.held is not None:
+            self.held.append(message)
+        else:
+            self.send(message)
+
+    def catch_up(self):
+        """Advance the engine to the present"""
+        engine = self.engine
+        if engine is not None and not engine.game_over:
+            engine.advance(self.clock.due(engine.now))
+
+    def wake(self):
+        self.timer = None
+        self.catch_up()
+        self.schedule_wake()
+
+    def schedule_wake(self):
+        """Set the loop timer for the engine's next event, if it has one"""
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+        engine = self.engine
+        if self.closed or engine is None or engine.game_over or engine.paused:
+            return
+        next_time = engine.queue.next_time()
+        if next_time is None:
+            return
+        delay = (next_time - engine.now) / self.clock.speed / 1000
+        self.timer = self.server.loop.call_later(max(0.0, delay) + WAKE_SLACK_S, self.wake)
+
+    def command(self, message):
+        """Run one command, then send its reply and the events it caused"""
+        op = message.get("op") if isinstance(message, dict) else None
+        handler = getattr(self, f"op_{op}", None) if isinstance(op, str) else None
+        self.catch_up()
+        self.held = []
+        try:
+            if handler is None:
+                raise ValueError(f"unknown op {op!r}")
+            reply = handler(message)
+        except ValueError as error:
+            reply = {"error": str(error)}
+        finally:
+            held, self.held = self.held, None
+        self.send({"reply": op, **reply})
+        for event in held:
+            self.send(event)
+        self.schedule_wake()
+
+    def _engine(self):
+        if self.engine is None:
+            raise ValueError("no shift started")
+        return self.engine
+
+    # --- Commands ---
+
+    def op_start(self, message):
+        difficulty = message.get("difficulty", "easy")
+        if not isinstance(difficulty, str) or difficulty not in COUNTDOWN_SECONDS:
+            raise ValueError(f"difficulty must be one of {sorted(COUNTDOWN_SECONDS)}")
+        seed = message.get("seed")
+        if seed is not None and (isinstance(seed, bool) or not isinstance(seed, int)):
+            raise ValueError("seed must be an integer")
+        speed = _speed(message.get("speed", 1))
+        if self.engine is not None:
+            self.engine.unsubscribe(self.on_event)
+        self.engine = ShiftEngine(difficulty, seed=seed)
+        self.engine.subscribe(self.on_event)
+        self.clock = GameClock(speed)
+        self.clock.reset(self.engine.now)
+        self.engine.start()
+        gates = self.engine.gates
+        return {"seed": self.engine.seed, "lives": self.engine.lives,
+                "gates": {gate_class: gates.gates[gate_class] for gate_class in gates.classes}}
+
+    def op_next_flight(self, message):
+        engine = self._engine()
+        return {"flight": _encode(engine.current_flight), "countdown": engine.countdown_remaining}
+
+    def op_assign(self, message):
+        gate = message.get("gate")
+        if not isinstance(gate, str) or gate not in self._engine().gates:
+            raise ValueError(f"unknown gate {gate!r}")
+        return {"assigned": self.engine.assign_gate(gate)}
+
+    def op_hint(self, message):
+        flight = self._engine().use_hint()
+        if flight is None:
+            return {"destination": None, "city": None}
+        return {"destination": flight.destination, "city": airport_cities.get(flight.destination, "Unknown City")}
+
+    def op_pause(self, message):
+        self._engine().set_paused(True)
+        return {"paused": self.engine.paused}
+
+    def op_resume(self, message):
+        engine = self._engine()
+        engine.set_paused(False)
+        self.clock.reset(engine.now)
+        return {"paused": engine.paused}
+
+    def op_speed(self, message):
+        engine = self._engine()
+        self.clock.set_speed(_speed(message.get("speed")), engine.now)
+        return {"speed": self.clock.speed}
+
+    def op_state(self, message):
+        engine = self._engine()
+        gates = engine.gates
+        return {"time": engine.now, "minutes": engine.game_minutes, "score": engine.score,
+                "lives": engine.lives, "flight": _encode(engine.current_flight),
+                "countdown": engine.countdown_remaining, "paused": engine.paused,
+                "game_over": engine.game_over, "won": engine.won,
+                "free": {gate_class: list(gates.free_gates(gate_class)) for gate_class in gates.classes}}
+
+    def op_quit(self, message):
+        self.server.loop.call_soon(self.close)
+        return {}
+
+    def close(self):
+        if self.closed:
+            return
+        self.flush()
+        if self.closed:
+            return  # Dropped while flushing
+        self.closed = True
+        if self.timer is not None:
+            self.timer.cancel()
+        if self.engine is not None:
+            self.engine.unsubscribe(self.on_event)
+        self.server.sessions.discard(self)
+        self.writer.close()
+
+
+class DispatchServer:
+    """Accepts connections and gives each its own Session"""
+
+    def __init__(self, max_sessions=MAX_SESSIONS):
+        self.max_sessions = max_sessions
+        self.sessions = set()
+        self.loop = None
+
+    async def start(self, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        """Start listening; returns the asyncio server (port 0 picks a free one)"""
+        self.loop = asyncio.get_running_loop()
+        return await asyncio.start_server(self.serve, host, port, limit=MAX_LINE_BYTES)
+
+    async def serve(self, reader, writer):
+        if len(self.sessions) >= self.max_sessions:
+            writer.write(b'{"reply":null,"error":"server full"}\n')
+            writer.close()
+            return
+        session = Session(self, writer)
+        self.sessions.add(session)
+        try:
+            while not session.closed:
+                try:
+                    line = await reader.readline()
+                except ValueError:
+                    session.send({"reply": None, "error": f"command longer than {MAX_LINE_BYTES} bytes"})
+                    break
+                if not line:
+                    break
+                try:
+                    message = json.loads(line)
+                except ValueError:
+                    session.send({"reply": None, "error": "not a JSON line"})
+                    continue
+                session.command(message)
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            session.close()
+
+
+class DispatchClient:
+    """Thin asyncio client: commands are awaited, events arrive on a queue"""
+
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self.waiting = deque()  # Futures for replies, in command order
+        self.events = asyncio.Queue()
+        self.listener = asyncio.ensure_future(self._listen())
+
+    @classmethod
+    async def connect(cls, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        reader, writer = await asyncio.open_connection(host, port)
+        return cls(reader, writer)
+
+    async def _listen(self):
+        async for line in self.reader:
+            message = json.loads(line)
+            if "reply" in message and self.waiting:
+                self.waiting.popleft().set_result(message)
+            else:
+                self.events.put_nowait(message)
+        for future in self.waiting:
+            future.set_exception(ConnectionError("server closed the connection"))
+        self.events.put_nowait(None)
+
+    async def request(self, op, **fields):
+        """Send a command and wait for its reply; raises ValueError if it failed"""
+        future = asyncio.get_running_loop().create_future()
+        self.waiting.append(future)
+        self.writer.write(json.dumps({"op": op, **fields}).encode() + b"\n")
+        reply = await future
+        if "error" in reply:
+            raise ValueError(reply["error"])
+        return reply
+
+    async def next_event(self):
+        """The next pushed event, or None once the connection is closed"""
+        return await self.events.get()
+
+    async def start(self, difficulty="easy", seed=None, speed=1):
+        return await self.request("start", difficulty=difficulty, seed=seed, speed=speed)
+
+    async def assign_gate(self, gate):
+        return (await self.request("assign", gate=gate))["assigned"]
+
+    async def next_flight(self):
+        return (await self.request("next_flight"))["flight"]
+
+    async def close(self):
+        self.writer.close()
+        await self.listener
+
+
+async def play_first_fit(client, difficulty="easy", seed=None, speed=1):
+    """Play one shift over client, parking each flight at its first free gate
+
+    A flight that finds its gates full waits for the next one of its class to
+    free up. Returns the game_over event and how many events were pushed.
+    """
+    reply = await client.start(difficulty, seed=seed, speed=speed)
+    gates = reply["gates"]
+    occupied = set()
+    waiting = None  # Size class of a flight waiting for a gate
+    events = 0
+    while True:
+        event = await client.next_event()
+        if event is None:
+            raise ConnectionError("server closed the connection")
+        events += 1
+        kind = event["event"]
+        if kind == "flight":
+            waiting = aircraft_class(event["flight"]["aircraft"])
+            gate = next((gate for gate in gates[waiting] if gate not in occupied), None)
+            if gate is not None:
+                await client.assign_gate(gate)
+        elif kind == "departed":
+            occupied.discard(event["gate"])
+            if waiting == aircraft_class(event["flight"]["aircraft"]):
+                await client.assign_gate(event["gate"])
+        elif kind in ("assigned", "wrong_gate", "timeout"):
+            waiting = None
+            if kind == "assigned":
+                occupied.add(event["gate"])
+        elif kind == "game_over":
+            return event, events
+
+
+async def run_demo(sessions, difficulty, speed, seed):
+    server = DispatchServer(max_sessions=sessions)
+    listener = await server.start(port=0)
+    port = listener.sockets[0].getsockname()[1]
+    clients = [await DispatchClient.connect(port=port) for _ in range(sessions)]
+    start = time.perf_counter()
+    results = await asyncio.gather(*(play_first_fit(client, difficulty, seed=seed + number, speed=speed)
+                                     for number, client in enumerate(clients)))
+    elapsed = time.perf_counter() - start
+    for client in clients:
+        await client.close()
+    listener.close()
+    await listener.wait_closed()
+    return results, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve shifts to many clients over JSON lines")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--max-sessions", type=int, default=MAX_SESSIONS)
+    parser.add_argument("--demo", type=int, default=0, metavar="N",
+                        help="instead of serving, play N first-fit sessions over loopback and report")
+    parser.add_argument("--difficulty", choices=sorted(COUNTDOWN_SECONDS), default="hard")
+    parser.add_argument("--speed", type=float, default=4)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    if args.demo:
+        results, elapsed = asyncio.run(run_demo(args.demo, args.difficulty, args.speed, args.seed))
+        wins = sum(event["won"] for event, _ in results)
+        events = sum(count for _, count in results)
+        mean_score = sum(event["score"] for event, _ in results) / len(results)
+        print(f"{args.demo} sessions at {args.speed:g}x: {wins} won, mean score {mean_score:.0f}")
+        print(f"  {elapsed:.1f} s wall, {events:,} events pushed ({events / elapsed:,.0f}/s)")
+        return
+
+    async def serve():
+        server = await DispatchServer(args.max_sessions).start(args.host, args.port)
+        print(f"serving on {args.host}:{args.port}")
+        async with server:
+            await server.serve_forever()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
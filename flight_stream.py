@@ -0,0 +1,188 @@
+"""Deterministic, seeded flight streams
+
+FlightGenerator builds its aircraft, destination and flight-number tables
+once and draws flights in blocks with bulk random.choices() calls. The same
+seed always gives the same flights whether they are taken one at a time by
+iterating or in precomputed batches, and substream(i) gives independent,
+equally reproducible streams for parallel workers.
+
+read_timetable() streams real timetables from CSV or JSON-lines files (plain
+or gzipped) one row at a time, validating each row, so files of any size
+feed the engine in constant memory.
+
+    engine = ShiftEngine(flights=FlightGenerator(seed=42))
+    engine = ShiftEngine(flights=read_timetable("atl_summer.csv.gz"))
+"""
+import argparse
+import csv
+import gzip
+import json
+import os
+import random
+from collections import deque
+
+from sim_data import (WIDEBODY_RATIO, Flight, aircraft_types, airport_cities, destination_codes,
+                      domestic_destinations, flight_numbers, international_destinations,
+                      narrowbody_aircraft, widebody_aircraft)
+
+BLOCK_SIZE = 256  # Flights drawn per refill of the buffer
+
+
+class FlightGenerator:
+    """Reproducible iterator of Flight records"""
+
+    # Interned ids, built once for every generator
+    number_ids = tuple(range(len(flight_numbers)))
+    narrowbody_ids = tuple(aircraft_types.ids[code] for code in narrowbody_aircraft)
+    widebody_ids = tuple(aircraft_types.ids[code] for code in widebody_aircraft)
+    domestic_ids = tuple(destination_codes.ids[code] for code in domestic_destinations)
+    international_ids = tuple(destination_codes.ids[code] for code in international_destinations)
+
+    def __init__(self, seed=None, widebody_ratio=WIDEBODY_RATIO):
+        # An unseeded stream still records its seed so it can be replayed
+        self.seed = seed if seed is not None else random.randrange(2 ** 63)
+        self.widebody_ratio = widebody_ratio
+        self.rng = random.Random(self.seed)
+        self._buffer = deque()
+        self._class_weights = (widebody_ratio, 1.0)  # Cumulative: widebody, narrowbody
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if not self._buffer:
+            self._buffer.extend(self._draw(BLOCK_SIZE))
+        return self._buffer.popleft()
+
+    def batch(self, n):
+        """The next n flights of the stream as a list"""
+        while len(self._buffer) < n:
+            self._buffer.extend(self._draw(BLOCK_SIZE))
+        return [self._buffer.popleft() for _ in range(n)]
+
+    def substream(self, index):
+        """Independent generator for worker index, reproducible from this seed"""
+        return FlightGenerator(f"{self.seed}/{index}", self.widebody_ratio)
+
+    def _draw(self, n):
+        choices = self.rng.choices
+        widebody = choices((True, False), cum_weights=self._class_weights, k=n)
+        numbers = choices(self.number_ids, k=n)
+        narrow_aircraft = choices(self.narrowbody_ids, k=n)
+        wide_aircraft = choices(self.widebody_ids, k=n)
+        domestic = choices(self.domestic_ids, k=n)
+        international = choices(self.international_ids, k=n)
+        from_ids = Flight.from_ids
+        return [
+            from_ids(number, wide_type, abroad) if is_wide else from_ids(number, narrow_type, home)
+            for is_wide, number, narrow_type, wide_type, home, abroad
+            in zip(widebody, numbers, narrow_aircraft, wide_aircraft, domestic, international)
+        ]
+
+
+TIMETABLE_FIELDS = ("flight", "aircraft", "destination")
+known_aircraft = frozenset(narrowbody_aircraft) | frozenset(widebody_aircraft)
+known_destinations = frozenset(airport_cities)
+
+
+class TimetableError(ValueError):
+    """A timetable row that cannot be turned into a flight"""
+
+    def __init__(self, line, reason):
+        super().__init__(f"line {line}: {reason}")
+        self.line = line
+        self.reason = reason
+
+
+def timetable_format(path):
+    """"csv" or "jsonl" from a file name, ignoring a trailing .gz"""
+    name = path[:-3] if path.endswith(".gz") else path
+    extension = os.path.splitext(name)[1].lower()
+    if extension == ".csv":
+        return "csv"
+    if extension in (".jsonl", ".ndjson", ".json"):
+        return "jsonl"
+    raise ValueError(f"unknown timetable format for {path}; use .csv or .jsonl")
+
+
+def read_timetable(path, fmt=None, on_invalid=None):
+    """Yield validated Flight records from a CSV or JSON-lines timetable file
+
+    Rows are read lazily, so memory use does not grow with file size. Invalid
+    rows raise TimetableError unless on_invalid(error) is given, in which case
+    it is called and the row skipped.
+    """
+    fmt = fmt or timetable_format(path)
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rt", newline="", encoding="utf-8") as f:
+        yield from parse_timetable(f, fmt, on_invalid)
+
+
+def parse_timetable(lines, fmt="csv", on_invalid=None):
+    """Yield validated flights from an iterable of CSV or JSON-lines text"""
+    if fmt == "csv":
+        reader = csv.DictReader(lines)
+        missing = [field for field in TIMETABLE_FIELDS if field not in (reader.fieldnames or ())]
+        if missing:
+            raise TimetableError(1, f"missing column(s): {', '.join(missing)}")
+        rows = ((reader.line_num, row) for row in reader)
+    elif fmt == "jsonl":
+        rows = _json_rows(lines)
+    else:
+        raise ValueError(f"unknown timetable format: {fmt}")
+
+    for line, row in rows:
+        try:
+            yield _validate_row(line, row)
+        except TimetableError as error:
+            if on_invalid is None:
+                raise
+            on_invalid(error)
+
+
+def _json_rows(lines):
+    for line, text in enumerate(lines, 1):
+        text = text.strip()
+        if not text:
+            continue
+        try:
+            row = json.loads(text)
+        except ValueError as error:
+            yield line, error
+            continue
+        yield line, row
+
+
+def _validate_row(line, row):
+    if isinstance(row, ValueError):
+        raise TimetableError(line, f"invalid JSON: {row}")
+    if not isinstance(row, dict):
+        raise TimetableError(line, f"not a JSON object: {row}")
+    values = {}
+    for field in TIMETABLE_FIELDS:
+        value = row.get(field)
+        if not isinstance(value, str) or not value.strip():
+            raise TimetableError(line, f"missing {field}")
+        values[field] = value.strip().upper()
+    if values["aircraft"] not in known_aircraft:
+        raise TimetableError(line, f"unknown aircraft {values['aircraft']}")
+    if values["destination"] not in known_destinations:
+        raise TimetableError(line, f"unknown destination {values['destination']}")
+    return Flight(values["flight"], values["aircraft"], values["destination"])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Validate a timetable file")
+    parser.add_argument("path")
+    parser.add_argument("--format", choices=["csv", "jsonl"], default=None)
+    args = parser.parse_args()
+
+    errors = []
+    count = sum(1 for _ in read_timetable(args.path, args.format, errors.append))
+    for error in errors[:20]:
+        print(error)
+    print(f"{count} valid flights, {len(errors)} invalid rows")
+
+
+if __name__ == "__main__":
+    main()
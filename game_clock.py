@@ -0,0 +1,63 @@
+"""Real-time pacing of the engine's virtual clock at a chosen speed
+
+GameClock ties virtual milliseconds to time.monotonic() rather than counting
+timer callbacks, so when a callback runs late the next pump simply advances
+further and game time never drifts behind. Speed changes rebase the clock,
+so countdowns, dwell times and notifications all scale together.
+
+    clock = GameClock(speed=4)
+    clock.reset(engine.now)
+    ...  # in every pump:
+    engine.advance(clock.due(engine.now))
+"""
+import time
+
+SPEEDS = (1, 4, 60, None)  # Speed multipliers the game cycles through; None is unbounded
+MAX_CATCH_UP_MS = 5000  # Real gaps longer than this (a suspended laptop) are skipped, not replayed
+UNBOUNDED_BUDGET_S = 0.015  # Wall time per pump spent running the engine when unbounded
+UNBOUNDED_CHUNK_MS = 1000  # Virtual ms advanced per step when unbounded
+
+
+def speed_label(speed):
+    return "max" if speed is None else f"{speed:g}x"
+
+
+class GameClock:
+    """Virtual milliseconds owed to the engine at speed times real time"""
+
+    def __init__(self, speed=1, clock=time.monotonic):
+        self.speed = speed
+        self.clock = clock
+        self._real = None  # Real time the clock was last pinned at
+        self._virtual = 0  # Virtual time it was pinned to
+
+    @property
+    def unbounded(self):
+        return self.speed is None
+
+    def reset(self, virtual_now):
+        """Pin virtual_now to the present; call whenever the pump (re)starts"""
+        self._real = self.clock()
+        self._virtual = virtual_now
+
+    def set_speed(self, speed, virtual_now):
+        self.speed = speed
+        self.reset(virtual_now)
+
+    def due(self, virtual_now):
+        """Virtual ms to advance so the engine catches up with real time"""
+        if self._real is None or self.unbounded:
+            self.reset(virtual_now)
+            return 0
+        elapsed_ms = (self.clock() - self._real) * 1000
+        if elapsed_ms > MAX_CATCH_UP_MS + (virtual_now - self._virtual) / self.speed:
+            # Stalled far longer than any callback delay: resume from here
+            self.reset(virtual_now)
+            return 0
+        return max(0, self._virtual + int(elapsed_ms * self.speed) - virtual_now)
+
+    def run_unbounded(self, advance, done):
+        """Call advance(UNBOUNDED_CHUNK_MS) until done() or this pump's budget is spent"""
+        deadline = self.clock() + UNBOUNDED_BUDGET_S
+        while not done() and self.clock() < deadline:
+            advance(UNBOUNDED_CHUNK_MS)
@@ -0,0 +1,165 @@
+"""Gate map drawn on one tk.Canvas, for airports with hundreds of gates
+
+The widget map costs five Tk widgets per gate, and packing them gets slow
+long before 100 gates. CanvasGateMap draws each terminal as a grid of cells
+on a single canvas instead: per gate a rectangle, a label, a plane marker and
+a departure marker, each tagged with the gate. Updating a gate reconfigures
+only its own items, and a click is mapped to its gate by arithmetic on the
+grid, so a 500-gate hub draws and updates about as fast as 13 gates.
+
+    gate_map = CanvasGateMap(map_frame, {NARROWBODY: gates_a, WIDEBODY: gates_b}, assign_gate)
+    gate_map.configure_gate("A1", text="DL123", bg="lightcoral", state=tk.DISABLED)
+    gate_map.set_plane("A1", "🛬")
+"""
+import tkinter as tk
+
+from sim_data import NARROWBODY, WIDEBODY
+
+CANVAS_WIDTH = 660
+MAX_VISIBLE_HEIGHT = 380  # Taller maps scroll
+CELL_WIDTH = 62
+CELL_HEIGHTS = {NARROWBODY: 24, WIDEBODY: 36}
+GAP = 4  # Between cells
+PAD = 8  # Inside each terminal's border
+HEADER_HEIGHT = 36  # Terminal name above its cells
+# Title, terminal colour and free-gate colour for each size class
+TERMINAL_STYLES = {
+    NARROWBODY: ("TERMINAL A\nNARROWBODY", "#27ae60", "#2ecc71"),
+    WIDEBODY: ("TERMINAL B\nWIDEBODY", "#f39c12", "#f5b041"),
+}
+DEFAULT_STYLE = ("TERMINAL", "#7f8c8d", "#bdc3c7")
+DEPARTURE_MARK = "✈"
+ENABLED_TEXT = "black"
+DISABLED_TEXT = "#5d6d7e"
+
+
+class TerminalGrid:
+    """Cell geometry of one terminal's gates, laid out row by row"""
+
+    def __init__(self, gates, x0, y0, columns, cell_height):
+        self.gates = gates
+        self.x0 = x0
+        self.y0 = y0
+        self.columns = columns
+        self.cell_height = cell_height
+        self.rows = -(-len(gates) // columns)
+
+    @property
+    def height(self):
+        return self.rows * (self.cell_height + GAP) - GAP if self.gates else 0
+
+    def cell(self, index):
+        """(x0, y0, x1, y1) of the gate at index"""
+        row, column = divmod(index, self.columns)
+        x = self.x0 + column * (CELL_WIDTH + GAP)
+        y = self.y0 + row * (self.cell_height + GAP)
+        return x, y, x + CELL_WIDTH, y + self.cell_height
+
+    def gate_at(self, x, y):
+        """Gate whose cell contains canvas point (x, y), or None"""
+        column, x_offset = divmod(x - self.x0, CELL_WIDTH + GAP)
+        row, y_offset = divmod(y - self.y0, self.cell_height + GAP)
+        if not (0 <= column < self.columns and row >= 0):
+            return None
+        if x_offset >= CELL_WIDTH or y_offset >= self.cell_height:
+            return None  # In the gap between cells
+        index = int(row) * self.columns + int(column)
+        return self.gates[index] if index < len(self.gates) else None
+
+
+class CanvasGateMap:
+    """All terminals and gates as items on one scrollable canvas"""
+
+    def __init__(self, parent, gates_by_class, on_click, width=CANVAS_WIDTH,
+                 max_height=MAX_VISIBLE_HEIGHT, bg="#87CEEB"):
+        self.on_click = on_click
+        self.grids = []
+        self.items = {}  # Gate -> (rectangle, label, plane, departure) item ids
+        self.enabled = {}  # Gate -> whether a click on it counts
+        self.canvas = tk.Canvas(parent, width=width, bg=bg, highlightthickness=0)
+        height = self._draw(gates_by_class, width)
+
+        self.canvas.config(height=min(height, max_height), scrollregion=(0, 0, width, height))
+        self.canvas.pack(side=tk.LEFT)
+        if height > max_height:
+            scrollbar = tk.Scrollbar(parent, orient=tk.VERTICAL, command=self.canvas.yview)
+            scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+            self.canvas.config(yscrollcommand=scrollbar.set)
+            self.canvas.bind("<MouseWheel>", self._scroll)
+            self.canvas.bind("<Button-4>", lambda event: self.canvas.yview_scroll(-1, "units"))
+            self.canvas.bind("<Button-5>", lambda event: self.canvas.yview_scroll(1, "units"))
+        self.canvas.bind("<Button-1>", self._click)
+
+    def _draw(self, gates_by_class, width):
+        """Draw every terminal side by side; returns the height of the drawing"""
+        canvas = self.canvas
+        terminal_width = (width - GAP * (len(gates_by_class) - 1)) // max(1, len(gates_by_class))
+        columns = max(1, (terminal_width - 2 * PAD + GAP) // (CELL_WIDTH + GAP))
+        styles = []
+        for position, (gate_class, gates) in enumerate(gates_by_class.items()):
+            left = position * (terminal_width + GAP)
+            self.grids.append(TerminalGrid(list(gates), left + PAD, HEADER_HEIGHT, columns,
+                                           CELL_HEIGHTS.get(gate_class, CELL_HEIGHTS[NARROWBODY])))
+            styles.append((left, TERMINAL_STYLES.get(gate_class, DEFAULT_STYLE)))
+        # Terminals share one bottom edge
+        tallest = HEADER_HEIGHT + max((grid.height for grid in self.grids), default=0) + PAD
+        for grid, (left, (title, terminal_bg, gate_bg)) in zip(self.grids, styles):
+            canvas.create_rectangle(left, 0, left + terminal_width, tallest, fill=terminal_bg,
+                                    outline="#2c3e50", width=2, tags=("terminal",))
+            canvas.create_text(left + terminal_width / 2, HEADER_HEIGHT / 2, text=title, fill="white",
+                               font=("Arial", 9, "bold"), justify=tk.CENTER, tags=("terminal",))
+            for index, gate in enumerate(grid.gates):
+                x0, y0, x1, y1 = grid.cell(index)
+                middle = (y0 + y1) / 2
+                tag = f"gate:{gate}"
+                self.items[gate] = (
+                    canvas.create_rectangle(x0, y0, x1, y1, fill=gate_bg, outline="#2c3e50",
+                                            tags=("gate", tag)),
+                    canvas.create_text(x0 + CELL_WIDTH / 2 + 6, middle, text=gate, fill=ENABLED_TEXT,
+                                       font=("Arial", 8, "bold"), tags=("gate-label", tag)),
+                    canvas.create_text(x0 + 9, middle, text="", font=("Arial", 10), tags=("plane", tag)),
+                    canvas.create_text(x1 - 6, y0 + 7, text="", fill="#2471a3", font=("Arial", 8, "bold"),
+                                       tags=("departure", tag)),
+                )
+                self.enabled[gate] = True
+        return tallest
+
+    def gate_at(self, x, y):
+        """Gate under canvas point (x, y), or None"""
+        for grid in self.grids:
+            gate = grid.gate_at(x, y)
+            if gate is not None:
+                return gate
+        return None
+
+    def configure_gate(self, gate, text=None, bg=None, state=None, **unused):
+        """Same options as the widget map's gate buttons; height is fixed by the gate's class"""
+        rectangle, label, _, _ = self.items[gate]
+        if bg is not None:
+            self.canvas.itemconfigure(rectangle, fill=bg)
+        label_options = {}
+        if text is not None:
+            label_options["text"] = text
+        if state is not None:
+            self.enabled[gate] = state == tk.NORMAL
+            label_options["fill"] = ENABLED_TEXT if self.enabled[gate] else DISABLED_TEXT
+        if label_options:
+            self.canvas.itemconfigure(label, **label_options)
+
+    def set_plane(self, gate, text):
+        self.canvas.itemconfigure(self.items[gate][2], text=text)
+
+    def set_departure(self, gate, shown):
+        """Show or hide the departure marker on a gate"""
+        self.canvas.itemconfigure(self.items[gate][3], text=DEPARTURE_MARK if shown else "")
+
+    def clear_departures(self):
+        self.canvas.itemconfigure("departure", text="")
+
+    def _click(self, event):
+        gate = self.gate_at(self.canvas.canvasx(event.x), self.canvas.canvasy(event.y))
+        if gate is not None and self.enabled[gate]:
+            self.on_click(gate)
+
+    def _scroll(self, event):
+        self.canvas.yview_scroll(-1 if event.delta > 0 else 1, "units")
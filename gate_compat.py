@@ -0,0 +1,273 @@
+"""Aircraft/gate compatibility compiled into bitmask lookups
+
+Real hubs rate each gate for a largest ICAO size code (C to F), have swing
+gates that serve more than one size class, and adjacency rules: a widebody
+at one gate can block its neighbour, or limit it to smaller aircraft.
+CompatibilityIndex compiles a layout once into one static bitmask of
+compatible gates per aircraft type and, per size code, a bitmask of gates
+currently closed by a neighbour. Parking and leaving update those masks
+through the few rules touching the gate, so "which gates can take this
+aircraft right now" is an AND of three integers however many gates and
+rules the airport has.
+
+    index = CompatibilityIndex(*hub_layout(500))
+    gate = index.first_available(flight.aircraft_id)
+    index.park(gate, flight.aircraft_id)
+    index.leave(gate)
+
+The game's own 13 gates compile to the same answers as can_use_gate().
+Given a layout, ShiftEngine compiles it once at startup and decides wrong
+gates, free-gate queries and parking through the index, so size codes,
+swing gates and adjacency rules apply to play and to the policies:
+
+    index = default_index()
+    engine = ShiftEngine("hard", layout=hub_layout(120))
+"""
+import argparse
+import random
+import time
+from collections import namedtuple
+
+from sim_data import (NARROWBODY, SIZE_CODES, WIDEBODY, aircraft_class, aircraft_size_codes, aircraft_types,
+                      gate_names, narrowbody_gates, widebody_gates)
+
+# Size code assumed for aircraft types missing from aircraft_size_codes
+DEFAULT_CODES = {NARROWBODY: "C", WIDEBODY: "E"}
+
+# classes: the size classes a gate serves; a swing gate lists several
+GateSpec = namedtuple("GateSpec", "name max_code classes")
+# While gate holds an aircraft of code trigger or larger, neighbor takes
+# nothing larger than limit (None: nothing at all), and the other way round
+AdjacencyRule = namedtuple("AdjacencyRule", "gate neighbor trigger limit")
+
+
+def size_code(aircraft):
+    """ICAO size code of an aircraft type"""
+    return aircraft_size_codes.get(aircraft) or DEFAULT_CODES[aircraft_class(aircraft)]
+
+
+def _level(code):
+    level = SIZE_CODES.find(code)
+    if level < 0:
+        raise ValueError(f"unknown size code {code!r}, expected one of {SIZE_CODES}")
+    return level
+
+
+class CompatibilityIndex:
+    """Which gates can take an aircraft now, as bitmasks over the layout's gates"""
+
+    def __init__(self, gates, rules=()):
+        self.gates = [spec.name for spec in gates]
+        self.position = {}  # Gate -> its bit position
+        for position, gate in enumerate(self.gates):
+            if gate in self.position:
+                raise ValueError(f"gate {gate} listed twice")
+            self.position[gate] = position
+        levels = len(SIZE_CODES)
+        # Gates rated for each size code, and serving each size class
+        self._fits = [0] * levels
+        self._serves = {}
+        self.max_levels = []  # Gate position -> level of its largest size code
+        for position, spec in enumerate(gates):
+            bit = 1 << position
+            self.max_levels.append(_level(spec.max_code))
+            for level in range(_level(spec.max_code) + 1):
+                self._fits[level] |= bit
+            for gate_class in spec.classes:
+                self._serves[gate_class] = self._serves.get(gate_class, 0) | bit
+        # Per gate: (trigger level, first level closed, other gate) for the
+        # rules that close another gate while it is occupied
+        self._closes = [[] for _ in self.gates]
+        for rule in rules:
+            gate, neighbor = self.position[rule.gate], self.position[rule.neighbor]
+            trigger = _level(rule.trigger)
+            first = 0 if rule.limit is None else _level(rule.limit) + 1
+            # A big aircraft at gate keeps big aircraft off neighbor...
+            self._closes[gate].append((trigger, first, neighbor))
+            # ...and an aircraft over the limit at neighbor keeps big ones off gate
+            self._closes[neighbor].append((first, trigger, gate))
+        self._masks = []  # Aircraft id -> static mask of compatible gates
+        self._levels = []  # Aircraft id -> size code level
+        self._compile_types()
+        self.occupied = 0  # Bitmask of occupied gates
+        self.closed = [0] * levels  # Size code level -> bitmask of gates closed to it
+        self._close_counts = [[0] * len(self.gates) for _ in range(levels)]
+        self._parked = {}  # Gate position -> level of the aircraft parked there
+
+    def _compile_types(self):
+        for aircraft in aircraft_types.codes[len(self._masks):]:
+            level = _level(size_code(aircraft))
+            self._levels.append(level)
+            self._masks.append(self._fits[level] & self._serves.get(aircraft_class(aircraft), 0))
+
+    def __len__(self):
+        return len(self.gates)
+
+    def compatible(self, aircraft_id):
+        """Static mask of gates that can ever take the aircraft type"""
+        if aircraft_id >= len(self._masks):
+            self._compile_types()  # Interned after the index was built
+        return self._masks[aircraft_id]
+
+    def allowed(self, aircraft_id):
+        """Mask of gates the aircraft type may use now, occupied or not"""
+        if aircraft_id >= len(self._masks):
+            self._compile_types()
+        return self._masks[aircraft_id] & ~self.closed[self._levels[aircraft_id]]
+
+    def available(self, aircraft_id):
+        """Mask of gates that can take the aircraft type right now"""
+        if aircraft_id >= len(self._masks):
+            self._compile_types()
+        return self._masks[aircraft_id] & ~(self.occupied | self.closed[self._levels[aircraft_id]])
+
+    def can_park(self, gate, aircraft_id):
+        return bool(self.available(aircraft_id) >> self.position[gate] & 1)
+
+    def first_available(self, aircraft_id):
+        """Lowest-ordered gate that can take the aircraft now, or None"""
+        mask = self.available(aircraft_id)
+        return self.gates[(mask & -mask).bit_length() - 1] if mask else None
+
+    def park_cost(self, gate, aircraft_id):
+        """(gate's size code level, gates parking here would newly close) for
+        choosing the gate that leaves the most room for later aircraft"""
+        position = self.position[gate]
+        level = self._levels[aircraft_id]
+        closes = 0
+        for trigger, first, other in self._closes[position]:
+            if level >= trigger and not (self.occupied >> other & 1) and not (self.closed[first] >> other & 1):
+                closes += 1
+        return self.max_levels[position], closes
+
+    def gates_in(self, mask):
+        """Gate names of a mask in layout order"""
+        gates = self.gates
+        while mask:
+            low = mask & -mask
+            yield gates[low.bit_length() - 1]
+            mask ^= low
+
+    def park(self, gate, aircraft_id):
+        """Occupy gate, which must be available to the aircraft, and apply its rules"""
+        if not self.can_park(gate, aircraft_id):
+            raise ValueError(f"gate {gate} cannot take {aircraft_types.codes[aircraft_id]} now")
+        position = self.position[gate]
+        level = self._levels[aircraft_id]
+        self.occupied |= 1 << position
+        self._parked[position] = level
+        self._apply(position, level, 1)
+
+    def leave(self, gate):
+        """Free gate and lift the restrictions its aircraft put on others"""
+        position = self.position[gate]
+        level = self._parked.pop(position, None)
+        if level is None:
+            return
+        self.occupied &= ~(1 << position)
+        self._apply(position, level, -1)
+
+    def _apply(self, position, level, delta):
+        # Several aircraft can close the same gate, so closures are counted
+        for trigger, first, other in self._closes[position]:
+            if level < trigger:
+                continue
+            bit = 1 << other
+            for closed_level in range(first, len(SIZE_CODES)):
+                counts = self._close_counts[closed_level]
+                counts[other] += delta
+                if delta > 0 and counts[other] == 1:
+                    self.closed[closed_level] |= bit
+                elif delta < 0 and counts[other] == 0:
+                    self.closed[closed_level] &= ~bit
+
+    def clear(self):
+        """Free every gate"""
+        self.occupied = 0
+        self.closed = [0] * len(SIZE_CODES)
+        self._close_counts = [[0] * len(self.gates) for _ in SIZE_CODES]
+        self._parked.clear()
+
+
+def default_layout():
+    """The game's gates: A gates take narrowbodies up to code D, B gates any widebody"""
+    return ([GateSpec(gate, "D", (NARROWBODY,)) for gate in narrowbody_gates]
+            + [GateSpec(gate, "F", (WIDEBODY,)) for gate in widebody_gates])
+
+
+def default_index():
+    return CompatibilityIndex(default_layout())
+
+
+def gates_by_class(gates):
+    """Gate names of a layout grouped into terminals for GatePool and the gate
+    map; a swing gate goes with the widebodies"""
+    grouped = {}
+    for spec in gates:
+        home = WIDEBODY if WIDEBODY in spec.classes else spec.classes[0]
+        grouped.setdefault(home, []).append(spec.name)
+    return grouped
+
+
+def hub_layout(n_gates, seed=0, pier_size=10, swing_share=0.1):
+    """A large hub: piers of mixed code C to F gates, some swing gates, and
+    rules that keep a code E or F aircraft's neighbours to code C"""
+    rng = random.Random(seed)
+    widebody_level = _level("E")
+    gates = []
+    rules = []
+    for pier_number, pier_start in enumerate(range(0, n_gates, pier_size)):
+        pier = chr(ord("A") + pier_number % 26) * (pier_number // 26 + 1)  # A..Z, AA..ZZ, ...
+        pier_gates = []
+        for name in gate_names(pier, min(pier_size, n_gates - pier_start)):
+            max_code = rng.choices(SIZE_CODES, weights=(55, 15, 20, 10))[0]
+            if rng.random() < swing_share:
+                classes = (NARROWBODY, WIDEBODY)
+            else:
+                classes = (NARROWBODY,) if _level(max_code) < widebody_level else (WIDEBODY,)
+            pier_gates.append(GateSpec(name, max_code, classes))
+        # Neighbouring widebody stands along a pier share wingtip clearance
+        for left, right in zip(pier_gates, pier_gates[1:]):
+            if min(_level(left.max_code), _level(right.max_code)) >= widebody_level:
+                rules.append(AdjacencyRule(left.name, right.name, "E", "C"))
+        gates.extend(pier_gates)
+    return gates, rules
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time compatibility queries on a generated hub")
+    parser.add_argument("--gates", type=int, default=500)
+    parser.add_argument("--queries", type=int, default=200_000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    gates, rules = hub_layout(args.gates, args.seed)
+    start = time.perf_counter()
+    index = CompatibilityIndex(gates, rules)
+    compile_ms = (time.perf_counter() - start) * 1000
+    print(f"{len(gates)} gates, {len(rules)} adjacency rules, compiled in {compile_ms:.1f} ms")
+
+    rng = random.Random(args.seed)
+    aircraft_ids = list(range(len(aircraft_types)))
+    parked = []
+    refused = 0
+    start = time.perf_counter()
+    for _ in range(args.queries):
+        # Keep the hub about three quarters full
+        if parked and (len(parked) > 0.75 * len(gates) or rng.random() < 0.3):
+            index.leave(parked.pop(rng.randrange(len(parked))))
+            continue
+        aircraft_id = rng.choice(aircraft_ids)
+        gate = index.first_available(aircraft_id)
+        if gate is None:
+            refused += 1
+        else:
+            index.park(gate, aircraft_id)
+            parked.append(gate)
+    elapsed = time.perf_counter() - start
+    print(f"{args.queries} park/leave steps in {elapsed * 1000:.0f} ms "
+          f"({elapsed / args.queries * 1e6:.2f} us each), {refused} aircraft found no gate")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,351 @@
+"""Offline optimal gate schedules for scoring live play and policies
+
+When every flight's arrival and dwell time is known in advance, gate
+assignment is interval scheduling, solved separately for each size class
+since a gate only serves one:
+
+- min_gates(): the fewest gates that park every flight on arrival, which is
+  the most planes ever on the ground at once. One sweep over arrivals with a
+  heap of departure times.
+- max_served(): the most flights n gates can park on arrival. The sweep
+  admits every flight and, whenever more than n planes would be on the
+  ground, turns away the one leaving last. This greedy is optimal and runs in
+  O(n log n), so a 100,000-flight day solves in well under a second.
+- max_served_with_wait(): the same when flights may wait up to max_wait_ms
+  for a gate and are parked first come, first served, as the game shows
+  them. This is branch and bound, meant for shift-sized days.
+
+A DayRecorder turns a played shift (live, or from a shift log) into the day
+it faced: each flight arrives when it was shown and keeps the dwell time it
+got, and flights that were never parked draw one. The optimum with the
+countdown as the allowed wait is then an upper bound on what any player or
+policy could have scored.
+
+    python gate_optimum.py --flights 100000 --rate 1200 --narrowbody-gates 40 --widebody-gates 25
+    python gate_optimum.py --policy first-fit --shifts 20 --difficulty hard
+    python gate_optimum.py --log shift.jsonl
+"""
+import argparse
+import heapq
+import random
+from bisect import insort
+from collections import namedtuple
+
+from arrivals import ARRIVAL_MODELS, make_arrivals
+from flight_stream import FlightGenerator
+from sim_data import NARROWBODY, WIDEBODY, Flight
+from sim_engine import (COUNTDOWN_TICK_MS, NARROWBODY_POINTS, WIDEBODY_POINTS, ShiftConfig,
+                        ShiftEngine, shift_config)
+
+NODE_LIMIT = 200000  # Branch-and-bound nodes searched per size class before giving up
+MAX_SEARCH_FLIGHTS = 800  # Larger classes only get the greedy schedule (search recurses per flight)
+POINTS = {NARROWBODY: NARROWBODY_POINTS, WIDEBODY: WIDEBODY_POINTS}
+
+Visit = namedtuple("Visit", "arrive dwell gate_class flight")
+# Per size class: flights in the day, the most servable, the fewest gates for
+# all of them, and whether served is proven optimal
+ClassOptimum = namedtuple("ClassOptimum", "flights served min_gates proven")
+DayOptimum = namedtuple("DayOptimum", "flights served score classes")
+
+
+def min_gates(visits):
+    """Fewest gates that park every visit on arrival"""
+    departures = []
+    most = 0
+    for arrive, leave in sorted((visit.arrive, visit.arrive + visit.dwell) for visit in visits):
+        # A gate freed at the very millisecond a plane arrives can take it
+        while departures and departures[0] <= arrive:
+            heapq.heappop(departures)
+        heapq.heappush(departures, leave)
+        if len(departures) > most:
+            most = len(departures)
+    return most
+
+
+def max_served(visits, n_gates):
+    """Indexes of a largest set of visits that n_gates can park on arrival, by arrival"""
+    order = sorted(range(len(visits)), key=lambda index: visits[index].arrive)
+    turned_away = bytearray(len(visits))
+    by_departure = []  # (leave, index) of admitted visits, soonest first
+    by_latest = []  # (-leave, index) of admitted visits, latest first
+    on_ground = 0
+    for index in order:
+        arrive = visits[index].arrive
+        leave = arrive + visits[index].dwell
+        while by_departure and by_departure[0][0] <= arrive:
+            if not turned_away[heapq.heappop(by_departure)[1]]:
+                on_ground -= 1
+        heapq.heappush(by_departure, (leave, index))
+        heapq.heappush(by_latest, (-leave, index))
+        on_ground += 1
+        if on_ground > n_gates:
+            # Turn away whoever would hold a gate longest; departed and already
+            # refused entries never top the heap, or are skipped here
+            while True:
+                _, latest = heapq.heappop(by_latest)
+                if not turned_away[latest]:
+                    break
+            turned_away[latest] = 1
+            on_ground -= 1
+    return [index for index in order if not turned_away[index]]
+
+
+def assign_gates(visits, kept, n_gates):
+    """Gate number (0 to n_gates - 1) for each kept visit, lowest free gate first"""
+    free = list(range(n_gates))  # Already a heap
+    busy = []  # (leave, gate)
+    gates = {}
+    for index in sorted(kept, key=lambda index: visits[index].arrive):
+        arrive = visits[index].arrive
+        while busy and busy[0][0] <= arrive:
+            heapq.heappush(free, heapq.heappop(busy)[1])
+        if not free:
+            raise ValueError(f"{len(kept)} visits do not fit in {n_gates} gates")
+        gate = heapq.heappop(free)
+        gates[index] = gate
+        heapq.heappush(busy, (arrive + visits[index].dwell, gate))
+    return gates
+
+
+class _SearchLimit(Exception):
+    pass
+
+
+def _greedy_with_wait(flights, n_gates, max_wait_ms):
+    free_at = [0] * n_gates
+    last_start = 0
+    served = 0
+    for arrive, dwell in flights:
+        start = max(arrive, last_start, free_at[0])
+        if start - arrive <= max_wait_ms:
+            heapq.heapreplace(free_at, start + dwell)
+            last_start = start
+            served += 1
+    return served
+
+
+def max_served_with_wait(visits, n_gates, max_wait_ms, node_limit=NODE_LIMIT):
+    """(most visits servable, proven) when each may wait up to max_wait_ms
+
+    Visits are parked in arrival order, none before one that arrived earlier.
+    proven is False if the search ran out of nodes and served is only the
+    best schedule found.
+    """
+    flights = sorted((visit.arrive, visit.dwell) for visit in visits)
+    if n_gates <= 0 or not flights:
+        return 0, True
+    best = _greedy_with_wait(flights, n_gates, max_wait_ms)
+    if max_wait_ms <= 0:
+        # Without waiting the greedy is the sweep, which is optimal
+        return len(max_served(visits, n_gates)), True
+    if len(flights) > MAX_SEARCH_FLIGHTS:
+        return best, False
+
+    n = len(flights)
+    seen = {}  # Search state -> most served on reaching it
+    nodes = 0
+
+    def search(position, free_at, last_start, served):
+        # free_at: sorted times each gate frees up
+        nonlocal best, nodes
+        if served + n - position <= best:
+            return
+        if position == n:
+            best = served
+            return
+        nodes += 1
+        if nodes > node_limit:
+            raise _SearchLimit
+        arrive, dwell = flights[position]
+        floor = max(arrive, last_start)
+        # Gates free before the floor are interchangeable
+        clipped = tuple(time if time > floor else floor for time in free_at)
+        state = (position, floor, clipped)
+        if seen.get(state, -1) >= served:
+            return
+        seen[state] = served
+        tried = None
+        for gate, start in enumerate(clipped):
+            if start - arrive > max_wait_ms:
+                break
+            if start == tried:
+                continue
+            tried = start
+            after = list(clipped[:gate] + clipped[gate + 1:])
+            insort(after, start + dwell)
+            search(position + 1, after, start, served + 1)
+        search(position + 1, clipped, floor, served)
+
+    try:
+        search(0, [0] * n_gates, 0, 0)
+    except _SearchLimit:
+        return best, False
+    return best, True
+
+
+def optimize_day(visits, gates_by_class, max_wait_ms=0, node_limit=NODE_LIMIT):
+    """DayOptimum for visits; gates_by_class maps a size class to its gate count"""
+    groups = {gate_class: [] for gate_class in gates_by_class}
+    for visit in visits:
+        groups.setdefault(visit.gate_class, []).append(visit)
+    classes = {}
+    for gate_class, group in groups.items():
+        n_gates = gates_by_class.get(gate_class, 0)
+        if max_wait_ms > 0:
+            served, proven = max_served_with_wait(group, n_gates, max_wait_ms, node_limit)
+        else:
+            served, proven = len(max_served(group, n_gates)), True
+        classes[gate_class] = ClassOptimum(len(group), served, min_gates(group), proven)
+    served = sum(result.served for result in classes.values())
+    score = sum(POINTS.get(gate_class, 0) * result.served for gate_class, result in classes.items())
+    return DayOptimum(len(visits), served, score, classes)
+
+
+def generate_day(n_flights, rate_per_hour, model="poisson", config=None, seed=0):
+    """Visits for n_flights arriving at rate_per_hour with dwell times from config"""
+    config = config if config is not None else shift_config()
+    flights = FlightGenerator(seed, config.widebody_ratio)
+    arrive_times = make_arrivals(model, rate_per_hour).times(random.Random(f"{seed}/arrivals"))
+    dwell_rng = random.Random(f"{seed}/dwell")
+    visits = []
+    for _ in range(n_flights):
+        flight = next(flights)
+        visits.append(Visit(next(arrive_times), dwell_rng.randint(config.dwell_min_ms, config.dwell_max_ms),
+                            flight.aircraft_class, flight))
+    return visits
+
+
+class DayRecorder:
+    """Builds the day a shift faced from its events, live or from a log"""
+
+    def __init__(self, config, seed=0):
+        self.config = config
+        self.rng = random.Random(seed)  # Dwell times for flights never parked
+        self.served = 0
+        self.score = 0
+        self._visits = []  # [shown at, dwell or None, size class, flight]
+        self._parked = {}  # Gate -> (visit index, parked at)
+
+    def attach(self, engine):
+        engine.subscribe(lambda kind, fields: self.record(engine.now, kind, fields))
+
+    def record(self, when, kind, fields):
+        if kind == "flight":
+            flight = fields["flight"]
+            if not isinstance(flight, Flight):
+                flight = Flight(*flight)
+            self._visits.append([when, None, flight.aircraft_class, flight])
+        elif kind == "assigned":
+            self._parked[fields["gate"]] = (len(self._visits) - 1, when)
+            self.served += 1
+            self.score += fields["points"]
+        elif kind == "departed":
+            index, parked = self._parked.pop(fields["gate"])
+            self._visits[index][1] = when - parked
+
+    def visits(self):
+        config = self.config
+        return [Visit(shown, dwell if dwell is not None else
+                      self.rng.randint(config.dwell_min_ms, config.dwell_max_ms), gate_class, flight)
+                for shown, dwell, gate_class, flight in self._visits]
+
+
+def countdown_wait_ms(config):
+    """Longest a shown flight can wait for a gate before it times out"""
+    return (config.countdown_seconds + 1) * COUNTDOWN_TICK_MS
+
+
+def gate_counts(config):
+    return {NARROWBODY: config.n_narrowbody, WIDEBODY: config.n_widebody}
+
+
+def score_log(path, node_limit=NODE_LIMIT):
+    """(DayRecorder, DayOptimum) for a recorded shift"""
+    from shift_log import read_log
+
+    header, records = read_log(path)
+    config = ShiftConfig(**header["config"])
+    day = DayRecorder(config, header["seed"])
+    for record in records:
+        day.record(record.time, record.kind, record.fields)
+    return day, optimize_day(day.visits(), gate_counts(config), countdown_wait_ms(config), node_limit)
+
+
+def score_policy(name, shifts=10, config=None, seed=0, reaction_ms=0, node_limit=NODE_LIMIT):
+    """(DayRecorder, DayOptimum) for each of shifts seeded shifts played by a policy"""
+    from policies import attach_policy, make_policy
+
+    config = config if config is not None else shift_config()
+    results = []
+    for shift in range(shifts):
+        shift_seed = seed * 1000003 + shift
+        engine = ShiftEngine(rng=random.Random(~shift_seed), config=config,
+                             flights=FlightGenerator(shift_seed, config.widebody_ratio))
+        day = DayRecorder(config, shift_seed)
+        day.attach(engine)
+        attach_policy(engine, make_policy(name, shift_seed), reaction_ms)
+        engine.run()
+        results.append((day, optimize_day(day.visits(), gate_counts(config),
+                                          countdown_wait_ms(config), node_limit)))
+    return results
+
+
+def print_optimum(optimum):
+    for gate_class, result in optimum.classes.items():
+        proof = "" if result.proven else " (best found, search limit hit)"
+        print(f"{gate_class:<12}{result.flights:>9} flights{result.served:>9} servable"
+              f"{result.min_gates:>7} gates to serve all{proof}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Optimal offline gate schedules to score play against")
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--log", help="score a recorded shift log")
+    source.add_argument("--policy", help="score a policy over seeded shifts")
+    parser.add_argument("--flights", type=int, default=100000, help="flights in a generated day")
+    parser.add_argument("--rate", type=float, default=1200, help="arrivals per game hour in a generated day")
+    parser.add_argument("--model", choices=sorted(ARRIVAL_MODELS), default="poisson")
+    parser.add_argument("--max-wait-ms", type=int, default=0,
+                        help="how long a generated flight may wait for a gate (branch and bound)")
+    parser.add_argument("--shifts", type=int, default=10)
+    parser.add_argument("--difficulty", choices=["easy", "hard"], default="easy")
+    parser.add_argument("--narrowbody-gates", type=int, default=None)
+    parser.add_argument("--widebody-gates", type=int, default=None)
+    parser.add_argument("--reaction-ms", type=int, default=0)
+    parser.add_argument("--node-limit", type=int, default=NODE_LIMIT)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    if args.log:
+        day, optimum = score_log(args.log, args.node_limit)
+        print_optimum(optimum)
+        print(f"played {day.served} of {optimum.served} servable flights, "
+              f"score {day.score} of {optimum.score}")
+        return
+
+    config = shift_config(args.difficulty)
+    if args.narrowbody_gates is not None:
+        config = config._replace(n_narrowbody=args.narrowbody_gates)
+    if args.widebody_gates is not None:
+        config = config._replace(n_widebody=args.widebody_gates)
+
+    if args.policy:
+        results = score_policy(args.policy, args.shifts, config, args.seed, args.reaction_ms, args.node_limit)
+        played = sum(day.score for day, _ in results)
+        best = sum(optimum.score for _, optimum in results)
+        unproven = sum(not all(result.proven for result in optimum.classes.values())
+                       for _, optimum in results)
+        print(f"{args.policy}: mean score {played / len(results):.1f} of an optimal "
+              f"{best / len(results):.1f} ({played / best if best else 1:.1%})")
+        if unproven:
+            print(f"{unproven} shift(s) hit the search limit; their optimum is a lower bound")
+        return
+
+    visits = generate_day(args.flights, args.rate, args.model, config, args.seed)
+    optimum = optimize_day(visits, gate_counts(config), args.max_wait_ms, args.node_limit)
+    print_optimum(optimum)
+    print(f"{optimum.served} of {optimum.flights} flights servable, score {optimum.score}")
+
+
+if __name__ == "__main__":
+    main()
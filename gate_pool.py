@@ -0,0 +1,86 @@
+"""Gate allocation index with constant-time lookups per size class
+
+Each size class keeps its gates in a fixed order and an integer bitset of
+which of them are free, so acquire, release, "is this gate free" and "first
+free gate of class X" never scan a list, however many gates the airport has.
+"""
+
+
+class GatePool:
+    """Free/occupied state for every gate, grouped by size class"""
+
+    def __init__(self, gates_by_class):
+        # gates_by_class maps a size class to its gates in first-fit order
+        self.classes = list(gates_by_class)
+        self.gates = {}  # Size class -> gate names
+        self._class_of = {}  # Gate -> size class
+        self._bit = {}  # Gate -> its bit in the class bitset
+        self._free = {}  # Size class -> bitset of free gates
+        self.occupied = {}  # Gate -> flight parked there
+        for gate_class, gates in gates_by_class.items():
+            self.gates[gate_class] = list(gates)
+            for position, gate in enumerate(gates):
+                if gate in self._class_of:
+                    raise ValueError(f"gate {gate} listed twice")
+                self._class_of[gate] = gate_class
+                self._bit[gate] = 1 << position
+            self._free[gate_class] = (1 << len(gates)) - 1
+
+    def __contains__(self, gate):
+        return gate in self._class_of
+
+    def __len__(self):
+        return len(self._class_of)
+
+    def all_gates(self):
+        """Every gate, class by class in first-fit order"""
+        return [gate for gate_class in self.classes for gate in self.gates[gate_class]]
+
+    def class_of(self, gate):
+        return self._class_of.get(gate)
+
+    def is_free(self, gate):
+        gate_class = self._class_of.get(gate)
+        return gate_class is not None and bool(self._free[gate_class] & self._bit[gate])
+
+    def flight_at(self, gate):
+        return self.occupied.get(gate)
+
+    def acquire(self, gate, flight):
+        """Park flight at gate, which must be free"""
+        if not self.is_free(gate):
+            raise ValueError(f"gate {gate} is not free")
+        self._free[self._class_of[gate]] &= ~self._bit[gate]
+        self.occupied[gate] = flight
+
+    def release(self, gate):
+        """Free gate and return the flight that was parked there, or None"""
+        if gate not in self.occupied:
+            return None
+        self._free[self._class_of[gate]] |= self._bit[gate]
+        return self.occupied.pop(gate)
+
+    def first_free(self, gate_class):
+        """Lowest-ordered free gate of gate_class, or None if all are taken"""
+        free = self._free.get(gate_class, 0)
+        if not free:
+            return None
+        return self.gates[gate_class][(free & -free).bit_length() - 1]
+
+    def free_count(self, gate_class):
+        return bin(self._free.get(gate_class, 0)).count("1")
+
+    def free_gates(self, gate_class):
+        """Free gates of gate_class in first-fit order"""
+        free = self._free.get(gate_class, 0)
+        gates = self.gates[gate_class]
+        while free:
+            low = free & -free
+            yield gates[low.bit_length() - 1]
+            free ^= low
+
+    def clear(self):
+        """Free every gate"""
+        self.occupied.clear()
+        for gate_class, gates in self.gates.items():
+            self._free[gate_class] = (1 << len(gates)) - 1
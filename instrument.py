@@ -0,0 +1,165 @@
+"""Opt-in latency instrumentation for the game's callbacks and clock pump
+
+Instrumentation.install() swaps named functions in a module namespace for
+timing wrappers, so when it is never installed the game runs the original
+functions with no overhead at all. Each callback gets a log-bucketed
+histogram (constant memory, buckets 6 to 12.5% wide) reporting p50/p95/p99.
+scheduled() notes when the next clock pump is due and pump() how late it
+fired, so the time the pump itself spends working is not counted as drift.
+
+    metrics = Instrumentation()
+    metrics.install(globals(), CALLBACK_NAMES)
+    metrics.scheduled(ENGINE_TICK_MS)  # next to root.after(ENGINE_TICK_MS, ...)
+    metrics.pump()                     # first thing in the pump
+    ...
+    metrics.dump("latency.json")
+"""
+import functools
+import json
+import time
+
+# UI functions timed when instrumentation is on
+CALLBACK_NAMES = ("next_flight", "assign_gate", "depart_plane", "update_countdown_display",
+                  "update_game_time", "show_wrong_gate", "show_assignment", "update_gate_display",
+                  "run_engine")
+SUB_BUCKET_BITS = 4  # 8 buckets per power of two microseconds
+PERCENTILES = (50, 95, 99)
+
+
+class LatencyHistogram:
+    """Counts of durations in log-linear microsecond buckets"""
+
+    def __init__(self):
+        self.counts = []
+        self.count = 0
+        self.total = 0.0  # Seconds
+        self.max = 0.0
+
+    def record(self, seconds):
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+        index = _bucket_index(int(seconds * 1e6))
+        counts = self.counts
+        if index >= len(counts):
+            counts.extend([0] * (index + 1 - len(counts)))
+        counts[index] += 1
+
+    def percentile(self, p):
+        """Duration in seconds below which p percent of records fall"""
+        if not self.count:
+            return 0.0
+        rank = p / 100 * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank and count:
+                low, high = _bucket_bounds(index)
+                return min(self.max, (low + high) / 2e6)
+        return self.max
+
+    def summary(self):
+        """Count, mean, percentiles and max, in milliseconds"""
+        row = {"count": self.count, "mean_ms": self.total / self.count * 1000 if self.count else 0.0}
+        for p in PERCENTILES:
+            row[f"p{p}_ms"] = self.percentile(p) * 1000
+        row["max_ms"] = self.max * 1000
+        return row
+
+
+def _bucket_index(micros):
+    half = 1 << (SUB_BUCKET_BITS - 1)
+    if micros < 2 * half:
+        return max(0, micros)
+    shift = micros.bit_length() - SUB_BUCKET_BITS
+    return shift * half + (micros >> shift)
+
+
+def _bucket_bounds(index):
+    half = 1 << (SUB_BUCKET_BITS - 1)
+    if index < 2 * half:
+        return index, index + 1
+    shift = index // half - 1
+    mantissa = index % half + half
+    return mantissa << shift, (mantissa + 1) << shift
+
+
+class Instrumentation:
+    """Callback timings and clock drift for one run of the game"""
+
+    def __init__(self, clock=time.perf_counter):
+        self.clock = clock
+        self.histograms = {}  # Callback name -> LatencyHistogram
+        self.drift = LatencyHistogram()  # How late each clock pump fired
+        self.pumps = 0
+        self.lag = 0.0  # Seconds the pumps have fallen behind real time in total
+        self._due = None  # When the next pump should fire, by self.clock
+
+    def wrap(self, name, func):
+        """func with every call timed into the histogram for name"""
+        histogram = self.histograms.setdefault(name, LatencyHistogram())
+        clock = self.clock
+
+        @functools.wraps(func)
+        def timed(*args, **kwargs):
+            start = clock()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                histogram.record(clock() - start)
+
+        timed.__wrapped__ = func
+        return timed
+
+    def install(self, namespace, names=CALLBACK_NAMES):
+        """Replace each named function in namespace (e.g. a module's globals()) with a timed one"""
+        for name in names:
+            func = namespace.get(name)
+            if func is not None and not hasattr(func, "__wrapped__"):
+                namespace[name] = self.wrap(name, func)
+
+    def uninstall(self, namespace):
+        for name, func in list(namespace.items()):
+            if name in self.histograms and hasattr(func, "__wrapped__"):
+                namespace[name] = func.__wrapped__
+
+    def scheduled(self, interval_ms):
+        """Call when the next clock pump is scheduled, interval_ms from now"""
+        self._due = self.clock() + interval_ms / 1000
+
+    def pump(self):
+        """Call at the start of every clock pump"""
+        if self._due is not None:
+            late = max(0.0, self.clock() - self._due)
+            self.drift.record(late)
+            self.lag += late
+            self._due = None
+        self.pumps += 1
+
+    def pause(self):
+        """Forget the scheduled pump so time spent paused is not counted as drift"""
+        self._due = None
+
+    def summary(self):
+        return {
+            "callbacks": {name: histogram.summary()
+                          for name, histogram in sorted(self.histograms.items()) if histogram.count},
+            "timer_drift": self.drift.summary(),
+            "clock_lag_ms": self.lag * 1000,
+        }
+
+    def report_lines(self):
+        """Short text table for the in-game overlay"""
+        lines = [f"{'callback':<25}{'n':>6}{'p50':>8}{'p95':>8}{'p99':>8}  ms"]
+        rows = self.summary()
+        for name, row in list(rows["callbacks"].items()) + [("timer drift", rows["timer_drift"])]:
+            lines.append(f"{name:<25}{row['count']:>6}{row['p50_ms']:>8.2f}{row['p95_ms']:>8.2f}"
+                         f"{row['p99_ms']:>8.2f}")
+        lines.append(f"clock behind real time: {rows['clock_lag_ms']:.0f} ms")
+        return lines
+
+    def dump(self, path):
+        """Write summary() to path as JSON"""
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.summary(), f, indent=2)
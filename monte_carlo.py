@@ -0,0 +1,159 @@
+"""Vectorized Monte Carlo shift runner
+
+Simulates many independent shifts at once with NumPy arrays instead of
+stepping each flight through the event engine. All shifts advance in lockstep
+one flight at a time; per-shift state (arrival time, lives, score and the time
+each gate next becomes free) lives in arrays, and gate choice is done with
+boolean occupancy masks per gate.
+
+The simulated player is first-fit: it reacts after reaction_ms, takes the
+first free gate of the right class, and if every such gate is occupied waits
+for the first one to free up before the countdown runs out.
+
+    python monte_carlo.py --shifts 100000 --difficulty hard
+"""
+import argparse
+import random
+import time
+from collections import namedtuple
+
+import numpy as np
+
+from policies import FirstFitPolicy, attach_policy
+from sim_engine import (COUNTDOWN_SECONDS, COUNTDOWN_TICK_MS, NARROWBODY_POINTS, NEXT_FLIGHT_DELAY_MS,
+                        SHIFT_END_MS, WIDEBODY_POINTS, ShiftEngine, shift_config)
+
+BATCH_SIZE = 65536  # Shifts simulated per chunk, bounds peak memory
+
+BatchResult = namedtuple("BatchResult", "won score lives_lost end_ms")
+
+
+def simulate_shifts(n_shifts, config=None, seed=None, reaction_ms=0, batch_size=BATCH_SIZE):
+    """Simulate n_shifts independent shifts and return per-shift result arrays"""
+    config = config if config is not None else shift_config()
+    rng = np.random.default_rng(seed)
+    parts = []
+    for start in range(0, n_shifts, batch_size):
+        count = min(batch_size, n_shifts - start)
+        parts.append(_simulate_batch(count, config, rng, reaction_ms))
+    if not parts:
+        parts.append(BatchResult(*(np.zeros(0, dtype) for dtype in (bool, np.int32, np.int32, np.int32))))
+    return BatchResult(*(np.concatenate(column) for column in zip(*parts)))
+
+
+def _simulate_batch(n, config, rng, reaction_ms):
+    n_narrowbody, n_widebody = config.n_narrowbody, config.n_widebody
+    # A flight times out on the countdown tick after the display reaches zero
+    window = (config.countdown_seconds + 1) * COUNTDOWN_TICK_MS
+    starting_lives = config.lives
+
+    # Gate-major layout: row g holds when gate g next becomes free in every
+    # shift, so each per-gate step is one contiguous vector operation
+    free_at = np.zeros((n_narrowbody + n_widebody, n), np.int32)
+    narrow, wide = free_at[:n_narrowbody], free_at[n_narrowbody:]
+    never = np.full(n, np.iinfo(np.int32).max, np.int32)
+    arrival = np.zeros(n, np.int32)  # When the current flight appeared
+    lives = np.full(n, starting_lives, np.int32)
+    score = np.zeros(n, np.int32)
+    end_ms = np.full(n, SHIFT_END_MS, np.int32)
+    active = np.ones(n, bool)
+
+    while active.any():
+        widebody = rng.random(n) < config.widebody_ratio
+
+        # Earliest time a gate of the flight's class is free
+        narrow_free = narrow.min(axis=0) if n_narrowbody else never
+        wide_free = wide.min(axis=0) if n_widebody else never
+        action = np.maximum(arrival + reaction_ms, np.where(widebody, wide_free, narrow_free))
+        timeout = arrival + window
+        assigned = action < timeout
+
+        # Shifts whose next event falls after 5 PM are complete
+        event = np.where(assigned, action, timeout)
+        active &= event < SHIFT_END_MS
+        take = active & assigned
+
+        # First-fit: lowest-numbered gate of the right class free at action time
+        leave = action + rng.integers(config.dwell_min_ms, config.dwell_max_ms + 1, n, dtype=np.int32)
+        for gates, pending in ((narrow, take & ~widebody), (wide, take & widebody)):
+            for gate in gates:
+                hit = pending & (gate <= action)
+                np.copyto(gate, leave, where=hit)
+                pending &= ~hit
+        score += np.where(take, np.where(widebody, WIDEBODY_POINTS, NARROWBODY_POINTS), 0).astype(np.int32)
+        arrival = event + NEXT_FLIGHT_DELAY_MS
+
+        # Timeouts cost a life; out of lives ends the shift at the timeout
+        missed = active & ~assigned
+        lives -= missed
+        dead = missed & (lives <= 0)
+        np.copyto(end_ms, timeout, where=dead)
+        active &= ~dead
+
+    return BatchResult(lives > 0, score, starting_lives - lives, end_ms)
+
+
+def run_engine_shifts(n_shifts, config=None, seed=None, reaction_ms=0):
+    """Event-by-event reference: run n_shifts through ShiftEngine one at a time"""
+    config = config if config is not None else shift_config()
+    rng = random.Random(seed)
+    results = []
+    for _ in range(n_shifts):
+        engine = ShiftEngine(rng=random.Random(rng.random()), config=config)
+        attach_policy(engine, FirstFitPolicy(), reaction_ms)
+        result = engine.run()
+        lost = config.lives - result.lives
+        results.append((result.won, result.score, lost, result.end_ms))
+    won, score, lives_lost, end_ms = (np.array(column, dtype) for column, dtype in
+                                      zip(zip(*results), (bool, np.int32, np.int32, np.int32)))
+    return BatchResult(won, score, lives_lost, end_ms)
+
+
+def summarize(result):
+    """Survival fraction and mean score, lives lost and end time"""
+    if result.won.size == 0:
+        return {"shifts": 0}
+    return {
+        "shifts": int(result.won.size),
+        "survival": float(result.won.mean()),
+        "mean_score": float(result.score.mean()),
+        "mean_lives_lost": float(result.lives_lost.mean()),
+        "mean_end_ms": float(result.end_ms.mean()),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Monte Carlo shift survival estimate")
+    parser.add_argument("--shifts", type=int, default=100000)
+    parser.add_argument("--difficulty", choices=sorted(COUNTDOWN_SECONDS), default="easy")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--reaction-ms", type=int, default=0)
+    parser.add_argument("--narrowbody-gates", type=int, default=None)
+    parser.add_argument("--widebody-gates", type=int, default=None)
+    parser.add_argument("--compare", type=int, default=0, metavar="N",
+                        help="also run N shifts through the event engine and compare throughput")
+    args = parser.parse_args()
+
+    config = shift_config(args.difficulty)
+    if args.narrowbody_gates is not None:
+        config = config._replace(n_narrowbody=args.narrowbody_gates)
+    if args.widebody_gates is not None:
+        config = config._replace(n_widebody=args.widebody_gates)
+
+    start = time.perf_counter()
+    result = simulate_shifts(args.shifts, config, args.seed, args.reaction_ms)
+    elapsed = time.perf_counter() - start
+    print(f"vectorized: {summarize(result)}")
+    print(f"  {args.shifts / elapsed:,.0f} shifts/s")
+
+    if args.compare:
+        start = time.perf_counter()
+        reference = run_engine_shifts(args.compare, config, args.seed, args.reaction_ms)
+        reference_elapsed = time.perf_counter() - start
+        print(f"engine:     {summarize(reference)}")
+        print(f"  {args.compare / reference_elapsed:,.0f} shifts/s")
+        print(f"speedup: {(args.shifts / elapsed) / (args.compare / reference_elapsed):.0f}x")
+
+
+if __name__ == "__main__":
+    main()
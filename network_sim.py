@@ -0,0 +1,325 @@
+"""Multi-airport network simulation with flights flowing between hubs
+
+Every airport code gets its own gate pools and event queue. A plane that
+departs one airport becomes an arrival at its destination after the route's
+block time, and then turns around there and flies on. Planes that find every
+gate of their class taken hold until one frees up.
+
+Airports are grouped into partitions that can run in separate processes.
+Partitions only talk through arrival messages, and since no flight is shorter
+than MIN_BLOCK_MINUTES, all partitions can safely run MIN_BLOCK_MINUTES ahead
+before swapping messages. Each airport has its own seeded random stream and
+sorts incoming messages, so results do not depend on the number of workers.
+
+    python network_sim.py --airports 48 --workers 4 --seed 1
+"""
+import argparse
+import multiprocessing
+import random
+import time
+import zlib
+from collections import deque, namedtuple
+
+from gate_pool import GatePool
+from sim_data import (NARROWBODY, WIDEBODY, Flight, airport_cities, domestic_destinations,
+                      gate_names, international_destinations, narrowbody_aircraft, widebody_aircraft)
+from sim_engine import EventQueue
+
+# Times are in minutes of the simulated day
+DAY_MINUTES = 24 * 60
+MIN_BLOCK_MINUTES = 60  # Shortest route, and so how far partitions may run ahead
+DOMESTIC_BLOCK_MINUTES = (60, 300)
+INTERNATIONAL_BLOCK_MINUTES = (420, 840)
+TURN_MINUTES = {NARROWBODY: (35, 70), WIDEBODY: (70, 150)}
+INITIAL_LOAD = 0.8  # Share of gates with a plane parked at midnight
+
+# Gates (narrowbody, widebody) by kind of airport
+HUB_GATES = (40, 12)
+SPOKE_GATES = (12, 3)
+INTERNATIONAL_GATES = (0, 8)
+HUBS = ("ATL", "MSP", "DTW", "SLC")
+
+AirportSpec = namedtuple("AirportSpec", "code n_narrowbody n_widebody international")
+AirportStats = namedtuple("AirportStats", "code arrivals departures held hold_minutes max_holding "
+                                          "utilization")
+# An arrival in flight between partitions; origin and seq make the order total
+Arrival = namedtuple("Arrival", "time origin seq flight")
+NetworkResult = namedtuple("NetworkResult", "airports movements airborne messages")
+
+
+def build_network(n_airports=len(airport_cities), scale=1):
+    """AirportSpecs for the first n_airports codes, hubs first
+
+    Beyond the game's 48 airports, extra domestic spokes are named X001,
+    X002, and so on. scale multiplies every gate count.
+    """
+    domestic = list(HUBS) + [code for code in domestic_destinations if code not in HUBS]
+    codes = [(code, False) for code in domestic]
+    codes += [(code, True) for code in international_destinations]
+    codes += [(f"X{index:03d}", False) for index in range(1, max(0, n_airports - len(codes)) + 1)]
+    specs = []
+    for code, international in codes[:n_airports]:
+        if international:
+            narrow, wide = INTERNATIONAL_GATES
+        else:
+            narrow, wide = HUB_GATES if code in HUBS else SPOKE_GATES
+        specs.append(AirportSpec(code, narrow * scale, wide * scale, international))
+    return specs
+
+
+def block_minutes(origin, destination, international):
+    """Stable block time for a route, the same in both directions"""
+    low, high = INTERNATIONAL_BLOCK_MINUTES if international else DOMESTIC_BLOCK_MINUTES
+    route = "-".join(sorted((origin, destination))).encode()
+    return low + zlib.crc32(route) % (high - low + 1)
+
+
+class Airport:
+    """One airport's gates, holding queues and clock"""
+
+    def __init__(self, spec, network, seed=0):
+        self.spec = spec
+        self.code = spec.code
+        self.rng = random.Random(f"{seed}/{spec.code}")
+        self.queue = EventQueue()
+        self.gates = GatePool({NARROWBODY: gate_names("A", spec.n_narrowbody),
+                               WIDEBODY: gate_names("B", spec.n_widebody)})
+        self.holding = {NARROWBODY: deque(), WIDEBODY: deque()}  # Planes waiting for a gate
+        self.outbox = []  # Arrivals sent to other airports since the last window
+        self.seq = 0
+
+        # Narrowbodies fly domestic routes only; widebodies go anywhere.
+        # Bigger airports attract more traffic.
+        self.routes = {NARROWBODY: [], WIDEBODY: []}
+        for other in network:
+            if other.code == self.code:
+                continue
+            weight = other.n_narrowbody + other.n_widebody
+            if other.n_widebody:
+                self.routes[WIDEBODY].append((other, weight))
+            if other.n_narrowbody and not (other.international or spec.international):
+                self.routes[NARROWBODY].append((other, weight))
+        self.route_weights = {gate_class: [weight for _, weight in routes]
+                              for gate_class, routes in self.routes.items()}
+
+        self.arrivals = 0
+        self.departures = 0
+        self.held = 0
+        self.hold_minutes = 0
+        self.max_holding = 0
+        self.busy_minutes = 0
+        self.parked_at = {}  # Gate -> when its plane parked
+
+    def populate(self, tail_base):
+        """Park planes at INITIAL_LOAD of the gates, leaving at staggered times"""
+        for index, gate in enumerate(self.gates.all_gates()):
+            if self.rng.random() >= INITIAL_LOAD:
+                continue
+            gate_class = self.gates.class_of(gate)
+            aircraft = narrowbody_aircraft if gate_class == NARROWBODY else widebody_aircraft
+            flight = Flight(f"DL{tail_base + index}", self.rng.choice(aircraft), self.code)
+            self.park(gate, flight, self.rng.randint(0, TURN_MINUTES[gate_class][1]))
+
+    def receive(self, arrival):
+        self.queue.schedule(arrival.time - self.queue.now, self.arrive, arrival.flight)
+
+    def run_until(self, until):
+        """Run local events up to until and return the arrivals sent elsewhere"""
+        self.queue.run_until(until)
+        outbox, self.outbox = self.outbox, []
+        return outbox
+
+    def arrive(self, flight):
+        self.arrivals += 1
+        gate_class = flight.aircraft_class
+        gate = self.gates.first_free(gate_class)
+        if gate is None:
+            holding = self.holding[gate_class]
+            holding.append((self.queue.now, flight))
+            self.held += 1
+            self.max_holding = max(self.max_holding, len(holding))
+            return
+        self.park(gate, flight, self.rng.randint(*TURN_MINUTES[gate_class]))
+
+    def park(self, gate, flight, turn_minutes):
+        self.gates.acquire(gate, flight)
+        self.parked_at[gate] = self.queue.now
+        self.queue.schedule(turn_minutes, self.depart_plane, gate)
+
+    def depart_plane(self, gate):
+        """Push back from gate and send the plane on to its next airport"""
+        flight = self.gates.release(gate)
+        now = self.queue.now
+        self.busy_minutes += now - self.parked_at.pop(gate)
+        self.departures += 1
+
+        gate_class = flight.aircraft_class
+        routes = self.routes[gate_class]
+        if routes:
+            destination = self.rng.choices(routes, weights=self.route_weights[gate_class])[0][0]
+            block = block_minutes(self.code, destination.code,
+                                  destination.international or self.spec.international)
+            self.seq += 1
+            self.outbox.append(Arrival(now + block, self.code, self.seq,
+                                       Flight(flight.flight, flight.aircraft, destination.code)))
+
+        holding = self.holding[gate_class]
+        if holding:
+            held_since, waiting = holding.popleft()
+            self.hold_minutes += now - held_since
+            self.park(gate, waiting, self.rng.randint(*TURN_MINUTES[gate_class]))
+
+    def stats(self, day_minutes):
+        now = self.queue.now
+        busy = self.busy_minutes + sum(now - parked for parked in self.parked_at.values())
+        hold = self.hold_minutes + sum(now - since for holding in self.holding.values()
+                                       for since, _ in holding)
+        capacity = len(self.gates) * day_minutes
+        return AirportStats(self.code, self.arrivals, self.departures, self.held, hold,
+                            self.max_holding, busy / capacity if capacity else 0.0)
+
+
+class Partition:
+    """The airports one worker runs"""
+
+    def __init__(self, specs, network, seed=0):
+        self.airports = {}
+        for spec in specs:
+            airport = Airport(spec, network, seed)
+            # Tail numbers come from the airport's place in the network, not the partition
+            airport.populate(1000 * (network.index(spec) + 1))
+            self.airports[spec.code] = airport
+
+    def run_window(self, until, inbound):
+        """Deliver inbound arrivals, run every airport to until, return outbound arrivals"""
+        for arrival in sorted(inbound):
+            self.airports[arrival.flight.destination].receive(arrival)
+        outbound = []
+        for airport in self.airports.values():
+            outbound.extend(airport.run_until(until))
+        return outbound
+
+    def stats(self, day_minutes):
+        return [airport.stats(day_minutes) for airport in self.airports.values()]
+
+
+def partition_network(network, workers):
+    """Split airports into workers groups of roughly equal gate count"""
+    groups = [[] for _ in range(max(1, min(workers, len(network))))]
+    loads = [0] * len(groups)
+    for spec in sorted(network, key=lambda spec: -(spec.n_narrowbody + spec.n_widebody)):
+        lightest = loads.index(min(loads))
+        groups[lightest].append(spec)
+        loads[lightest] += spec.n_narrowbody + spec.n_widebody
+    return groups
+
+
+def _worker(connection, specs, network, seed, day_minutes):
+    partition = Partition(specs, network, seed)
+    while True:
+        message = connection.recv()
+        if message is None:
+            connection.send(partition.stats(day_minutes))
+            break
+        until, inbound = message
+        connection.send(partition.run_window(until, inbound))
+    connection.close()
+
+
+def simulate_network(network=None, seed=0, workers=1, day_minutes=DAY_MINUTES):
+    """Simulate a day of traffic over network and return a NetworkResult
+
+    With workers > 1 the partitions run in separate processes; the result is
+    the same for any number of workers.
+    """
+    network = network if network is not None else build_network()
+    groups = partition_network(network, workers)
+    owner = {spec.code: index for index, group in enumerate(groups) for spec in group}
+
+    if len(groups) == 1:
+        partition = Partition(groups[0], network, seed)
+        connections = None
+    else:
+        connections = []
+        processes = []
+        for group in groups:
+            parent, child = multiprocessing.Pipe()
+            process = multiprocessing.Process(target=_worker,
+                                              args=(child, group, network, seed, day_minutes))
+            process.start()
+            child.close()
+            connections.append(parent)
+            processes.append(process)
+
+    pending = []  # Arrivals not yet delivered, in flight past the current window
+    messages = 0
+    now = 0
+    try:
+        while now < day_minutes:
+            until = min(now + MIN_BLOCK_MINUTES, day_minutes)
+            inbound = [[] for _ in groups]
+            later = []
+            for arrival in pending:
+                if arrival.time <= until:
+                    inbound[owner[arrival.flight.destination]].append(arrival)
+                else:
+                    later.append(arrival)
+            if connections is None:
+                outbound = partition.run_window(until, inbound[0])
+            else:
+                for connection, batch in zip(connections, inbound):
+                    connection.send((until, batch))
+                outbound = [arrival for connection in connections for arrival in connection.recv()]
+            messages += len(outbound)
+            pending = later + outbound
+            now = until
+
+        if connections is None:
+            stats = partition.stats(day_minutes)
+        else:
+            stats = []
+            for connection in connections:
+                connection.send(None)
+                stats.extend(connection.recv())
+    finally:
+        if connections is not None:
+            for connection in connections:
+                connection.close()
+            for process in processes:
+                process.join()
+
+    order = {spec.code: index for index, spec in enumerate(network)}
+    stats.sort(key=lambda row: order[row.code])
+    movements = sum(row.arrivals + row.departures for row in stats)
+    return NetworkResult(stats, movements, len(pending), messages)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulate a day of flights across an airport network")
+    parser.add_argument("--airports", type=int, default=len(airport_cities))
+    parser.add_argument("--scale", type=int, default=1, help="multiply every airport's gate count")
+    parser.add_argument("--workers", type=int, default=1, help="processes to spread airports over")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--hours", type=int, default=24)
+    parser.add_argument("--top", type=int, default=10, help="airports to list, busiest first")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    result = simulate_network(build_network(args.airports, args.scale), args.seed,
+                              args.workers, args.hours * 60)
+    elapsed = time.perf_counter() - start
+
+    print(f"{'airport':<9}{'arrivals':>10}{'departures':>12}{'held':>7}{'avg hold':>10}"
+          f"{'max queue':>11}{'util':>8}")
+    busiest = sorted(result.airports, key=lambda row: -(row.arrivals + row.departures))
+    for row in busiest[:args.top]:
+        average_hold = row.hold_minutes / row.held if row.held else 0.0
+        print(f"{row.code:<9}{row.arrivals:>10}{row.departures:>12}{row.held:>7}"
+              f"{average_hold:>10.1f}{row.max_holding:>11}{row.utilization:>8.1%}")
+    print(f"{len(result.airports)} airports, {result.movements:,} movements, "
+          f"{result.messages:,} inter-airport flights, {result.airborne} airborne at the end")
+    print(f"{elapsed:.2f}s with {args.workers} worker(s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""Automatic gate-assignment policies
+
+A policy stands in for the player clicking a gate button. attach_policy()
+hooks one to a ShiftEngine: when a flight arrives (after an optional reaction
+delay) the policy is asked for a gate, and while it chooses to wait it is
+asked again every time a plane departs.
+"""
+import random
+
+
+class GatePolicy:
+    """Picks a gate for the engine's current flight, or None to wait"""
+
+    name = "policy"
+
+    def attach(self, engine):
+        """Called once when the policy is hooked to an engine"""
+
+    def choose(self, engine, flight):
+        raise NotImplementedError
+
+
+class FirstFitPolicy(GatePolicy):
+    """Lowest-numbered free gate the flight can use"""
+
+    name = "first-fit"
+
+    def choose(self, engine, flight):
+        return engine.first_free_gate(flight)
+
+
+class RandomPolicy(GatePolicy):
+    """Any free gate the flight can use, uniformly at random"""
+
+    name = "random"
+
+    def __init__(self, seed=None):
+        self.rng = random.Random(seed)
+
+    def choose(self, engine, flight):
+        free = list(engine.free_gates(flight))
+        return self.rng.choice(free) if free else None
+
+
+class MostRecentPolicy(GatePolicy):
+    """Free gate the flight can use that was vacated most recently
+
+    Traffic keeps cycling through the same few gates and long-idle gates are
+    left alone. Dwell times are not known ahead, so this is a recency rule,
+    not best-fit by dwell.
+    """
+
+    name = "most-recent"
+
+    def attach(self, engine):
+        self.engine = engine
+        self.freed_at = {}  # Gate -> when it last became free
+        engine.subscribe(self.on_event)
+
+    def on_event(self, kind, fields):
+        if kind == "departed":
+            self.freed_at[fields['gate']] = self.engine.now
+
+    def choose(self, engine, flight):
+        best = None
+        for gate in engine.free_gates(flight):
+            freed = self.freed_at.get(gate, 0)
+            if best is None or freed > best[0]:
+                best = (freed, gate)
+        return best[1] if best else None
+
+
+class LookaheadPolicy(GatePolicy):
+    """Free gate that leaves the most room for the aircraft still to come
+
+    On a compiled gate layout it takes the smallest gate the aircraft fits,
+    and of those the one whose neighbours it would close the least. On the
+    game's class-based gates every fitting gate is alike, so it plays as
+    first-fit. When nothing fits it waits: a wrong gate costs the same life
+    as a timeout and brings the next flight in before any gate has freed.
+    """
+
+    name = "lookahead"
+
+    def choose(self, engine, flight):
+        compat = engine.compat
+        if compat is None:
+            return engine.first_free_gate(flight)
+        best = None
+        for gate in engine.free_gates(flight):
+            cost = compat.park_cost(gate, flight.aircraft_id)
+            if best is None or cost < best[0]:
+                best = (cost, gate)
+        return best[1] if best else None
+
+
+POLICIES = {policy.name: policy for policy in
+            (FirstFitPolicy, MostRecentPolicy, RandomPolicy, LookaheadPolicy)}
+
+
+def make_policy(name, seed=None):
+    """Build a policy by name; seed only matters for randomized policies"""
+    policy_class = POLICIES[name]
+    return policy_class(seed) if policy_class is RandomPolicy else policy_class()
+
+
+def attach_policy(engine, policy, reaction_ms=0, on_decision=None):
+    """Let policy play engine in place of the gate buttons
+
+    on_decision(flight, gate) is called after every choose() that returns a
+    gate, for callers that count or time decisions.
+    """
+    # Attached mid-shift (say to a restored snapshot), the flight already
+    # waiting counts as seen
+    state = {"ready": engine.current_flight is not None}
+    policy.attach(engine)
+
+    def decide():
+        flight = engine.current_flight
+        if flight is None or not state["ready"]:
+            return
+        gate = policy.choose(engine, flight)
+        if gate is not None:
+            if on_decision:
+                on_decision(flight, gate)
+            engine.assign_gate(gate)
+
+    def react(flight):
+        if engine.current_flight is flight:
+            state["ready"] = True
+            decide()
+
+    def listener(kind, fields):
+        if kind == "flight":
+            state["ready"] = False
+            if reaction_ms:
+                engine.queue.schedule(reaction_ms, react, fields['flight'])
+            else:
+                react(fields['flight'])
+        elif kind == "departed":
+            decide()
+
+    engine.subscribe(listener)
+    return listener
@@ -0,0 +1,123 @@
+"""Benchmark harness comparing gate-assignment policies
+
+Every policy plays the same seeded shifts: flight n of shift k is identical
+for all policies, so differences in the results come from the decisions
+alone. Reports mean score, survival, timeouts, wrong gates, gate utilization
+and decisions per second of wall time.
+
+On the game's class-based gates every free gate of the right class is as
+good as any other, so policies can only differ in when they wait. On a
+generated hub (--hub-gates) size codes and adjacency rules make the choice
+of gate matter.
+
+    python policy_bench.py --shifts 500 --difficulty hard --reaction-ms 700
+    python policy_bench.py --shifts 500 --difficulty hard --hub-gates 16
+"""
+import argparse
+import random
+import time
+
+from flight_stream import FlightGenerator
+from policies import POLICIES, attach_policy, make_policy
+from sim_engine import ShiftEngine, shift_config
+
+
+class ShiftStats:
+    """Engine listener that counts outcomes and gate busy time"""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.assigned = 0
+        self.timeouts = 0
+        self.wrong_gates = 0
+        self.busy_ms = 0
+        self._parked_at = {}  # Gate -> when its current plane arrived
+        engine.subscribe(self.on_event)
+
+    def on_event(self, kind, fields):
+        if kind == "assigned":
+            self.assigned += 1
+            self._parked_at[fields['gate']] = self.engine.now
+        elif kind == "departed":
+            self.busy_ms += self.engine.now - self._parked_at.pop(fields['gate'])
+        elif kind == "timeout":
+            self.timeouts += 1
+        elif kind == "wrong_gate":
+            self.wrong_gates += 1
+
+    def utilization(self):
+        """Share of gate-time occupied over the shift so far"""
+        now = self.engine.now
+        busy = self.busy_ms + sum(now - parked for parked in self._parked_at.values())
+        capacity = len(self.engine.gates) * now
+        return busy / capacity if capacity else 0.0
+
+
+def run_policy(name, shifts=100, config=None, seed=0, reaction_ms=0, layout=None):
+    """Play shifts seeded shifts with one policy and return summary metrics"""
+    config = config if config is not None else shift_config()
+    totals = {"score": 0, "won": 0, "timeouts": 0, "wrong_gates": 0, "utilization": 0.0}
+    decisions = 0
+    elapsed = 0.0
+    for shift in range(shifts):
+        shift_seed = seed * 1000003 + shift
+        engine = ShiftEngine(rng=random.Random(~shift_seed), config=config,
+                             flights=FlightGenerator(shift_seed, config.widebody_ratio), layout=layout)
+        stats = ShiftStats(engine)
+        counter = []
+        attach_policy(engine, make_policy(name, shift_seed), reaction_ms,
+                      on_decision=lambda flight, gate: counter.append(gate))
+        start = time.perf_counter()
+        result = engine.run()
+        elapsed += time.perf_counter() - start
+        decisions += len(counter)
+        totals["score"] += result.score
+        totals["won"] += result.won
+        totals["timeouts"] += stats.timeouts
+        totals["wrong_gates"] += stats.wrong_gates
+        totals["utilization"] += stats.utilization()
+    return {
+        "policy": name,
+        "mean_score": totals["score"] / shifts,
+        "survival": totals["won"] / shifts,
+        "timeouts": totals["timeouts"] / shifts,
+        "wrong_gates": totals["wrong_gates"] / shifts,
+        "utilization": totals["utilization"] / shifts,
+        "decisions_per_s": decisions / elapsed if elapsed else 0.0,
+    }
+
+
+def run_benchmark(policies=None, shifts=100, config=None, seed=0, reaction_ms=0, layout=None):
+    """run_policy() for every named policy (all of them by default)"""
+    return [run_policy(name, shifts, config, seed, reaction_ms, layout) for name in (policies or POLICIES)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare gate-assignment policies on seeded shifts")
+    parser.add_argument("--policies", default=",".join(POLICIES),
+                        help=f"comma list from: {', '.join(POLICIES)}")
+    parser.add_argument("--shifts", type=int, default=100)
+    parser.add_argument("--difficulty", choices=["easy", "hard"], default="easy")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--reaction-ms", type=int, default=0)
+    parser.add_argument("--hub-gates", type=int, default=None, metavar="N",
+                        help="play on a generated N-gate hub with size codes and adjacency rules")
+    args = parser.parse_args()
+
+    layout = None
+    if args.hub_gates is not None:
+        from gate_compat import hub_layout
+
+        layout = hub_layout(args.hub_gates, args.seed)
+    rows = run_benchmark(args.policies.split(","), args.shifts, shift_config(args.difficulty),
+                         args.seed, args.reaction_ms, layout)
+    print(f"{'policy':<12}{'score':>9}{'survival':>10}{'timeouts':>10}{'wrong':>8}"
+          f"{'util':>8}{'decisions/s':>14}")
+    for row in rows:
+        print(f"{row['policy']:<12}{row['mean_score']:>9.1f}{row['survival']:>10.1%}"
+              f"{row['timeouts']:>10.2f}{row['wrong_gates']:>8.2f}{row['utilization']:>8.1%}"
+              f"{row['decisions_per_s']:>14,.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,294 @@
+"""Score history and leaderboard in an embedded SQLite database
+
+ScoreStore keeps every finished shift with its per-flight outcomes. Writes
+never block the caller: record() only queues the shift, and one background
+thread commits whatever has queued up in a single transaction. Each query
+opens its own connection, and the database runs in WAL mode, so the
+leaderboard can be read from any thread while the writer is committing.
+Top-N and per-player queries walk an index rather than the table, so they
+answer in milliseconds with millions of shifts stored.
+
+ShiftStats is an engine listener that times each decision and records the
+shift to a store when it ends. Shifts abandoned before game over are not
+scored, and a resumed shift has stats for the flights since it resumed.
+
+    store = ScoreStore("scores.db")
+    ShiftStats(engine, store, player="rowan")
+    engine.run()
+    store.top_scores("hard", 10)
+    store.close()
+
+    python score_store.py scores.db --fill 1000000  # time queries on a big table
+"""
+import argparse
+import getpass
+import os
+import queue
+import random
+import sqlite3
+import threading
+import time
+from collections import namedtuple
+from contextlib import closing
+from datetime import datetime
+
+BATCH_SIZE = 500  # Most shifts committed in one transaction
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS shifts (
+    id INTEGER PRIMARY KEY,
+    player TEXT NOT NULL,
+    difficulty TEXT NOT NULL,
+    score INTEGER NOT NULL,
+    lives INTEGER NOT NULL,
+    won INTEGER NOT NULL,
+    end_ms INTEGER NOT NULL,
+    finished TEXT NOT NULL,
+    assigned INTEGER NOT NULL,
+    wrong_gates INTEGER NOT NULL,
+    timeouts INTEGER NOT NULL,
+    mean_decision_ms REAL
+);
+CREATE TABLE IF NOT EXISTS flights (
+    shift_id INTEGER NOT NULL REFERENCES shifts(id),
+    number TEXT NOT NULL,
+    aircraft TEXT NOT NULL,
+    gate TEXT,
+    outcome TEXT NOT NULL,
+    decision_ms INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS shifts_by_score ON shifts (score DESC, id);
+CREATE INDEX IF NOT EXISTS shifts_by_difficulty ON shifts (difficulty, score DESC, id);
+CREATE INDEX IF NOT EXISTS shifts_by_player ON shifts (player, id DESC);
+CREATE INDEX IF NOT EXISTS player_scores ON shifts (player, difficulty, score, won);
+CREATE INDEX IF NOT EXISTS flights_by_shift ON flights (shift_id);
+"""
+SHIFT_FIELDS = ("player", "difficulty", "score", "lives", "won", "end_ms", "finished", "assigned",
+                "wrong_gates", "timeouts", "mean_decision_ms")
+SHIFT_COLUMNS = "id, " + ", ".join(SHIFT_FIELDS)
+INSERT_SHIFT = f"INSERT INTO shifts ({', '.join(SHIFT_FIELDS)}) VALUES ({', '.join('?' * len(SHIFT_FIELDS))})"
+OUTCOMES = ("assigned", "wrong_gate", "timeout")
+# Errors that drop a shift instead of stopping the writer: database
+# trouble such as a locked or full disk, or a malformed ShiftRecord
+WRITE_ERRORS = (sqlite3.Error, ValueError, TypeError, KeyError, AttributeError)
+
+# gate is None for a timeout
+FlightStat = namedtuple("FlightStat", "number aircraft gate outcome decision_ms")
+ShiftRecord = namedtuple("ShiftRecord", "player difficulty score lives won end_ms finished flights")
+ScoreRow = namedtuple("ScoreRow", ("id",) + SHIFT_FIELDS)
+PlayerSummary = namedtuple("PlayerSummary", "player shifts wins best mean_score")
+
+
+def default_player():
+    """The logged-in user's name, or "player" if there is none"""
+    try:
+        return getpass.getuser()
+    except (KeyError, OSError):
+        return "player"
+
+
+def _shift_row(shift):
+    counts = {outcome: 0 for outcome in OUTCOMES}
+    for stat in shift.flights:
+        counts[stat.outcome] += 1
+    decisions = [stat.decision_ms for stat in shift.flights if stat.outcome != "timeout"]
+    mean_decision_ms = sum(decisions) / len(decisions) if decisions else None
+    return (shift.player, shift.difficulty, shift.score, shift.lives, int(shift.won), shift.end_ms,
+            shift.finished, counts["assigned"], counts["wrong_gate"], counts["timeout"], mean_decision_ms)
+
+
+class ScoreStore:
+    """Finished shifts in SQLite, written in batches by a background thread"""
+
+    def __init__(self, path, batch_size=BATCH_SIZE):
+        self.path = path
+        self.batch_size = batch_size
+        with closing(self._connect()) as db:
+            db.execute("PRAGMA journal_mode=WAL")
+            db.executescript(SCHEMA)
+        self.queue = queue.Queue()
+        self.closed = False
+        self.dropped = 0  # Shifts that could not be written
+        self.last_error = None
+        self.writer = threading.Thread(target=self._write_loop, name="score-writer", daemon=True)
+        self.writer.start()
+
+    def _connect(self):
+        db = sqlite3.connect(self.path, timeout=10)
+        db.execute("PRAGMA synchronous=NORMAL")  # Safe with WAL; a crash loses at most the last batch
+        return db
+
+    def record(self, shift):
+        """Queue a ShiftRecord to be written; returns at once"""
+        if self.closed:
+            raise ValueError("score store is closed")
+        self.queue.put(shift)
+
+    def _write_loop(self):
+        with closing(self._connect()) as db:
+            while True:
+                shift = self.queue.get()
+                batch = [shift]
+                while shift is not None and len(batch) < self.batch_size:
+                    try:
+                        shift = self.queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    batch.append(shift)
+                shifts = [shift for shift in batch if shift is not None]
+                try:
+                    if shifts:
+                        self._write_batch(db, shifts)
+                finally:
+                    for _ in batch:
+                        self.queue.task_done()
+                if len(shifts) < len(batch):
+                    return  # Closed
+
+    def _write_batch(self, db, shifts):
+        # A failed transaction is rolled back whole, so retry its shifts one
+        # at a time and drop only those that fail again
+        try:
+            self._write(db, shifts)
+            return
+        except WRITE_ERRORS as error:
+            if len(shifts) == 1:
+                self.dropped += 1
+                self.last_error = error
+                return
+        for shift in shifts:
+            self._write_batch(db, [shift])
+
+    def _write(self, db, shifts):
+        with db:
+            for shift in shifts:
+                shift_id = db.execute(INSERT_SHIFT, _shift_row(shift)).lastrowid
+                db.executemany("INSERT INTO flights VALUES (?, ?, ?, ?, ?, ?)",
+                               [(shift_id, *stat) for stat in shift.flights])
+
+    def flush(self):
+        """Wait until every queued shift is committed or dropped"""
+        self.queue.join()
+
+    def close(self):
+        """Commit what is queued and stop the writer; safe to call more than once"""
+        if not self.closed:
+            self.closed = True
+            self.queue.put(None)
+            self.writer.join()
+
+    def _query(self, sql, params=()):
+        with closing(self._connect()) as db:
+            return db.execute(sql, params).fetchall()
+
+    def top_scores(self, difficulty=None, limit=10):
+        """Best shifts as ScoreRows, of one difficulty or all, highest score first"""
+        if difficulty is None:
+            rows = self._query(f"SELECT {SHIFT_COLUMNS} FROM shifts ORDER BY score DESC, id LIMIT ?", (limit,))
+        else:
+            rows = self._query(f"SELECT {SHIFT_COLUMNS} FROM shifts WHERE difficulty = ? "
+                               "ORDER BY score DESC, id LIMIT ?", (difficulty, limit))
+        return [ScoreRow(*row) for row in rows]
+
+    def player_history(self, player, limit=20):
+        """A player's latest shifts as ScoreRows, newest first"""
+        rows = self._query(f"SELECT {SHIFT_COLUMNS} FROM shifts WHERE player = ? ORDER BY id DESC LIMIT ?",
+                           (player, limit))
+        return [ScoreRow(*row) for row in rows]
+
+    def player_summary(self, player, difficulty=None):
+        """Shifts played, wins, best and mean score of a player, or None if they have none"""
+        sql = "SELECT COUNT(*), SUM(won), MAX(score), AVG(score) FROM shifts WHERE player = ?"
+        params = (player,)
+        if difficulty is not None:
+            sql += " AND difficulty = ?"
+            params += (difficulty,)
+        shifts, wins, best, mean_score = self._query(sql, params)[0]
+        return PlayerSummary(player, shifts, wins, best, mean_score) if shifts else None
+
+    def shift_flights(self, shift_id):
+        """FlightStats of one shift in the order they were decided"""
+        rows = self._query("SELECT number, aircraft, gate, outcome, decision_ms FROM flights "
+                           "WHERE shift_id = ? ORDER BY rowid", (shift_id,))
+        return [FlightStat(*row) for row in rows]
+
+
+class ShiftStats:
+    """Engine listener that records the shift's outcome to a ScoreStore at game over"""
+
+    def __init__(self, engine, store, player):
+        self.engine = engine
+        self.store = store
+        self.player = player
+        self.flights = []
+        self.shown_at = engine.now if engine.current_flight is not None else None
+        engine.subscribe(self.on_event)
+
+    def on_event(self, kind, fields):
+        engine = self.engine
+        if kind == "flight":
+            self.shown_at = engine.now
+        elif kind in OUTCOMES:
+            flight = fields["flight"]
+            shown_at = self.shown_at if self.shown_at is not None else engine.now
+            self.flights.append(FlightStat(flight.flight, flight.aircraft, fields.get("gate"), kind,
+                                           engine.now - shown_at))
+            self.shown_at = None
+        elif kind == "game_over":
+            engine.unsubscribe(self.on_event)
+            self.store.record(ShiftRecord(self.player, engine.difficulty, engine.score, engine.lives,
+                                          engine.won, engine.now, datetime.now().isoformat(timespec="seconds"),
+                                          tuple(self.flights)))
+
+
+def fill(store, n_shifts, players=200, seed=0):
+    """Write n_shifts synthetic shifts without per-flight rows, straight to the database"""
+    rng = random.Random(seed)
+    names = [f"trainee{number:03d}" for number in range(players)]
+    finished = datetime.now().isoformat(timespec="seconds")
+    with closing(store._connect()) as db:
+        for start in range(0, n_shifts, 100_000):
+            rows = []
+            for _ in range(min(100_000, n_shifts - start)):
+                won = rng.random() < 0.6
+                rows.append((rng.choice(names), rng.choice(("easy", "hard")), rng.randrange(0, 1200, 10),
+                             rng.randint(1, 5) if won else 0, int(won), rng.randrange(20_000, 80_000),
+                             finished, rng.randrange(20, 90), rng.randrange(5), rng.randrange(5),
+                             rng.uniform(300, 2500)))
+            with db:
+                db.executemany(INSERT_SHIFT, rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Show the leaderboard and time its queries")
+    parser.add_argument("database")
+    parser.add_argument("--fill", type=int, default=0, metavar="N", help="first add N synthetic shifts")
+    parser.add_argument("--difficulty", choices=["easy", "hard"], default=None)
+    parser.add_argument("--player", default=None, help="also show this player's summary and history")
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    store = ScoreStore(args.database)
+    if args.fill:
+        start = time.perf_counter()
+        fill(store, args.fill)
+        print(f"added {args.fill:,} shifts in {time.perf_counter() - start:.1f} s "
+              f"({os.path.getsize(args.database) / 1e6:.0f} MB)")
+
+    start = time.perf_counter()
+    top = store.top_scores(args.difficulty, args.top)
+    print(f"top {args.top} ({(time.perf_counter() - start) * 1000:.1f} ms):")
+    for rank, row in enumerate(top, 1):
+        print(f"  {rank:>3}. {row.player:<16} {row.score:>6}  {row.difficulty:<5} {row.finished}")
+    player = args.player or (top[0].player if top else None)
+    if player is not None:
+        start = time.perf_counter()
+        summary = store.player_summary(player, args.difficulty)
+        history = store.player_history(player, 5)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        print(f"{player} ({elapsed_ms:.1f} ms): {summary.shifts} shifts, {summary.wins} won, "
+              f"best {summary.best}, mean {summary.mean_score:.0f}, latest {[row.score for row in history]}")
+    store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,281 @@
+"""Shift event logs: buffered recording and fast, verified replay
+
+A ShiftRecorder appends every engine event to a JSON-lines log, one short
+line per event after a header with the difficulty, config and seed. The
+player's inputs are not stored separately: every "assigned", "wrong_gate",
+"hint", "pause" and "resume" event is the direct result of one engine call,
+so replay re-issues that call at the same virtual time and after the same
+number of earlier events. Every event the replayed engine emits is checked
+against the log, and the first mismatch is reported, so an old log doubles
+as a regression test for engine changes.
+
+    python shift_log.py --record-policy first-fit --seed 7 shift.jsonl
+    python shift_log.py shift.jsonl  # replay headlessly and verify
+"""
+import argparse
+import gzip
+import json
+import time
+from collections import namedtuple
+from datetime import datetime
+
+from sim_data import Flight
+from sim_engine import ShiftConfig, ShiftEngine
+
+LOG_VERSION = 1
+BUFFER_SIZE = 64 * 1024  # Bytes of log kept in memory between writes
+INPUT_EVENTS = frozenset(["assigned", "wrong_gate", "hint", "pause", "resume"])
+END_MARK = "end"  # Last line of a log whose shift was abandoned before game over
+
+LogRecord = namedtuple("LogRecord", "time kind fields line")
+Divergence = namedtuple("Divergence", "index expected actual")
+ReplayResult = namedtuple("ReplayResult", "result events divergence")
+
+
+def _encode_value(value):
+    if isinstance(value, Flight):
+        return [value.flight, value.aircraft, value.destination]
+    raise TypeError(f"cannot log {type(value).__name__}")
+
+
+def encode_event(when, kind, fields):
+    """One log line (without newline) for an engine event"""
+    return json.dumps([when, kind, fields], separators=(",", ":"), sort_keys=True,
+                      ensure_ascii=False, default=_encode_value)
+
+
+def _open(path, mode):
+    if path.endswith(".gz"):
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    return open(path, mode, encoding="utf-8", buffering=BUFFER_SIZE)
+
+
+class ShiftRecorder:
+    """Engine listener that writes every event to a log file"""
+
+    def __init__(self, engine, path):
+        if engine.seed is None:
+            raise ValueError("only engines built from a seed can be recorded")
+        if engine.arrivals is not None:
+            raise ValueError("shifts driven by an arrival process cannot be recorded")
+        if engine.turnaround is not None:
+            raise ValueError("shifts with a turnaround model cannot be recorded")
+        if engine.layout is not None:
+            raise ValueError("shifts on a compiled gate layout cannot be recorded")
+        self.engine = engine
+        self.path = path
+        self.file = _open(path, "w")
+        header = {
+            "version": LOG_VERSION,
+            "difficulty": engine.difficulty,
+            "seed": engine.seed,
+            "config": engine.config._asdict(),
+            # Stream flights are read back from the log; random ones come from the seed
+            "flights": "random" if engine.flights is None else "stream",
+            "recorded": datetime.now().isoformat(timespec="seconds"),
+        }
+        self.file.write(json.dumps(header, separators=(",", ":")) + "\n")
+        engine.subscribe(self.on_event)
+
+    def on_event(self, kind, fields):
+        self.file.write(encode_event(self.engine.now, kind, fields) + "\n")
+        if kind == "game_over":
+            self.close()
+
+    def close(self):
+        """Flush the log and stop recording; safe to call more than once"""
+        if self.file is None:
+            return
+        self.engine.unsubscribe(self.on_event)
+        if not self.engine.game_over:
+            # Shift abandoned: note how far it ran so replay stops at the same time
+            self.file.write(encode_event(self.engine.now, END_MARK, {}) + "\n")
+        self.file.close()
+        self.file = None
+
+
+def read_log(path):
+    """The header dict and list of LogRecords of a shift log
+
+    The header's "end_time" is when recording stopped if the shift was
+    abandoned, otherwise None.
+    """
+    with _open(path, "r") as f:
+        header = json.loads(f.readline())
+        if header.get("version") != LOG_VERSION:
+            raise ValueError(f"{path}: unsupported log version {header.get('version')}")
+        header["end_time"] = None
+        records = []
+        for line in f:
+            line = line.rstrip("\n")
+            if line:
+                when, kind, fields = json.loads(line)
+                if kind == END_MARK:
+                    header["end_time"] = when
+                else:
+                    records.append(LogRecord(when, kind, fields, line))
+    return header, records
+
+
+def engine_from_log(header, records):
+    """A fresh engine set up exactly like the one that was recorded"""
+    flights = None
+    if header["flights"] == "stream":
+        flights = (Flight(*record.fields["flight"]) for record in records if record.kind == "flight")
+    return ShiftEngine(header["difficulty"], config=ShiftConfig(**header["config"]),
+                       flights=flights, seed=header["seed"])
+
+
+class ShiftReplayer:
+    """Feeds a log's player inputs back into an engine and checks its events
+
+    Subscribe any other listeners (such as the UI) before creating the
+    replayer, so they see each event before the next input is applied.
+    """
+
+    def __init__(self, engine, records, end_time=None):
+        self.engine = engine
+        self.records = records
+        self._end_time = end_time
+        # (events before it, time, record) for every event a player input caused
+        self.inputs = [(index, record.time, record) for index, record in enumerate(records)
+                       if record.kind in INPUT_EVENTS]
+        self.pending = 0  # Index of the next input to apply
+        self.count = 0  # Events emitted so far
+        self.divergence = None
+        engine.subscribe(self.on_event)
+
+    @property
+    def end_time(self):
+        """Virtual time the recorded shift stopped at"""
+        if self._end_time is not None:
+            return self._end_time
+        return self.records[-1].time if self.records else 0
+
+    @property
+    def finished(self):
+        return self.engine.game_over or (self.pending == len(self.inputs)
+                                         and self.engine.now >= self.end_time)
+
+    def start(self):
+        self.engine.start()
+
+    def on_event(self, kind, fields):
+        index = self.count
+        self.count += 1
+        if self.divergence is None:
+            actual = encode_event(self.engine.now, kind, fields)
+            expected = self.records[index].line if index < len(self.records) else None
+            if actual != expected:
+                self.divergence = Divergence(index, expected, actual)
+        self._apply_due()
+
+    def _apply_due(self):
+        # Inputs made from inside a listener, right after the event before them
+        while self.pending < len(self.inputs):
+            after, when, _ = self.inputs[self.pending]
+            if after != self.count or when != self.engine.now:
+                break
+            self._apply()
+
+    def _apply(self):
+        _, _, record = self.inputs[self.pending]
+        self.pending += 1
+        engine = self.engine
+        if record.kind in ("assigned", "wrong_gate"):
+            engine.assign_gate(record.fields["gate"])
+        elif record.kind == "hint":
+            engine.use_hint()
+        else:
+            engine.set_paused(record.kind == "pause")
+
+    def advance(self, ms):
+        """Advance virtual time by ms, applying recorded inputs as they come due"""
+        engine = self.engine
+        queue = engine.queue
+        target = queue.now + ms
+        while self.pending < len(self.inputs) and not engine.game_over:
+            after, when, _ = self.inputs[self.pending]
+            if when > target:
+                break
+            pending = self.pending
+            if queue.now < when:
+                # Run everything strictly before the input; an input made between
+                # clock pumps comes before any event due at its own millisecond
+                queue.run_until(when - 1)
+                if self.pending == pending and self.count == after:
+                    queue.now = when
+                    self._apply()
+            if self.pending == pending:
+                queue.run_until(when)
+            if self.pending == pending:
+                # The engine no longer behaves as recorded; apply it anyway
+                if self.divergence is None:
+                    self.divergence = Divergence(self.count, self.records[after].line, None)
+                self._apply()
+        if not engine.game_over and not engine.paused:
+            queue.run_until(target)
+
+    def run(self):
+        """Replay the whole log as fast as possible"""
+        self.start()
+        self.advance(max(0, self.end_time - self.engine.now))
+        if self.divergence is None and self.count < len(self.records):
+            self.divergence = Divergence(self.count, self.records[self.count].line, None)
+        return ReplayResult(self.engine.result(), self.count, self.divergence)
+
+
+def replay(path):
+    """Replay a log headlessly and return a ReplayResult"""
+    header, records = read_log(path)
+    return ShiftReplayer(engine_from_log(header, records), records, header["end_time"]).run()
+
+
+def record_policy_shift(path, policy_name="first-fit", difficulty="easy", seed=None, reaction_ms=0):
+    """Let a policy play one shift and record it to path"""
+    from policies import attach_policy, make_policy
+
+    engine = ShiftEngine(difficulty, seed=seed)
+    recorder = ShiftRecorder(engine, path)
+    attach_policy(engine, make_policy(policy_name, seed), reaction_ms)
+    result = engine.run()
+    recorder.close()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay and verify recorded shift logs")
+    parser.add_argument("logs", nargs="+", metavar="LOG")
+    parser.add_argument("--record-policy", metavar="POLICY",
+                        help="first record a shift played by this policy to LOG")
+    parser.add_argument("--difficulty", choices=["easy", "hard"], default="easy")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--reaction-ms", type=int, default=700)
+    args = parser.parse_args()
+
+    if args.record_policy:
+        if len(args.logs) != 1:
+            parser.error("--record-policy takes a single LOG")
+        result = record_policy_shift(args.logs[0], args.record_policy, args.difficulty, args.seed,
+                                     args.reaction_ms)
+        print(f"recorded: {result}")
+
+    diverged = 0
+    for path in args.logs:
+        start = time.perf_counter()
+        replayed = replay(path)
+        elapsed = time.perf_counter() - start
+        print(f"{path}: {replayed.result}")
+        print(f"  {replayed.events} events in {elapsed * 1000:.1f} ms")
+        if replayed.divergence is None:
+            print("  matches the log")
+        else:
+            diverged += 1
+            index, expected, actual = replayed.divergence
+            print(f"  diverges at event {index}:\n    logged:   {expected}\n    replayed: {actual}")
+    if diverged:
+        raise SystemExit(f"{diverged} of {len(args.logs)} logs diverged")
+
+
+if __name__ == "__main__":
+    main()
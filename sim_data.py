@@ -0,0 +1,182 @@
+"""Aircraft, gate and destination data shared by the game and the headless engine"""
+import random
+
+narrowbody_aircraft = ["A220", "B737", "B757", "E175", "CRJ900", "B717", "A321"]
+widebody_aircraft = ["B777", "B787", "A350", "A330", "B767", "A380"]
+narrowbody_gates = ["A1", "A2", "A3", "A4", "A5", "A6", "A7", "A8"]
+widebody_gates = ["B1", "B2", "B3", "B4", "B5"]
+all_gates = narrowbody_gates + widebody_gates
+
+# Size classes; each gate serves exactly one
+NARROWBODY = "narrowbody"
+WIDEBODY = "widebody"
+gate_classes = {gate: NARROWBODY for gate in narrowbody_gates}
+gate_classes.update((gate, WIDEBODY) for gate in widebody_gates)
+
+# ICAO aerodrome reference code (wingspan) of each aircraft type; a gate
+# rated for a code takes every aircraft of that code or smaller
+SIZE_CODES = "CDEF"
+aircraft_size_codes = {
+    "A220": "C", "B737": "C", "E175": "C", "CRJ900": "C", "B717": "C", "A321": "C", "B757": "D",
+    "B767": "D", "B777": "E", "B787": "E", "A350": "E", "A330": "E", "A380": "F",
+}
+
+# Domestic destinations (narrowbody aircraft only)
+domestic_destinations = [
+    "ATL", "MSP", "DTW", "SLC", "LAX", "JFK", "BOS", "SEA",
+    "DEN", "ORD", "MIA", "MCO", "LAS", "PHX", "SFO", "DCA",
+    "PDX", "SAN", "TPA", "AUS", "RDU", "CLT", "PHL", "BWI"
+]
+
+# International destinations (widebody aircraft only)
+international_destinations = [
+    "LHR", "CDG", "AMS", "FCO", "BCN", "MAD", "FRA", "MUC",
+    "HND", "ICN", "PVG", "HKG", "SYD", "MEL", "GRU", "EZE",
+    "SCL", "CPH", "NCE", "BER", "ARN", "LIS", "DUB", "ZRH"
+]
+
+# Share of incoming flights that are widebody
+WIDEBODY_RATIO = 0.40
+
+# Airport code to city name mapping
+airport_cities = {
+    # Domestic
+    "ATL": "Atlanta", "MSP": "Minneapolis", "DTW": "Detroit", "SLC": "Salt Lake City",
+    "LAX": "Los Angeles", "JFK": "New York", "BOS": "Boston", "SEA": "Seattle",
+    "DEN": "Denver", "ORD": "Chicago", "MIA": "Miami", "MCO": "Orlando",
+    "LAS": "Las Vegas", "PHX": "Phoenix", "SFO": "San Francisco", "DCA": "Washington DC",
+    "PDX": "Portland", "SAN": "San Diego", "TPA": "Tampa", "AUS": "Austin",
+    "RDU": "Raleigh", "CLT": "Charlotte", "PHL": "Philadelphia", "BWI": "Baltimore",
+    # International
+    "LHR": "London", "CDG": "Paris", "AMS": "Amsterdam", "FCO": "Rome",
+    "BCN": "Barcelona", "MAD": "Madrid", "FRA": "Frankfurt", "MUC": "Munich",
+    "HND": "Tokyo", "ICN": "Seoul", "PVG": "Shanghai", "HKG": "Hong Kong",
+    "SYD": "Sydney", "MEL": "Melbourne", "GRU": "São Paulo", "EZE": "Buenos Aires",
+    "SCL": "Santiago", "CPH": "Copenhagen", "NCE": "Nice", "BER": "Berlin",
+    "ARN": "Stockholm", "LIS": "Lisbon", "DUB": "Dublin", "ZRH": "Zurich"
+}
+
+def gate_names(terminal, count):
+    """Gate names for a terminal, e.g. gate_names("A", 3) -> ["A1", "A2", "A3"]"""
+    return [f"{terminal}{number}" for number in range(1, count + 1)]
+
+class CodeTable:
+    """Interns short string codes as small integers"""
+
+    def __init__(self, codes=()):
+        self.codes = []  # Id -> code
+        self.ids = {}  # Code -> id
+        for code in codes:
+            self.intern(code)
+
+    def __len__(self):
+        return len(self.codes)
+
+    def intern(self, code):
+        code_id = self.ids.get(code)
+        if code_id is None:
+            code_id = len(self.codes)
+            self.codes.append(code)
+            self.ids[code] = code_id
+        return code_id
+
+
+flight_numbers = CodeTable(f"DL{number}" for number in range(100, 1000))
+aircraft_types = CodeTable(narrowbody_aircraft + widebody_aircraft)
+destination_codes = CodeTable(airport_cities)
+_widebody_types = frozenset(widebody_aircraft)
+# Size class of each interned aircraft type, indexed by aircraft id
+aircraft_type_classes = [WIDEBODY if code in _widebody_types else NARROWBODY
+                         for code in aircraft_types.codes]
+
+
+class Flight:
+    """Compact flight record: three interned codes, no per-flight dict
+
+    Flight number, aircraft type and destination are stored as indexes into
+    the shared code tables, so a record costs one small slotted object. A
+    flight number outside the table (from a timetable file, say) is kept as
+    its string rather than interned, so the table never grows.
+    """
+
+    __slots__ = ("number_id", "aircraft_id", "destination_id")
+
+    def __init__(self, flight, aircraft, destination):
+        self.number_id = flight_numbers.ids.get(flight, flight)
+        self.aircraft_id = aircraft_types.intern(aircraft)
+        self.destination_id = destination_codes.intern(destination)
+
+    @classmethod
+    def from_ids(cls, number_id, aircraft_id, destination_id):
+        flight = cls.__new__(cls)
+        flight.number_id = number_id
+        flight.aircraft_id = aircraft_id
+        flight.destination_id = destination_id
+        return flight
+
+    @property
+    def flight(self):
+        number_id = self.number_id
+        return number_id if type(number_id) is str else flight_numbers.codes[number_id]
+
+    @property
+    def aircraft(self):
+        return aircraft_types.codes[self.aircraft_id]
+
+    @property
+    def destination(self):
+        return destination_codes.codes[self.destination_id]
+
+    @property
+    def aircraft_class(self):
+        aircraft_id = self.aircraft_id
+        if aircraft_id < len(aircraft_type_classes):
+            return aircraft_type_classes[aircraft_id]
+        return aircraft_class(self.aircraft)
+
+    def as_dict(self):
+        return {"flight": self.flight, "aircraft": self.aircraft, "destination": self.destination}
+
+    def __eq__(self, other):
+        if not isinstance(other, Flight):
+            return NotImplemented
+        return (self.number_id == other.number_id and self.aircraft_id == other.aircraft_id
+                and self.destination_id == other.destination_id)
+
+    def __hash__(self):
+        return hash((self.number_id, self.aircraft_id, self.destination_id))
+
+    def __reduce__(self):
+        # Pickle by code so records survive processes with different tables
+        return (Flight, (self.flight, self.aircraft, self.destination))
+
+    def __repr__(self):
+        return f"Flight({self.flight!r}, {self.aircraft!r}, {self.destination!r})"
+
+
+def is_widebody(aircraft):
+    return aircraft in _widebody_types
+
+def aircraft_class(aircraft):
+    return WIDEBODY if is_widebody(aircraft) else NARROWBODY
+
+def can_use_gate(aircraft, gate):
+    return gate_classes.get(gate) == aircraft_class(aircraft)
+
+def generate_flight(rng=random, widebody_ratio=WIDEBODY_RATIO):
+    flight_num = "DL" + str(rng.randint(100, 999))
+
+    # Randomly decide if this is a widebody flight (60% narrowbody, 40% widebody)
+    # Ratio closer to gate availability: 8 narrowbody gates, 5 widebody gates
+    use_widebody = rng.random() < widebody_ratio
+
+    if use_widebody:
+        aircraft = rng.choice(widebody_aircraft)
+        # Widebody only international
+        destination = rng.choice(international_destinations)
+    else:
+        aircraft = rng.choice(narrowbody_aircraft)
+        # Narrowbody only domestic
+        destination = rng.choice(domestic_destinations)
+
+    return Flight(flight_num, aircraft, destination)
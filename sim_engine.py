@@ -0,0 +1,461 @@
+"""Headless discrete-event engine for an 8-hour gate shift
+
+All game rules run here on a virtual millisecond clock driven by a priority
+queue, so a shift can be replayed as fast as the CPU allows and without a
+display. The tkinter game subscribes to engine events and only draws.
+"""
+import heapq
+import itertools
+import random
+from collections import deque, namedtuple
+
+from gate_compat import CompatibilityIndex, gates_by_class
+from gate_pool import GatePool
+from sim_data import (NARROWBODY, WIDEBODY, WIDEBODY_RATIO, aircraft_class, aircraft_types, gate_names,
+                      generate_flight, narrowbody_gates, widebody_gates)
+
+# Timings in virtual milliseconds, matching the original root.after delays
+CLOCK_TICK_MS = 833  # One game clock tick
+CLOCK_STEP_MINUTES = 5  # Game minutes per tick (12 ticks = 1 game hour)
+SHIFT_START_HOUR = 9  # 9 AM
+SHIFT_MINUTES = 8 * 60  # 9 AM - 5 PM
+COUNTDOWN_TICK_MS = 1000
+NEXT_FLIGHT_DELAY_MS = 1000
+# The shift ends on the clock tick that reaches 5 PM (the first tick fires at 0 ms)
+SHIFT_END_MS = (SHIFT_MINUTES // CLOCK_STEP_MINUTES - 1) * CLOCK_TICK_MS
+DWELL_MIN_MS = 5000
+DWELL_MAX_MS = 20000
+
+COUNTDOWN_SECONDS = {"easy": 5, "hard": 3}
+STARTING_LIVES = {"easy": 5, "hard": 3}
+NARROWBODY_POINTS = 10
+WIDEBODY_POINTS = 20
+
+ShiftResult = namedtuple("ShiftResult", "won score lives end_ms")
+
+# Tunable shift parameters; shift_config() gives the game's defaults
+ShiftConfig = namedtuple("ShiftConfig", "n_narrowbody n_widebody widebody_ratio dwell_min_ms "
+                                        "dwell_max_ms countdown_seconds lives")
+
+
+def shift_config(difficulty="easy", **overrides):
+    """The game's ShiftConfig for a difficulty, with any fields overridden"""
+    config = ShiftConfig(len(narrowbody_gates), len(widebody_gates), WIDEBODY_RATIO,
+                         DWELL_MIN_MS, DWELL_MAX_MS, COUNTDOWN_SECONDS[difficulty],
+                         STARTING_LIVES[difficulty])
+    return config._replace(**overrides)
+
+
+class EventQueue:
+    """Priority queue of timed callbacks on a virtual clock"""
+
+    def __init__(self):
+        self.now = 0
+        self._heap = []
+        self._seq = itertools.count()
+        self._live = 0  # Scheduled entries not yet fired or cancelled
+
+    def __len__(self):
+        return self._live
+
+    def schedule(self, delay, callback, *args):
+        """Run callback(*args) delay ms from now; returns a handle for cancel()"""
+        entry = [self.now + delay, next(self._seq), callback, args]
+        heapq.heappush(self._heap, entry)
+        self._live += 1
+        return entry
+
+    def cancel(self, entry):
+        # Lazy deletion: the entry stays in the heap but is skipped when popped
+        if entry is not None and entry[2] is not None:
+            entry[2] = None
+            self._live -= 1
+
+    def clear(self):
+        # Also stops a run_until in progress, leaving the clock where it was
+        self._heap = []
+        self._live = 0
+
+    def time_of(self, entry):
+        """When a scheduled entry will fire, or None if it was cancelled"""
+        if entry is None or entry[2] is None:
+            return None
+        return entry[0]
+
+    def next_time(self):
+        """Time of the next live event, or None if nothing is pending"""
+        heap = self._heap
+        while heap and heap[0][2] is None:
+            heapq.heappop(heap)
+        return heap[0][0] if heap else None
+
+    def pending(self):
+        """(time, callback, args) of every live entry, in firing order"""
+        return [(when, callback, args) for when, _, callback, args in sorted(self._heap)
+                if callback is not None]
+
+    def run_until(self, until):
+        """Fire every event due at or before until, then move the clock there"""
+        heap = started = self._heap
+        while heap and heap[0][0] <= until:
+            entry = heapq.heappop(heap)
+            when, _, callback, args = entry
+            if callback is None:
+                continue
+            entry[2] = None  # Fired: a late cancel() must not touch the count
+            self._live -= 1
+            self.now = when
+            callback(*args)
+            heap = self._heap  # clear() may have replaced it
+        if until > self.now and heap is started:
+            self.now = until
+
+    def step(self):
+        """Fire the next live event; returns False when the queue is empty"""
+        when = self.next_time()
+        if when is None:
+            return False
+        self.run_until(when)
+        return True
+
+
+class ShiftEngine:
+    """One shift of gate assignments, independent of any UI"""
+
+    def __init__(self, difficulty="easy", rng=None, config=None, flights=None, seed=None,
+                 arrivals=None, handoff_ms=NEXT_FLIGHT_DELAY_MS, turnaround=None, layout=None):
+        self.difficulty = difficulty
+        self.config = config if config is not None else shift_config(difficulty)
+        # Without an explicit rng the seed is kept so the shift can be replayed
+        self.seed = None
+        if rng is None:
+            self.seed = seed if seed is not None else random.randrange(2 ** 63)
+            rng = random.Random(self.seed)
+        self.rng = rng
+        # Optional iterator of Flight records; random flights from rng otherwise
+        self.flights = iter(flights) if flights is not None else None
+        # Optional ArrivalProcess: flights then arrive on its schedule and wait
+        # in a queue, instead of each one coming handoff_ms after the last
+        self.arrivals = arrivals
+        self.handoff_ms = handoff_ms
+        # Optional TurnaroundModel: planes then leave once their turn is done,
+        # sharing crews, fuel trucks and tugs, instead of after a random dwell
+        self.turnaround = turnaround
+        self.arrival_seed = rng.getrandbits(64) if arrivals is not None else None
+        # Optional (gates, rules) layout from gate_compat, compiled once here.
+        # It replaces the config's gate counts, and its size codes, swing gates
+        # and adjacency rules then decide which gates a flight may use
+        self.layout = layout
+        self.compat = None
+        if layout is not None:
+            self.compat = CompatibilityIndex(*layout)
+            self.gates = GatePool(gates_by_class(layout[0]))
+        else:
+            self.gates = GatePool({NARROWBODY: gate_names("A", self.config.n_narrowbody),
+                                   WIDEBODY: gate_names("B", self.config.n_widebody)})
+        self.listeners = []
+        self.reset()
+
+    def reset(self):
+        """Put the shift back to 9 AM with a fresh event queue"""
+        self.queue = EventQueue()
+        if self.turnaround is not None:
+            self.turnaround.reset(self.queue)
+        self.score = 0
+        self.lives = self.config.lives
+        self.gates.clear()
+        if self.compat is not None:
+            self.compat.clear()
+        self.departure_timers = {}
+        self.turns = {}  # Gate -> Turn in progress, with a turnaround model
+        self.current_flight = None
+        self.countdown_remaining = 0
+        self.flight_deadline = None
+        self.hint_used = False
+        self.game_minutes = 0
+        self.game_over = False
+        self.won = False
+        self.paused = False
+        self.started = False
+        self.clock_timer = None
+        self.assignment_timer = None
+        self.handoff_timer = None
+        self.pending = deque()  # Flights that have arrived but not been shown yet
+        self.arrivals_drawn = 0  # Times taken from arrival_times so far
+        self.arrival_times = (iter(self.arrivals.times(random.Random(self.arrival_seed)))
+                              if self.arrivals is not None else None)
+
+    @property
+    def now(self):
+        return self.queue.now
+
+    @property
+    def occupied_gates(self):
+        return self.gates.occupied
+
+    def can_use_gate(self, aircraft, gate):
+        """Whether gate suits aircraft, occupied or not; with a layout its neighbours count too"""
+        if self.compat is not None:
+            return gate in self.gates and bool(
+                self.compat.allowed(aircraft_types.intern(aircraft)) >> self.compat.position[gate] & 1)
+        return self.gates.class_of(gate) == aircraft_class(aircraft)
+
+    def free_gates(self, flight):
+        """Free gates flight may use now, in first-fit order"""
+        if self.compat is not None:
+            return self.compat.gates_in(self.compat.available(flight.aircraft_id))
+        return self.gates.free_gates(flight.aircraft_class)
+
+    def first_free_gate(self, flight):
+        """First free gate flight may use now, or None"""
+        if self.compat is not None:
+            return self.compat.first_available(flight.aircraft_id)
+        return self.gates.first_free(flight.aircraft_class)
+
+    def suitable_gates(self, flight):
+        """Every gate flight could ever use, occupied or not, in first-fit order"""
+        if self.compat is not None:
+            return list(self.compat.gates_in(self.compat.compatible(flight.aircraft_id)))
+        return self.gates.gates[flight.aircraft_class]
+
+    def departure_time(self, gate):
+        """When the plane at gate is scheduled to leave, or None
+
+        With a turnaround model this is the turn's scheduled off-block time;
+        a turn held up waiting for crews, trucks or tugs leaves later.
+        """
+        if self.turnaround is not None:
+            turn = self.turns.get(gate)
+            return turn.due if turn is not None else None
+        return self.queue.time_of(self.departure_timers.get(gate))
+
+    def subscribe(self, listener):
+        """Register listener(kind, fields) to be called for every engine event"""
+        self.listeners.append(listener)
+
+    def unsubscribe(self, listener):
+        self.listeners.remove(listener)
+
+    def emit(self, kind, **fields):
+        # A copy, since listeners may unsubscribe themselves (as recorders do at game over)
+        for listener in tuple(self.listeners):
+            listener(kind, fields)
+
+    # --- Running the clock ---
+
+    def start(self):
+        """Start the game clock and bring in the first flight"""
+        if self.started:
+            return
+        self.started = True
+        self.update_game_time()
+        if self.arrivals is not None:
+            self.schedule_arrival()
+        else:
+            self.next_flight()
+
+    def advance(self, ms):
+        """Advance the virtual clock by ms, firing everything that comes due"""
+        if not self.paused and not self.game_over:
+            self.queue.run_until(self.queue.now + ms)
+
+    def run(self):
+        """Run the shift to completion as fast as possible"""
+        self.start()
+        while not self.game_over and not self.paused and self.queue.step():
+            pass
+        return self.result()
+
+    def result(self):
+        return ShiftResult(self.won, self.score, self.lives, self.queue.now)
+
+    def set_paused(self, paused):
+        """Freeze or resume virtual time; pending timers keep their remaining time"""
+        if self.game_over or paused == self.paused:
+            return
+        self.paused = paused
+        self.emit("pause" if paused else "resume")
+
+    # --- Game rules ---
+
+    def update_game_time(self):
+        if self.game_over:
+            return
+
+        # Advance time by 5 minutes per tick
+        self.game_minutes += CLOCK_STEP_MINUTES
+
+        # Check if shift is over (5pm)
+        if self.game_minutes >= SHIFT_MINUTES:
+            self.end_game(True)
+            return
+
+        self.emit("clock", minutes=self.game_minutes)
+        self.clock_timer = self.queue.schedule(CLOCK_TICK_MS, self.update_game_time)
+
+    def draw_flight(self):
+        """The next flight from the stream, a random one, or None if the stream ran out"""
+        if self.flights is not None:
+            return next(self.flights, None)
+        return generate_flight(self.rng, self.config.widebody_ratio)
+
+    def schedule_arrival(self):
+        when = next(self.arrival_times, None)
+        if when is None:
+            return  # The process has no more arrivals
+        self.arrivals_drawn += 1
+        if when < SHIFT_END_MS:
+            self.queue.schedule(max(0, when - self.now), self.flight_arrives)
+
+    def flight_arrives(self):
+        if self.game_over:
+            return
+        flight = self.draw_flight()
+        if flight is None:
+            # Timetable exhausted: no more arrivals
+            return
+        self.pending.append(flight)
+        self.emit("arrival", flight=flight, queued=len(self.pending))
+        self.schedule_arrival()
+        if self.current_flight is None and self.handoff_timer is None:
+            self.next_flight()
+
+    def schedule_next_flight(self):
+        self.handoff_timer = self.queue.schedule(self.handoff_ms, self.hand_off)
+
+    def hand_off(self):
+        self.handoff_timer = None
+        self.next_flight()
+
+    def next_flight(self):
+        if self.game_over:
+            return
+
+        self.hint_used = False
+        if self.arrivals is not None:
+            if not self.pending:
+                # Nobody waiting: the next arrival is shown as soon as it lands
+                return
+            flight = self.pending.popleft()
+        else:
+            flight = self.draw_flight()
+            if flight is None:
+                # Timetable exhausted: the clock runs out the shift
+                return
+        self.current_flight = flight
+
+        # Countdown is armed before listeners hear about the flight, so a
+        # listener may assign a gate straight from the "flight" event
+        self.queue.cancel(self.assignment_timer)
+        self.countdown_remaining = self.config.countdown_seconds
+        self.assignment_timer = self.queue.schedule(COUNTDOWN_TICK_MS, self.update_countdown)
+        # The countdown times out one tick after it shows zero
+        self.flight_deadline = self.now + (self.countdown_remaining + 1) * COUNTDOWN_TICK_MS
+
+        self.emit("flight", flight=flight)
+        if self.current_flight is flight:
+            self.emit("countdown", remaining=self.countdown_remaining)
+
+    def update_countdown(self):
+        if self.game_over:
+            return
+
+        if self.countdown_remaining > 0:
+            self.emit("countdown", remaining=self.countdown_remaining)
+            self.countdown_remaining -= 1
+            self.assignment_timer = self.queue.schedule(COUNTDOWN_TICK_MS, self.update_countdown)
+        else:
+            self.assignment_timeout()
+
+    def assignment_timeout(self):
+        self.assignment_timer = None
+        flight = self.current_flight
+        self.current_flight = None
+
+        # Lose a life for timeout
+        self.lives -= 1
+        self.emit("timeout", flight=flight, lives=self.lives)
+
+        if self.lives <= 0:
+            self.end_game(False)
+            return
+
+        self.schedule_next_flight()
+
+    def assign_gate(self, gate):
+        """Assign the current flight to gate; returns False if nothing was assigned"""
+        if self.game_over or self.paused or self.current_flight is None:
+            return False
+        if not self.gates.is_free(gate):
+            return False
+
+        # Cancel the countdown timer
+        self.queue.cancel(self.assignment_timer)
+        self.assignment_timer = None
+        flight = self.current_flight
+        self.current_flight = None
+
+        if self.compat is not None:
+            fits = self.compat.can_park(gate, flight.aircraft_id)
+        else:
+            fits = self.gates.class_of(gate) == flight.aircraft_class
+        if not fits:
+            # Lose a life for wrong gate
+            self.lives -= 1
+            self.emit("wrong_gate", gate=gate, flight=flight, lives=self.lives)
+
+            if self.lives <= 0:
+                self.end_game(False)
+                return True
+
+            self.schedule_next_flight()
+            return True
+
+        self.gates.acquire(gate, flight)
+        if self.compat is not None:
+            self.compat.park(gate, flight.aircraft_id)
+
+        # Award points based on aircraft type
+        points = WIDEBODY_POINTS if flight.aircraft_class == WIDEBODY else NARROWBODY_POINTS
+        self.score += points
+        self.emit("assigned", gate=gate, flight=flight, points=points, score=self.score)
+
+        self.schedule_departure(gate)
+        self.schedule_next_flight()
+        return True
+
+    def schedule_departure(self, gate):
+        if self.turnaround is not None:
+            self.turns[gate] = self.turnaround.start(self.gates.flight_at(gate), self.depart_plane, gate)
+            return
+        departure_time = self.rng.randint(self.config.dwell_min_ms, self.config.dwell_max_ms)
+        self.departure_timers[gate] = self.queue.schedule(departure_time, self.depart_plane, gate)
+
+    def depart_plane(self, gate):
+        if self.game_over:
+            return
+
+        self.departure_timers.pop(gate, None)
+        self.turns.pop(gate, None)
+        flight = self.gates.release(gate)
+        if self.compat is not None:
+            self.compat.leave(gate)
+        if flight is not None:
+            self.emit("departed", gate=gate, flight=flight)
+
+    def use_hint(self):
+        """Mark the hint as used for the current flight and return it, or None"""
+        if self.game_over or self.paused or self.current_flight is None:
+            return None
+        if self.difficulty == "hard" or self.hint_used:
+            return None
+        self.hint_used = True
+        self.emit("hint", flight=self.current_flight)
+        return self.current_flight
+
+    def end_game(self, is_win):
+        self.game_over = True
+        self.won = is_win
+        self.current_flight = None
+        self.queue.clear()
+        self.emit("game_over", won=is_win, score=self.score)
@@ -0,0 +1,191 @@
+"""Engine snapshots: save, resume and fork a shift mid-play
+
+capture() copies everything a ShiftEngine needs to carry on (clock, score,
+lives, parked planes, current and queued flights, random and flight stream
+state) and every engine timer still pending, as the time left on it. A
+snapshot is plain immutable data shared by whatever is restored from it, so
+fork() costs one capture and one restore with no serialization, and any
+number of what-if engines can start from the same snapshot. Every restored
+engine carries on exactly as the original would have.
+
+Listeners are not part of a snapshot: subscribe the UI, a policy or a
+recorder to the restored engine. Timers that listeners put on the engine's
+queue themselves, such as a policy's reaction delay, are not kept.
+
+    snap = capture(engine)
+    what_ifs = [restore(snap) for _ in range(100)]
+    save(snap, "autosave.json")
+    engine = restore(load("autosave.json"))
+"""
+import gzip
+import json
+import os
+import random
+from collections import deque, namedtuple
+
+from arrivals import ARRIVAL_MODELS
+from flight_stream import FlightGenerator
+from sim_data import Flight
+from sim_engine import ShiftConfig, ShiftEngine
+
+SNAPSHOT_VERSION = 1
+# Engine attribute holding the handle of each single-instance timer
+TIMER_HANDLES = {"update_game_time": "clock_timer", "update_countdown": "assignment_timer",
+                 "hand_off": "handoff_timer"}
+TIMER_CALLBACKS = frozenset(TIMER_HANDLES) | {"depart_plane", "flight_arrives"}
+# Engine attributes copied as they are
+STATE_FIELDS = ("score", "lives", "countdown_remaining", "flight_deadline", "hint_used", "game_minutes",
+                "game_over", "won", "paused", "started")
+
+Snapshot = namedtuple("Snapshot", "difficulty config seed handoff_ms arrivals arrival_seed arrivals_drawn "
+                                  "now state rng_state stream parked current_flight pending timers")
+
+
+def capture(engine):
+    """Snapshot of engine's state; the engine itself is not touched"""
+    stream = None
+    if isinstance(engine.flights, FlightGenerator):
+        generator = engine.flights
+        stream = (generator.seed, generator.widebody_ratio, generator.rng.getstate(),
+                  tuple(generator._buffer))
+    elif engine.flights is not None:
+        raise ValueError(f"a {type(engine.flights).__name__} flight stream cannot be snapshotted")
+    if engine.turnaround is not None:
+        raise ValueError("shifts with a turnaround model cannot be snapshotted")
+    if engine.layout is not None:
+        raise ValueError("shifts on a compiled gate layout cannot be snapshotted")
+    now = engine.now
+    timers = tuple((callback.__name__, when - now, args) for when, callback, args in engine.queue.pending()
+                   if getattr(callback, "__self__", None) is engine and callback.__name__ in TIMER_CALLBACKS)
+    return Snapshot(
+        engine.difficulty, engine.config, engine.seed, engine.handoff_ms, engine.arrivals,
+        engine.arrival_seed, engine.arrivals_drawn, now,
+        tuple(getattr(engine, name) for name in STATE_FIELDS), engine.rng.getstate(), stream,
+        tuple(engine.gates.occupied.items()), engine.current_flight, tuple(engine.pending), timers)
+
+
+def restore(snapshot):
+    """A new engine in the state the snapshot was taken in"""
+    engine = ShiftEngine(snapshot.difficulty, rng=random.Random(), config=snapshot.config,
+                         arrivals=snapshot.arrivals, handoff_ms=snapshot.handoff_ms)
+    engine.seed = snapshot.seed
+    engine.arrival_seed = snapshot.arrival_seed
+    engine.reset()
+    engine.rng.setstate(snapshot.rng_state)
+    if snapshot.stream is not None:
+        seed, widebody_ratio, rng_state, buffered = snapshot.stream
+        generator = FlightGenerator(seed, widebody_ratio)
+        generator.rng.setstate(rng_state)
+        generator._buffer.extend(buffered)
+        engine.flights = generator
+    # Snapshots from before draws were counted exactly may count one past the end
+    for _ in range(snapshot.arrivals_drawn):
+        if next(engine.arrival_times, None) is None:
+            break
+    engine.arrivals_drawn = snapshot.arrivals_drawn
+
+    for name, value in zip(STATE_FIELDS, snapshot.state):
+        setattr(engine, name, value)
+    for gate, flight in snapshot.parked:
+        engine.gates.acquire(gate, flight)
+    engine.current_flight = snapshot.current_flight
+    engine.pending = deque(snapshot.pending)
+
+    queue = engine.queue
+    queue.now = snapshot.now
+    # Rescheduled in firing order, so timers due together still fire in order
+    for name, remaining, args in snapshot.timers:
+        handle = queue.schedule(remaining, getattr(engine, name), *args)
+        if name == "depart_plane":
+            engine.departure_timers[args[0]] = handle
+        elif name in TIMER_HANDLES:
+            setattr(engine, TIMER_HANDLES[name], handle)
+    return engine
+
+
+def fork(engine):
+    """An independent copy of engine that carries on from the same moment"""
+    return restore(capture(engine))
+
+
+def _encode_flight(flight):
+    return None if flight is None else [flight.flight, flight.aircraft, flight.destination]
+
+
+def _decode_flight(fields):
+    return None if fields is None else Flight(*fields)
+
+
+def _decode_rng_state(state):
+    version, internal, gauss_next = state
+    return version, tuple(internal), gauss_next
+
+
+def to_dict(snapshot):
+    """JSON-ready form of a snapshot"""
+    arrivals = None
+    if snapshot.arrivals is not None:
+        arrivals = {"model": snapshot.arrivals.name, "state": vars(snapshot.arrivals)}
+    stream = None
+    if snapshot.stream is not None:
+        seed, widebody_ratio, rng_state, buffered = snapshot.stream
+        stream = [seed, widebody_ratio, rng_state, [_encode_flight(flight) for flight in buffered]]
+    return {
+        "version": SNAPSHOT_VERSION,
+        "difficulty": snapshot.difficulty,
+        "config": snapshot.config._asdict(),
+        "seed": snapshot.seed,
+        "handoff_ms": snapshot.handoff_ms,
+        "arrivals": arrivals,
+        "arrival_seed": snapshot.arrival_seed,
+        "arrivals_drawn": snapshot.arrivals_drawn,
+        "now": snapshot.now,
+        "state": dict(zip(STATE_FIELDS, snapshot.state)),
+        "rng_state": snapshot.rng_state,
+        "stream": stream,
+        "parked": [[gate, _encode_flight(flight)] for gate, flight in snapshot.parked],
+        "current_flight": _encode_flight(snapshot.current_flight),
+        "pending": [_encode_flight(flight) for flight in snapshot.pending],
+        "timers": [[name, remaining, list(args)] for name, remaining, args in snapshot.timers],
+    }
+
+
+def from_dict(data):
+    if data.get("version") != SNAPSHOT_VERSION:
+        raise ValueError(f"unsupported snapshot version {data.get('version')}")
+    arrivals = None
+    if data["arrivals"] is not None:
+        model = ARRIVAL_MODELS[data["arrivals"]["model"]]
+        arrivals = model.__new__(model)
+        vars(arrivals).update(data["arrivals"]["state"])
+    stream = None
+    if data["stream"] is not None:
+        seed, widebody_ratio, rng_state, buffered = data["stream"]
+        stream = (seed, widebody_ratio, _decode_rng_state(rng_state),
+                  tuple(_decode_flight(fields) for fields in buffered))
+    return Snapshot(
+        data["difficulty"], ShiftConfig(**data["config"]), data["seed"], data["handoff_ms"], arrivals,
+        data["arrival_seed"], data["arrivals_drawn"], data["now"],
+        tuple(data["state"][name] for name in STATE_FIELDS), _decode_rng_state(data["rng_state"]), stream,
+        tuple((gate, _decode_flight(fields)) for gate, fields in data["parked"]),
+        _decode_flight(data["current_flight"]), tuple(_decode_flight(fields) for fields in data["pending"]),
+        tuple((name, remaining, tuple(args)) for name, remaining, args in data["timers"]))
+
+
+def _open(path, mode, gzipped):
+    if gzipped:
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+
+def save(snapshot, path):
+    """Write snapshot to path (gzipped if it ends in .gz), replacing it atomically"""
+    temp_path = f"{path}.tmp"
+    with _open(temp_path, "w", path.endswith(".gz")) as f:
+        json.dump(to_dict(snapshot), f, separators=(",", ":"))
+    os.replace(temp_path, path)
+
+
+def load(path):
+    with _open(path, "r", path.endswith(".gz")) as f:
+        return from_dict(json.load(f))
@@ -0,0 +1,169 @@
+"""Parameter sweeps over gate layout, widebody ratio, dwell times and difficulty
+
+Every cell of the grid is a ShiftConfig simulated with the vectorized Monte
+Carlo runner. Cells are fanned out over a process pool and each result row is
+appended to a CSV file as soon as its cell finishes. Re-running the same
+command resumes: cells already in the output file are skipped.
+
+    python sweep.py --out sweep.csv --narrowbody-gates 4:12 --widebody-gates 2:8 \\
+        --widebody-ratio 0.3,0.4,0.5 --countdown 3,5 --shifts 2000
+"""
+import argparse
+import csv
+import itertools
+import multiprocessing
+import os
+
+import numpy as np
+
+from monte_carlo import simulate_shifts, summarize
+from sim_engine import ShiftConfig, shift_config
+
+RESULT_FIELDS = ["survival", "mean_score", "mean_lives_lost", "mean_end_ms"]
+CSV_FIELDS = list(ShiftConfig._fields) + ["shifts", "seed"] + RESULT_FIELDS
+
+# Command-line option for each ShiftConfig field and how to parse its values
+SWEEP_OPTIONS = {
+    "n_narrowbody": ("--narrowbody-gates", int),
+    "n_widebody": ("--widebody-gates", int),
+    "widebody_ratio": ("--widebody-ratio", float),
+    "dwell_min_ms": ("--dwell-min-ms", int),
+    "dwell_max_ms": ("--dwell-max-ms", int),
+    "countdown_seconds": ("--countdown", int),
+    "lives": ("--lives", int),
+}
+
+
+def parse_values(spec, kind=int):
+    """Parse "a,b,c" or an inclusive "start:stop[:step]" range into a list"""
+    values = []
+    for part in spec.split(","):
+        if ":" in part:
+            bounds = [kind(bound) for bound in part.split(":")]
+            start, stop = bounds[0], bounds[1]
+            step = bounds[2] if len(bounds) > 2 else 1
+            if step <= 0:
+                raise ValueError(f"range step must be positive: {part}")
+            count = int(round((stop - start) / step)) + 1
+            # Rounding keeps float ranges like 0.3:0.5:0.1 free of 0.5000000000000001
+            values.extend(kind(round(start + i * step, 9)) for i in range(count))
+        else:
+            values.append(kind(part))
+    return values
+
+
+def build_grid(base=None, **ranges):
+    """Every ShiftConfig in the cartesian product of the given field ranges"""
+    base = base if base is not None else shift_config()
+    names = list(ranges)
+    for values in itertools.product(*(ranges[name] for name in names)):
+        config = base._replace(**dict(zip(names, values)))
+        if config.dwell_min_ms <= config.dwell_max_ms:
+            yield config
+
+
+def cell_key(config):
+    """Key identifying a cell in the output file, used to resume sweeps"""
+    return tuple(str(value) for value in config)
+
+
+def hash_key(key):
+    """Stable 32-bit hash of a cell key (built-in hash() is salted per process)"""
+    value = 2166136261
+    for byte in "|".join(key).encode():
+        value = ((value ^ byte) * 16777619) & 0xFFFFFFFF
+    return value
+
+
+def completed_cells(path):
+    """Keys of cells already written to path; drops a torn final line"""
+    if not os.path.exists(path):
+        return set()
+    with open(path, "rb+") as f:
+        data = f.read()
+        if data and not data.endswith(b"\n"):
+            # Interrupted mid-write: cut back to the last complete row
+            f.truncate(data.rfind(b"\n") + 1)
+    done = set()
+    with open(path, newline="") as f:
+        for row in csv.DictReader(f):
+            if all(row.get(field) not in (None, "") for field in CSV_FIELDS):
+                done.add(tuple(row[field] for field in ShiftConfig._fields))
+    return done
+
+
+def _run_cell(job):
+    config, shifts, seed, reaction_ms = job
+    summary = summarize(simulate_shifts(shifts, config, seed, reaction_ms))
+    row = dict(config._asdict(), shifts=shifts, seed=seed)
+    row.update((field, summary[field]) for field in RESULT_FIELDS)
+    return row
+
+
+def run_sweep(configs, out_path, shifts=1000, seed=0, reaction_ms=0, workers=None, progress=None):
+    """Simulate every config not already in out_path and append the results
+
+    Each cell gets its own seed derived from seed and the cell's parameters,
+    so results do not depend on worker count or completion order. Returns the
+    number of cells run.
+    """
+    done = completed_cells(out_path)
+    jobs = []
+    for config in configs:
+        key = cell_key(config)
+        if key in done:
+            continue
+        done.add(key)
+        cell_seed = int(np.random.SeedSequence([seed, hash_key(key)]).generate_state(1)[0])
+        jobs.append((config, shifts, cell_seed, reaction_ms))
+    if not jobs:
+        return 0
+
+    new_file = not os.path.exists(out_path) or os.path.getsize(out_path) == 0
+    workers = workers or os.cpu_count() or 1
+    # Several cells per task keeps IPC overhead low on very large grids
+    chunksize = max(1, min(64, len(jobs) // (workers * 8)))
+    with open(out_path, "a", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=CSV_FIELDS)
+        if new_file:
+            writer.writeheader()
+        with multiprocessing.Pool(workers) as pool:
+            for count, row in enumerate(pool.imap_unordered(_run_cell, jobs, chunksize), 1):
+                writer.writerow(row)
+                f.flush()
+                if progress:
+                    progress(count, len(jobs))
+    return len(jobs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sweep shift parameters across all cores")
+    parser.add_argument("--out", required=True, help="CSV file to append results to (resumes if present)")
+    parser.add_argument("--difficulty", choices=["easy", "hard"], default="easy",
+                        help="defaults for any parameter not swept")
+    for field, (option, kind) in SWEEP_OPTIONS.items():
+        parser.add_argument(option, dest=field, metavar="VALUES",
+                            help="comma list and/or start:stop[:step] range")
+    parser.add_argument("--shifts", type=int, default=1000, help="shifts simulated per cell")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--reaction-ms", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=None, help="processes (default: all cores)")
+    args = parser.parse_args()
+
+    ranges = {}
+    for field, (option, kind) in SWEEP_OPTIONS.items():
+        spec = getattr(args, field)
+        if spec is not None:
+            ranges[field] = parse_values(spec, kind)
+
+    def progress(count, total):
+        if count == total or count % 100 == 0:
+            print(f"{count}/{total} cells", flush=True)
+
+    configs = build_grid(shift_config(args.difficulty), **ranges)
+    ran = run_sweep(configs, args.out, args.shifts, args.seed, args.reaction_ms, args.workers, progress)
+    print(f"{ran} cells written to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
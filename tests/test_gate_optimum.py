@@ -0,0 +1,90 @@
+import itertools
+import random
+
+import pytest
+
+from gate_optimum import (Visit, assign_gates, generate_day, max_served, max_served_with_wait, min_gates,
+                          optimize_day)
+from sim_data import NARROWBODY, WIDEBODY
+
+
+def random_visits(rng, n):
+    return [Visit(rng.randrange(0, 60), rng.randrange(1, 30), NARROWBODY, None) for _ in range(n)]
+
+
+def on_ground(visits):
+    """Most visits parked at once, a gate freed at a visit's arrival counting as free"""
+    return max((sum(1 for other in visits if other.arrive <= visit.arrive < other.arrive + other.dwell)
+                for visit in visits), default=0)
+
+
+def brute_max_served(visits, n_gates):
+    for size in range(len(visits), -1, -1):
+        for kept in itertools.combinations(visits, size):
+            if on_ground(kept) <= n_gates:
+                return size
+
+
+def brute_max_served_with_wait(visits, n_gates, max_wait_ms):
+    """Every subset, parked in arrival order, with every choice of gate"""
+    flights = sorted((visit.arrive, visit.dwell) for visit in visits)
+    best = 0
+    for mask in range(1 << len(flights)):
+        kept = [flight for index, flight in enumerate(flights) if mask >> index & 1]
+        if len(kept) <= best:
+            continue
+        for gates in itertools.product(range(n_gates), repeat=len(kept)):
+            free_at = [0] * n_gates
+            last_start = 0
+            for (arrive, dwell), gate in zip(kept, gates):
+                start = max(arrive, last_start, free_at[gate])
+                if start - arrive > max_wait_ms:
+                    break
+                free_at[gate] = start + dwell
+                last_start = start
+            else:
+                best = len(kept)
+                break
+    return best
+
+
+@pytest.mark.parametrize("seed", range(40))
+def test_min_gates_and_max_served_match_brute_force(seed):
+    rng = random.Random(seed)
+    visits = random_visits(rng, rng.randrange(1, 9))
+    assert min_gates(visits) == on_ground(visits)
+    for n_gates in range(4):
+        kept = max_served(visits, n_gates)
+        assert len(kept) == brute_max_served(visits, n_gates)
+        assert on_ground([visits[index] for index in kept]) <= n_gates
+
+
+@pytest.mark.parametrize("seed", range(30))
+def test_max_served_with_wait_matches_brute_force(seed):
+    rng = random.Random(seed)
+    visits = random_visits(rng, rng.randrange(1, 7))
+    n_gates = rng.randrange(1, 3)
+    max_wait_ms = rng.choice([0, 3, 10, 25])
+    served, proven = max_served_with_wait(visits, n_gates, max_wait_ms)
+    assert proven
+    assert served == brute_max_served_with_wait(visits, n_gates, max_wait_ms)
+
+
+def test_assigned_gates_never_overlap():
+    visits = random_visits(random.Random(1), 200)
+    n_gates = 5
+    kept = max_served(visits, n_gates)
+    gates = assign_gates(visits, kept, n_gates)
+    for gate in range(n_gates):
+        stays = sorted((visits[index].arrive, visits[index].arrive + visits[index].dwell)
+                       for index, assigned in gates.items() if assigned == gate)
+        assert all(leave <= arrive for (_, leave), (arrive, _) in zip(stays, stays[1:]))
+
+
+def test_optimize_day_solves_each_class_separately():
+    visits = generate_day(300, 600, seed=2)
+    optimum = optimize_day(visits, {NARROWBODY: 8, WIDEBODY: 3})
+    for gate_class, n_gates in ((NARROWBODY, 8), (WIDEBODY, 3)):
+        group = [visit for visit in visits if visit.gate_class == gate_class]
+        assert optimum.classes[gate_class].served == len(max_served(group, n_gates))
+    assert optimum.served == sum(result.served for result in optimum.classes.values())
@@ -0,0 +1,21 @@
+import pytest
+
+from network_sim import build_network, partition_network, simulate_network
+
+
+@pytest.mark.parametrize("workers", [2, 3, 5])
+def test_result_does_not_depend_on_the_worker_count(workers):
+    network = build_network(60)
+    assert simulate_network(network, seed=1, workers=workers) == simulate_network(network, seed=1, workers=1)
+
+
+def test_different_seeds_give_different_days():
+    network = build_network(12)
+    assert simulate_network(network, seed=1) != simulate_network(network, seed=2)
+
+
+def test_partitions_cover_every_airport_once():
+    network = build_network(60)
+    groups = partition_network(network, 4)
+    assert len(groups) == 4
+    assert sorted(spec.code for group in groups for spec in group) == sorted(spec.code for spec in network)
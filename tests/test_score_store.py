@@ -0,0 +1,76 @@
+import sqlite3
+
+import pytest
+
+from score_store import FlightStat, ScoreStore, ShiftRecord, ShiftStats
+from sim_engine import ShiftEngine
+
+
+def shift(player, score, outcome="assigned"):
+    return ShiftRecord(player, "easy", score, 3, False, 40000, "2026-01-01T00:00:00",
+                       [FlightStat("DL100", "B737", "A1", outcome, 1200)])
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = ScoreStore(str(tmp_path / "scores.db"), batch_size=4)
+    yield store
+    store.close()
+
+
+def test_recorded_shifts_are_ranked(store):
+    for player, score in [("a", 300), ("b", 900), ("c", 600)]:
+        store.record(shift(player, score))
+    store.flush()
+    assert [row.player for row in store.top_scores()] == ["b", "c", "a"]
+    assert store.dropped == 0
+
+
+def test_a_bad_shift_is_dropped_and_the_rest_of_its_batch_saved(store):
+    store.record(shift("a", 100))
+    store.record(shift("bad", 200, outcome="crashed"))  # Unknown outcome: _shift_row raises KeyError
+    store.record(shift("b", 300))
+    store.flush()
+    assert sorted(row.player for row in store.top_scores()) == ["a", "b"]
+    assert store.dropped == 1
+    assert isinstance(store.last_error, KeyError)
+
+
+def test_writer_keeps_going_after_a_failure(store):
+    store.record(shift("bad", 100, outcome="crashed"))
+    store.flush()
+    store.record(shift("later", 200))
+    store.flush()
+    assert [row.player for row in store.top_scores()] == ["later"]
+    assert store.writer.is_alive()
+
+
+def test_database_errors_drop_the_shift(store):
+    store.record(shift("a", 100)._replace(end_ms=None))  # NOT NULL column
+    store.record(shift("b", 200))
+    store.flush()
+    assert [row.player for row in store.top_scores()] == ["b"]
+    assert store.dropped == 1
+    assert isinstance(store.last_error, sqlite3.IntegrityError)
+
+
+def test_close_commits_what_is_queued_and_refuses_more(tmp_path):
+    path = str(tmp_path / "scores.db")
+    store = ScoreStore(path)
+    store.record(shift("a", 100))
+    store.close()
+    store.close()
+    with pytest.raises(ValueError):
+        store.record(shift("b", 200))
+    reopened = ScoreStore(path)
+    assert [row.player for row in reopened.top_scores()] == ["a"]
+    reopened.close()
+
+
+def test_shift_stats_records_a_played_shift(store):
+    engine = ShiftEngine("hard", seed=5)
+    ShiftStats(engine, store, "player")
+    result = engine.run()
+    store.flush()
+    [row] = store.top_scores()
+    assert (row.player, row.score, row.end_ms) == ("player", result.score, result.end_ms)
@@ -0,0 +1,47 @@
+import pytest
+
+from shift_log import ShiftRecorder, read_log, record_policy_shift, replay
+from sim_engine import ShiftEngine
+
+
+@pytest.mark.parametrize("policy, difficulty, seed", [("first-fit", "easy", 7), ("random", "hard", 11),
+                                                      ("lookahead", "easy", 3)])
+def test_replay_matches_the_recorded_shift(tmp_path, policy, difficulty, seed):
+    path = str(tmp_path / "shift.jsonl")
+    recorded = record_policy_shift(path, policy, difficulty, seed)
+    replayed = replay(path)
+    assert replayed.divergence is None
+    assert replayed.result == recorded
+    assert replayed.events == len(read_log(path)[1])
+
+
+def test_gzipped_log_replays(tmp_path):
+    path = str(tmp_path / "shift.jsonl.gz")
+    recorded = record_policy_shift(path, "first-fit", "hard", 5)
+    assert replay(path).result == recorded
+
+
+def test_abandoned_shift_replays_up_to_where_it_stopped(tmp_path):
+    path = str(tmp_path / "shift.jsonl")
+    engine = ShiftEngine("easy", seed=9)
+    recorder = ShiftRecorder(engine, path)
+    engine.start()
+    engine.advance(20000)
+    recorder.close()
+    header, _ = read_log(path)
+    assert header["end_time"] == 20000
+    replayed = replay(path)
+    assert replayed.divergence is None
+    assert replayed.result == engine.result()
+
+
+def test_changed_log_is_reported_as_a_divergence(tmp_path):
+    path = tmp_path / "shift.jsonl"
+    record_policy_shift(str(path), "first-fit", "easy", 7)
+    lines = path.read_text(encoding="utf-8").splitlines()
+    index = next(i for i, line in enumerate(lines) if '"assigned"' in line)
+    lines[index] = lines[index].replace('"points":', '"points":1', 1)
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    divergence = replay(str(path)).divergence
+    assert divergence is not None
+    assert divergence.expected == lines[index]
@@ -0,0 +1,82 @@
+from sim_engine import EventQueue, ShiftEngine
+
+
+def test_events_fire_in_time_order_and_ties_in_schedule_order():
+    queue = EventQueue()
+    fired = []
+    for delay, name in [(30, "c"), (10, "a"), (20, "b1"), (20, "b2"), (0, "now")]:
+        queue.schedule(delay, fired.append, name)
+    queue.run_until(100)
+    assert fired == ["now", "a", "b1", "b2", "c"]
+    assert queue.now == 100
+
+
+def test_run_until_stops_at_its_horizon():
+    queue = EventQueue()
+    fired = []
+    queue.schedule(10, fired.append, "early")
+    queue.schedule(50, fired.append, "late")
+    queue.run_until(50 - 1)
+    assert fired == ["early"] and queue.now == 49
+    assert queue.next_time() == 50
+
+
+def test_events_scheduled_while_running_fire_in_the_same_run():
+    queue = EventQueue()
+    fired = []
+    queue.schedule(10, lambda: queue.schedule(5, fired.append, queue.now))
+    queue.run_until(20)
+    assert fired == [10]
+
+
+def test_cancel_skips_the_event_and_updates_len():
+    queue = EventQueue()
+    fired = []
+    keep = queue.schedule(10, fired.append, "keep")
+    drop = queue.schedule(5, fired.append, "drop")
+    assert len(queue) == 2
+    queue.cancel(drop)
+    queue.cancel(drop)  # A second cancel is harmless
+    assert len(queue) == 1
+    assert queue.time_of(drop) is None and queue.time_of(keep) == 10
+    assert [args for _, _, args in queue.pending()] == [("keep",)]
+    queue.run_until(100)
+    assert fired == ["keep"]
+    assert len(queue) == 0
+
+
+def test_cancel_after_firing_does_not_change_len():
+    queue = EventQueue()
+    fired = queue.schedule(1, lambda: None)
+    queue.schedule(10, lambda: None)
+    queue.run_until(5)
+    queue.cancel(fired)
+    assert len(queue) == 1
+
+
+def test_step_fires_one_event_at_a_time():
+    queue = EventQueue()
+    fired = []
+    queue.schedule(20, fired.append, 2)
+    queue.schedule(10, fired.append, 1)
+    assert queue.step() and fired == [1] and queue.now == 10
+    assert queue.step() and fired == [1, 2] and queue.now == 20
+    assert not queue.step()
+
+
+def test_clear_during_a_run_leaves_the_clock_where_it_stopped():
+    queue = EventQueue()
+    queue.schedule(10, queue.clear)
+    queue.schedule(20, lambda: None)
+    queue.run_until(1000)
+    assert queue.now == 10 and len(queue) == 0
+
+
+def test_end_ms_is_when_the_game_ended():
+    engine = ShiftEngine("hard", seed=3)
+    engine.start()
+    while not engine.game_over:
+        engine.advance(1000)
+    end_ms = engine.result().end_ms
+    engine.advance(50000)
+    assert engine.result().end_ms == end_ms == engine.now
@@ -0,0 +1,89 @@
+import json
+
+import pytest
+
+import snapshot
+from arrivals import make_arrivals
+from flight_stream import FlightGenerator
+from policies import attach_policy, make_policy
+from shift_log import encode_event
+from sim_engine import ShiftEngine
+
+
+def play_out(engine):
+    """Every event from here to the end of the shift, then the result"""
+    events = []
+    engine.subscribe(lambda kind, fields: events.append(encode_event(engine.now, kind, fields)))
+    attach_policy(engine, make_policy("first-fit"))
+    while not engine.game_over and engine.queue.step():
+        pass
+    return events, engine.result()
+
+
+ENGINES = {
+    "default": lambda: ShiftEngine("easy", seed=4),
+    "stream": lambda: ShiftEngine("hard", seed=5, flights=FlightGenerator(8)),
+    "poisson": lambda: ShiftEngine("easy", seed=6, arrivals=make_arrivals("poisson", 40), handoff_ms=0),
+    "banked": lambda: ShiftEngine("hard", seed=7, arrivals=make_arrivals("banked", 20)),
+    "zero rate": lambda: ShiftEngine("easy", seed=8, arrivals=make_arrivals("poisson", 0)),
+}
+
+
+def started(make, advance_ms):
+    engine = make()
+    engine.start()
+    engine.advance(advance_ms)
+    return engine
+
+
+@pytest.mark.parametrize("kind", ENGINES)
+@pytest.mark.parametrize("advance_ms", [0, 7300, 41000])
+def test_fork_carries_on_like_the_original(kind, advance_ms):
+    engine = started(ENGINES[kind], advance_ms)
+    copy = snapshot.fork(engine)
+    assert play_out(copy) == play_out(engine)
+
+
+@pytest.mark.parametrize("kind", ENGINES)
+@pytest.mark.parametrize("name", ["shift.json", "shift.json.gz"])
+def test_saved_snapshot_carries_on_like_the_original(tmp_path, kind, name):
+    engine = started(ENGINES[kind], 23000)
+    path = str(tmp_path / name)
+    snapshot.save(snapshot.capture(engine), path)
+    loaded = snapshot.load(path)
+    assert json.dumps(snapshot.to_dict(loaded)) == json.dumps(snapshot.to_dict(snapshot.capture(engine)))
+    assert play_out(snapshot.restore(loaded)) == play_out(engine)
+
+
+def test_paused_snapshot_stays_paused():
+    engine = started(ENGINES["default"], 12000)
+    engine.set_paused(True)
+    copy = snapshot.fork(engine)
+    assert copy.paused
+    copy.advance(60000)
+    assert copy.now == engine.now
+    engine.set_paused(False)
+    copy.set_paused(False)
+    assert play_out(copy) == play_out(engine)
+
+
+def test_zero_rate_shift_gets_no_flights():
+    engine = started(ENGINES["zero rate"], 60000)
+    copy = snapshot.fork(engine)
+    assert engine.arrivals_drawn == copy.arrivals_drawn == 0
+    events, _ = play_out(copy)
+    assert not any('"flight"' in event for event in events)
+
+
+def test_restore_counting_past_the_end_of_the_arrivals():
+    engine = started(ENGINES["zero rate"], 5000)
+    copy = snapshot.restore(snapshot.capture(engine)._replace(arrivals_drawn=1))
+    assert play_out(copy) == play_out(engine)
+
+
+def test_turnaround_engines_cannot_be_captured():
+    from turnaround import TurnaroundModel
+
+    engine = ShiftEngine("easy", seed=1, turnaround=TurnaroundModel(3, 2, 2, seed=1))
+    with pytest.raises(ValueError):
+        snapshot.capture(engine)
@@ -0,0 +1,119 @@
+"""Non-modal toast notifications with a bounded queue and rate limiting
+
+ToastQueue shows one short notification at a time and never blocks: it
+only calls the show/hide callbacks it is given and schedules its own expiry,
+so it works with tkinter's root.after or with an EventQueue in tests (pass
+clock=lambda: queue.now with the latter).
+
+Pending toasts are capped at max_pending; when more arrive the oldest
+pending ones are dropped, since stale feedback is worse than none. A toast
+with the same key as one still waiting is merged into it with a repeat
+count. Toasts are shown at most one per min_gap_ms, and each stays up for
+a shorter time when others are waiting, so a burst of feedback drains
+quickly instead of queueing up behind the player.
+"""
+import time
+from collections import deque
+
+MAX_PENDING = 4
+DURATION_MS = 2500  # How long a toast stays up when nothing else is waiting
+BUSY_DURATION_MS = 900  # How long it stays up when others are waiting
+MIN_GAP_MS = 150  # Pause between one toast and the next
+
+
+class Toast:
+    """One notification; count goes up when repeats are merged into it"""
+
+    __slots__ = ("title", "message", "kind", "key", "count")
+
+    def __init__(self, title, message, kind="info", key=None):
+        self.title = title
+        self.message = message
+        self.kind = kind
+        self.key = key
+        self.count = 1
+
+    def text(self):
+        repeat = f"  (×{self.count})" if self.count > 1 else ""
+        return f"{self.title}{repeat}\n{self.message}"
+
+
+class ToastQueue:
+    """Shows toasts one at a time through show(toast) and hide() callbacks"""
+
+    def __init__(self, show, hide, schedule, cancel, max_pending=MAX_PENDING,
+                 duration_ms=DURATION_MS, busy_duration_ms=BUSY_DURATION_MS, min_gap_ms=MIN_GAP_MS,
+                 clock=None):
+        # schedule(delay_ms, callback) returns a handle that cancel(handle) accepts,
+        # and clock() is the time in ms that schedule counts delays on
+        self.show = show
+        self.hide = hide
+        self.schedule = schedule
+        self.cancel = cancel
+        self.clock = clock if clock is not None else (lambda: time.monotonic() * 1000)
+        self.max_pending = max_pending
+        self.duration_ms = duration_ms
+        self.busy_duration_ms = busy_duration_ms
+        self.min_gap_ms = min_gap_ms
+        self.pending = deque()
+        self.current = None  # Toast on screen
+        self.shown = 0
+        self.dropped = 0
+        self._timer = None  # Expiry of the current toast, or the gap after it
+        self._expires_at = None  # clock() time the current toast is due to go
+        self._in_gap = False
+
+    def push(self, title, message, kind="info", key=None):
+        """Queue a notification; returns at once whatever is on screen"""
+        if key is not None:
+            for toast in self.pending:
+                if toast.key == key:
+                    toast.title, toast.message = title, message
+                    toast.count += 1
+                    return toast
+        toast = Toast(title, message, kind, key)
+        self.pending.append(toast)
+        while len(self.pending) > self.max_pending:
+            self.pending.popleft()
+            self.dropped += 1
+        if self.current is None and not self._in_gap:
+            self._show_next()
+        elif self.current is not None and not self._in_gap and len(self.pending) == 1:
+            # Someone is waiting now: cut the current toast short, never longer
+            now = self.clock()
+            if self._expires_at - now > self.busy_duration_ms:
+                self.cancel(self._timer)
+                self._expires_at = now + self.busy_duration_ms
+                self._timer = self.schedule(self.busy_duration_ms, self._expire)
+        return toast
+
+    def clear(self):
+        """Drop everything, including the toast on screen"""
+        self.cancel(self._timer)
+        self._timer = None
+        self._in_gap = False
+        self.pending.clear()
+        if self.current is not None:
+            self.current = None
+            self.hide()
+
+    def _show_next(self):
+        self._in_gap = False
+        self._timer = None
+        if not self.pending:
+            return
+        self.current = self.pending.popleft()
+        self.shown += 1
+        self.show(self.current)
+        duration = self.busy_duration_ms if self.pending else self.duration_ms
+        self._expires_at = self.clock() + duration
+        self._timer = self.schedule(duration, self._expire)
+
+    def _expire(self):
+        self.current = None
+        self.hide()
+        if self.pending:
+            self._in_gap = True
+            self._timer = self.schedule(self.min_gap_ms, self._show_next)
+        else:
+            self._timer = None
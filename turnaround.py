@@ -0,0 +1,343 @@
+"""Aircraft turnarounds that compete for ground crews, fuel trucks and tugs
+
+A turn starts when a plane parks. A ground crew services it (deplaning,
+cleaning, catering, boarding) while a fuel truck fuels it, and once both
+are done a pushback tug takes it off the stand. Phase times depend on the
+aircraft's ICAO size code and on the route: international flights take
+longer to cater and to fuel. Widebodies need two crews.
+
+Each kind of resource is a ResourcePool of identical units. Requests that
+cannot be served at once wait in a heap ordered by the turn's scheduled
+off-block time, so the flight due out first is served first. All timing
+runs on an EventQueue in whole milliseconds, so a whole hub day takes a few
+milliseconds, and the same model can drive a ShiftEngine's departures in game time, using
+GAME_MINUTE_MS from arrivals.py:
+
+    model = TurnaroundModel(crews=3, fuel_trucks=2, tugs=2, minute_ms=GAME_MINUTE_MS, seed=7)
+    engine = ShiftEngine("easy", turnaround=model)
+
+simulate_day() runs a hub's full day of arrivals through the model, and
+the CLI sweeps pool sizes to find how many crews, trucks and tugs keep
+departures on time:
+
+    python turnaround.py --movements 1000 --crews 50 --fuel-trucks 15 --tugs 6
+    python turnaround.py --movements 1000 --crews 30:70:10 --fuel-trucks 10,15,20 --tugs 6
+"""
+import argparse
+import heapq
+import itertools
+import random
+import time
+from collections import deque, namedtuple
+
+from flight_stream import FlightGenerator
+from gate_compat import size_code
+from gate_pool import GatePool
+from sim_data import NARROWBODY, WIDEBODY, gate_names, international_destinations
+from sim_engine import EventQueue
+
+# Phase times in minutes by ICAO size code, before random variation
+SERVICE_MINUTES = {"C": 30, "D": 40, "E": 60, "F": 75}
+INTERNATIONAL_SERVICE_MINUTES = 15  # Extra catering and security on international turns
+FUEL_MINUTES = {"C": 12, "D": 15, "E": 20, "F": 25}
+LONG_HAUL_FUEL_FACTOR = 2  # International legs take on about twice the fuel
+PUSHBACK_MINUTES = {"C": 5, "D": 5, "E": 8, "F": 10}
+CREW_UNITS = {"C": 1, "D": 1, "E": 2, "F": 2}  # Ground crews a turn needs at once
+VARIATION = (0.9, 1.25)  # Each phase takes its nominal time times a factor in this range
+ON_TIME_MINUTES = 15  # Off-block this late or less counts as on time
+
+# Hub day: arrivals from DAY_START to DAY_END, most of them in banks
+DAY_START = 6 * 60
+DAY_END = 23 * 60
+BANKS = (7 * 60, 11 * 60, 15 * 60, 19 * 60)
+BANK_SHARE = 0.6  # Share of arrivals that come in banks
+BANK_SPREAD_MINUTES = 20  # Standard deviation of arrival times around a bank
+HUB_GATES = (60, 20)  # Narrowbody, widebody
+MINUTE_MS = 60_000  # Queue time per minute of a real hub day
+
+_international = frozenset(international_destinations)
+
+PoolStats = namedtuple("PoolStats", "name size requests mean_wait max_wait max_queue utilization")
+TurnStats = namedtuple("TurnStats", "turns on_time mean_delay p95_delay max_delay mean_turn")
+DayResult = namedtuple("DayResult", "movements turns pools gate_holds mean_gate_hold elapsed_s")
+
+
+class ResourcePool:
+    """Identical units of one resource, granted in priority order
+
+    A request takes effect at once if its units are free and nobody is
+    waiting; otherwise it waits. Waiters are served strictly in priority
+    order, so a turn needing two crews is not overtaken by later one-crew
+    turns.
+    """
+
+    def __init__(self, name, size):
+        if size < 1:
+            raise ValueError(f"{name}: need at least one unit")
+        self.name = name
+        self.size = size
+        self.reset()
+
+    def reset(self):
+        self.free = self.size
+        self.waiting = []  # Heap of (priority, seq, units, requested at, grant, args)
+        self._seq = itertools.count()
+        self.requests = 0
+        self.total_wait = 0
+        self.max_wait = 0
+        self.max_queue = 0
+        self._busy_area = 0  # Unit-time in use, integrated up to _changed
+        self._changed = None
+        self._first = None
+
+    def _mark(self, now):
+        if self._changed is not None:
+            self._busy_area += (self.size - self.free) * (now - self._changed)
+        else:
+            self._first = now
+        self._changed = now
+
+    def request(self, now, priority, units, grant, *args):
+        """Call grant(*args) as soon as units are free for it"""
+        if units > self.size:
+            raise ValueError(f"{self.name}: {units} units requested but the pool has {self.size}")
+        self.requests += 1
+        if not self.waiting and self.free >= units:
+            self._mark(now)
+            self.free -= units
+            grant(*args)
+            return
+        heapq.heappush(self.waiting, (priority, next(self._seq), units, now, grant, args))
+        self.max_queue = max(self.max_queue, len(self.waiting))
+
+    def release(self, now, units):
+        """Return units and grant waiters, best priority first, while they fit"""
+        self._mark(now)
+        self.free += units
+        waiting = self.waiting
+        while waiting and waiting[0][2] <= self.free:
+            _, _, needed, requested, grant, args = heapq.heappop(waiting)
+            self.free -= needed
+            wait = now - requested
+            self.total_wait += wait
+            self.max_wait = max(self.max_wait, wait)
+            grant(*args)
+
+    def stats(self, now, scale=1):
+        """PoolStats up to now, with waits divided by scale"""
+        self._mark(now)
+        span = now - self._first if self._first is not None else 0
+        return PoolStats(self.name, self.size, self.requests,
+                         self.total_wait / self.requests / scale if self.requests else 0.0, self.max_wait / scale,
+                         self.max_queue, self._busy_area / (self.size * span) if span else 0.0)
+
+
+class Turn:
+    """One aircraft's turnaround in progress"""
+
+    __slots__ = ("flight", "due", "parked", "service", "fuel", "pushback", "crews", "open", "done", "args")
+
+    def __init__(self, flight, due, parked, service, fuel, pushback, crews, done, args):
+        self.flight = flight
+        self.due = due  # Scheduled off-block time: the priority for every resource
+        self.parked = parked
+        self.service = service
+        self.fuel = fuel
+        self.pushback = pushback
+        self.crews = crews
+        self.open = 2  # Service and fuelling still running
+        self.done = done
+        self.args = args
+
+
+def nominal_minutes(flight):
+    """(service, fuel, pushback, crews) of a turn before random variation"""
+    code = size_code(flight.aircraft)
+    international = flight.destination in _international
+    service = SERVICE_MINUTES[code] + (INTERNATIONAL_SERVICE_MINUTES if international else 0)
+    fuel = FUEL_MINUTES[code] * (LONG_HAUL_FUEL_FACTOR if international else 1)
+    return service, fuel, PUSHBACK_MINUTES[code], CREW_UNITS[code]
+
+
+class TurnaroundModel:
+    """Turns of parked aircraft, gated by shared crew, fuel truck and tug pools"""
+
+    def __init__(self, crews, fuel_trucks, tugs, minute_ms=MINUTE_MS, seed=None):
+        if crews < max(CREW_UNITS.values()):
+            raise ValueError(f"widebody turns need {max(CREW_UNITS.values())} crews, only {crews} given")
+        self.crews = ResourcePool("crews", crews)
+        self.fuel_trucks = ResourcePool("fuel trucks", fuel_trucks)
+        self.tugs = ResourcePool("tugs", tugs)
+        self.minute_ms = minute_ms  # Queue ms per minute of turn time
+        self.seed = seed if seed is not None else random.randrange(2 ** 63)
+        self.queue = None
+        self.reset(EventQueue())
+
+    def reset(self, queue):
+        """Drop every turn in progress and run future turns on queue"""
+        self.queue = queue
+        self.rng = random.Random(self.seed)
+        for pool in self.pools:
+            pool.reset()
+        self.delays = []
+        self.turn_times = []
+
+    @property
+    def pools(self):
+        return (self.crews, self.fuel_trucks, self.tugs)
+
+    def start(self, flight, done, *args):
+        """Begin turning flight around now; done(*args) runs once it is pushed back
+
+        Returns the Turn, whose due is the scheduled off-block time.
+        """
+        service, fuel, pushback, crews = nominal_minutes(flight)
+        scale = self.minute_ms
+        uniform = self.rng.uniform
+        low, high = VARIATION
+        now = self.queue.now
+        # Whole ms, like every other time on the engine's queue
+        turn = Turn(flight, now + round((max(service, fuel) + pushback) * scale), now,
+                    round(service * uniform(low, high) * scale), round(fuel * uniform(low, high) * scale),
+                    round(pushback * uniform(low, high) * scale), crews, done, args)
+        self.crews.request(now, turn.due, crews, self._serve, turn)
+        self.fuel_trucks.request(now, turn.due, 1, self._fuel, turn)
+        return turn
+
+    def _serve(self, turn):
+        self.queue.schedule(turn.service, self._served, turn)
+
+    def _fuel(self, turn):
+        self.queue.schedule(turn.fuel, self._fuelled, turn)
+
+    def _served(self, turn):
+        self.crews.release(self.queue.now, turn.crews)
+        self._phase_done(turn)
+
+    def _fuelled(self, turn):
+        self.fuel_trucks.release(self.queue.now, 1)
+        self._phase_done(turn)
+
+    def _phase_done(self, turn):
+        turn.open -= 1
+        if not turn.open:
+            self.tugs.request(self.queue.now, turn.due, 1, self._push, turn)
+
+    def _push(self, turn):
+        self.queue.schedule(turn.pushback, self._pushed, turn)
+
+    def _pushed(self, turn):
+        now = self.queue.now
+        self.tugs.release(now, 1)
+        self.delays.append(max(0, now - turn.due))
+        self.turn_times.append(now - turn.parked)
+        turn.done(*turn.args)
+
+    def turn_stats(self):
+        """TurnStats of the turns finished so far, in minutes"""
+        if not self.delays:
+            return TurnStats(0, 0.0, 0.0, 0.0, 0.0, 0.0)
+        scale = self.minute_ms
+        delays = sorted(self.delays)
+        on_time = sum(1 for delay in delays if delay <= ON_TIME_MINUTES * scale) / len(delays)
+        return TurnStats(len(delays), on_time, sum(delays) / len(delays) / scale,
+                         delays[int(0.95 * (len(delays) - 1))] / scale, delays[-1] / scale,
+                         sum(self.turn_times) / len(self.turn_times) / scale)
+
+    def pool_stats(self):
+        """PoolStats of crews, fuel trucks and tugs so far, waits in minutes"""
+        return [pool.stats(self.queue.now, self.minute_ms) for pool in self.pools]
+
+
+def day_arrivals(n_arrivals, rng):
+    """Sorted arrival minutes of a hub day: banks plus a steady trickle"""
+    times = []
+    for _ in range(n_arrivals):
+        if rng.random() < BANK_SHARE:
+            when = rng.gauss(rng.choice(BANKS), BANK_SPREAD_MINUTES)
+        else:
+            when = rng.uniform(DAY_START, DAY_END)
+        times.append(min(max(when, DAY_START), DAY_END))
+    times.sort()
+    return times
+
+
+def simulate_day(movements=1000, crews=50, fuel_trucks=15, tugs=6, gates=HUB_GATES, seed=0):
+    """Run a hub day of movements (arrivals plus departures) through the model
+
+    Every arrival parks at the first free gate of its class, or holds until
+    one frees up. Its turn starts when it parks, and the gate is free again
+    once the plane is pushed back. Times are in minutes.
+    """
+    start = time.perf_counter()
+    rng = random.Random(f"{seed}/arrivals")
+    model = TurnaroundModel(crews, fuel_trucks, tugs, seed=seed)
+    queue = model.queue
+    gate_pool = GatePool({NARROWBODY: gate_names("A", gates[0]), WIDEBODY: gate_names("B", gates[1])})
+    holding = {gate_class: deque() for gate_class in gate_pool.classes}  # (flight, arrived at)
+    holds = []
+
+    def park(flight, gate):
+        gate_pool.acquire(gate, flight)
+        model.start(flight, leave, gate)
+
+    def arrive(flight):
+        gate = gate_pool.first_free(flight.aircraft_class)
+        if gate is None:
+            holding[flight.aircraft_class].append((flight, queue.now))
+        else:
+            holds.append(0)
+            park(flight, gate)
+
+    def leave(gate):
+        flight = gate_pool.release(gate)
+        waiting = holding[flight.aircraft_class]
+        if waiting:
+            next_flight, arrived = waiting.popleft()
+            holds.append(queue.now - arrived)
+            park(next_flight, gate)
+
+    flights = FlightGenerator(seed)
+    n_turns = movements // 2
+    for when, flight in zip(day_arrivals(n_turns, rng), flights.batch(n_turns)):
+        queue.schedule(round(when * MINUTE_MS), arrive, flight)
+    while queue.step():
+        pass
+    return DayResult(movements, model.turn_stats(), model.pool_stats(), sum(1 for hold in holds if hold),
+                     sum(holds) / len(holds) / MINUTE_MS if holds else 0.0, time.perf_counter() - start)
+
+
+def format_day(result):
+    turns = result.turns
+    lines = [f"{result.movements} movements ({turns.turns} turns) in {result.elapsed_s * 1000:.0f} ms: "
+             f"{turns.on_time:.1%} on time, delay mean {turns.mean_delay:.1f} / p95 {turns.p95_delay:.0f} / "
+             f"max {turns.max_delay:.0f} min, turn mean {turns.mean_turn:.0f} min, "
+             f"{result.gate_holds} held for a gate (mean {result.mean_gate_hold:.1f} min)"]
+    for pool in result.pools:
+        lines.append(f"  {pool.name:<12} {pool.size:>4}  busy {pool.utilization:6.1%}  wait mean "
+                     f"{pool.mean_wait:5.1f} max {pool.max_wait:5.0f} min  queue max {pool.max_queue}")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Size ground crews, fuel trucks and tugs for a hub day")
+    parser.add_argument("--movements", type=int, default=1000, help="arrivals plus departures in the day")
+    parser.add_argument("--crews", default="50", help="crew counts to try: a list and/or start:stop[:step]")
+    parser.add_argument("--fuel-trucks", default="15")
+    parser.add_argument("--tugs", default="6")
+    parser.add_argument("--narrowbody-gates", type=int, default=HUB_GATES[0])
+    parser.add_argument("--widebody-gates", type=int, default=HUB_GATES[1])
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    from sweep import parse_values
+
+    for crews, fuel_trucks, tugs in itertools.product(parse_values(args.crews), parse_values(args.fuel_trucks),
+                                                      parse_values(args.tugs)):
+        print(f"crews {crews}, fuel trucks {fuel_trucks}, tugs {tugs}")
+        print(format_day(simulate_day(args.movements, crews, fuel_trucks, tugs,
+                                      (args.narrowbody_gates, args.widebody_gates), args.seed)))
+
+
+if __name__ == "__main__":
+    main()